@@ -597,15 +597,18 @@ def search_web(query: str) -> dict:
 
 
 def take_screenshot(save_path: str = None) -> dict:
-    """Take a screenshot and save it or copy to clipboard."""
+    """Take a screenshot and save it or copy to clipboard.
+    Full resolution, but through the shared grabber — and the grab also refreshes
+    the frame store, so Tama's next look reuses it instead of grabbing again."""
     try:
-        import mss
         from PIL import Image
+        from screen_capture import grab_desktop_bgra, frame_store
 
-        with mss.mss() as sct:
-            monitor = sct.monitors[0]  # All monitors
-            screenshot = sct.grab(monitor)
-            img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
+        captured_at = time.time()
+        bgra, layout = grab_desktop_bgra()  # All monitors
+        height, width = bgra.shape[:2]
+        img = Image.frombuffer("RGB", (width, height), bgra, "raw", "BGRX", 0, 1)
+        frame_store.publish(bgra, layout, captured_at)
 
         if save_path and save_path.lower() != "clipboard":
             if not save_path.endswith((".png", ".jpg")):
@@ -6,17 +6,33 @@ Mic listing, selection, hot-swap, and Voice Activity Detection (VAD).
 import json
 import math
 import os
-import struct
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
+import numpy as np
 import pyaudio
 
-from config import SEND_SAMPLE_RATE, FORMAT, CHANNELS, CHUNK_SIZE, state, application_path
+from config import SEND_SAMPLE_RATE, FORMAT, CHANNELS, CHUNK_SIZE, VAD_ENGINE, state, application_path
 
 # ─── Mic Cache ──────────────────────────────────────────────
 _mic_cache = None
 _mic_cache_time = 0
 
+# ─── Probe Cache (persisted) ────────────────────────────────
+# fingerprint → {"ok": bool, "probed_at": ts}. A working device is only re-probed
+# when its fingerprint is new (plugged in for the first time, driver changed its
+# format). A failed one (busy, held exclusively by another app) is retried once
+# PROBE_FAIL_TTL has passed, so it comes back on a later settings open.
+_PROBE_CACHE_PATH = os.path.join(application_path, "mic_probe_cache.json")
+PROBE_TIMEOUT = 3.0          # Seconds for the whole batch of probes
+PROBE_FAIL_TTL = 60          # Seconds before a failed probe is retried
+_PROBE_CACHE_VERSION = 2     # v2: probed at the device's native rate (the mic path resamples to 16kHz)
+_probe_cache = None
+_probe_lock = threading.Lock()
+_probes_in_flight = set()    # Fingerprints being probed (claimed under _probe_lock) — never started twice
+_pa_lock = threading.Lock()  # PortAudio open/close/terminate are not thread-safe: one at a time
+
 # ─── User Preferences Persistence ───────────────────────────
 _PREFS_PATH = os.path.join(application_path, "user_prefs.json")
 
@@ -50,40 +66,148 @@ def get_available_mics():
     return []  # Empty on very first call, background thread fills it
 
 
+def _load_probe_cache() -> dict:
+    global _probe_cache
+    if _probe_cache is None:
+        _probe_cache = {}
+        try:
+            if os.path.exists(_PROBE_CACHE_PATH):
+                with open(_PROBE_CACHE_PATH, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("version") == _PROBE_CACHE_VERSION:
+                    _probe_cache = saved.get("devices", {})
+        except Exception as e:
+            print(f"⚠️ Cache des micros illisible, re-test complet: {e}")
+    return _probe_cache
+
+
+def _save_probe_cache():
+    try:
+        tmp_path = _PROBE_CACHE_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": _PROBE_CACHE_VERSION, "devices": _probe_cache}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, _PROBE_CACHE_PATH)
+    except Exception as e:
+        print(f"⚠️ Impossible de sauvegarder le cache des micros: {e}")
+
+
+def _device_fingerprint(pya, info) -> str:
+    """Stable identity of an input device: name, host API, default rate, channel count.
+    Indices are NOT part of it — they shift every time a device is plugged in."""
+    try:
+        host_api = pya.get_host_api_info_by_index(info["hostApi"])["name"]
+    except Exception:
+        host_api = str(info.get("hostApi", "?"))
+    return f"{info['name']}|{host_api}|{int(info['defaultSampleRate'])}|{info['maxInputChannels']}"
+
+
+def _probe_device(pya, index: int, rate: int) -> bool:
+    """Open (then close) a mono test stream at the device's native rate — the only
+    reliable check on WASAPI. Catches dead/busy devices; 16kHz support is not needed."""
+    try:
+        with _pa_lock:
+            test_stream = pya.open(format=pyaudio.paInt16, channels=1, rate=rate,
+                                   input=True, input_device_index=index, frames_per_buffer=512)
+            try:
+                test_stream.stop_stream()  # Opening was the test — nothing to read
+            finally:
+                test_stream.close()
+        return True
+    except Exception:
+        return False
+
+
+def _needs_probe(entry, now: float) -> bool:
+    if entry is None:
+        return True
+    return not entry.get("ok") and now - entry.get("probed_at", 0) >= PROBE_FAIL_TTL
+
+
+def _record_probe(fingerprint: str, ok: bool):
+    with _probe_lock:
+        _probe_cache[fingerprint] = {"ok": ok, "probed_at": int(time.time())}
+
+
+def _finish_late_probes(pya, late: dict):
+    """Probes that outlived PROBE_TIMEOUT: keep their result for next time, then
+    release PortAudio (terminating while a probe is still opening would crash)."""
+    wait(late)
+    for future, fingerprint in late.items():
+        try:
+            _record_probe(fingerprint, future.result())
+        except Exception:
+            pass
+    with _probe_lock:
+        _probes_in_flight.difference_update(late.values())
+        _save_probe_cache()
+    with _pa_lock:
+        pya.terminate()
+
+
 def refresh_mic_cache():
-    """Heavy WASAPI mic probing — ONLY call from a background thread.
-    Opens a test stream per device to check 16kHz support. Takes 2-5s."""
+    """Mic list refresh — ONLY call from a background thread.
+    Devices already tested (same fingerprint in mic_probe_cache.json) are not opened
+    again; new ones (and failures older than PROBE_FAIL_TTL) are probed off this
+    thread, bounded by PROBE_TIMEOUT. A warm refresh is just a device enumeration."""
     global _mic_cache, _mic_cache_time
 
     pya = pyaudio.PyAudio()
-    mics = []
-    seen_names = set()
+    cache = _load_probe_cache()
 
     exclude = ["steam streaming", "vb-audio", "cable output", "mappeur", "wo mic",
                "réseau de microphones", "input (vb", "cable input",
                "pilote de capture", "principal", "mixage stéréo", "stereo mix",
                "what u hear", "loopback", "wave out", "monitor of"]
 
+    candidates = []  # (index, name, fingerprint, native rate)
     for i in range(pya.get_device_count()):
         info = pya.get_device_info_by_index(i)
         if info["maxInputChannels"] <= 0:
             continue
-        name_lower = info["name"].lower()
-        if any(ex in name_lower for ex in exclude):
+        if any(ex in info["name"].lower() for ex in exclude):
             continue
-        name_prefix = name_lower[:15]
+        candidates.append((i, info["name"], _device_fingerprint(pya, info), int(info["defaultSampleRate"])))
+
+    # Pick and claim under one lock: a late probe from an earlier refresh may finish meanwhile
+    now = time.time()
+    with _probe_lock:
+        unknown = [(i, fp, rate) for i, _, fp, rate in candidates
+                   if _needs_probe(cache.get(fp), now) and fp not in _probes_in_flight]
+        _probes_in_flight.update(fp for _, fp, _ in unknown)
+    late = {}
+    if unknown:
+        started = time.time()
+        # One worker: PortAudio can't open streams concurrently on one PyAudio
+        # instance (WASAPI/MME deadlock or crash). The pool only moves the opens
+        # off this thread so a hanging device can't stall past PROBE_TIMEOUT.
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mic-probe")
+        futures = {pool.submit(_probe_device, pya, i, rate): fp for i, fp, rate in unknown}
+        done, pending = wait(futures, timeout=PROBE_TIMEOUT)
+        for future in done:
+            _record_probe(futures[future], future.result())
+        late = {future: futures[future] for future in pending}
+        pool.shutdown(wait=False)
+        print(f"🎤 {len(done)}/{len(unknown)} micros testés en {time.time() - started:.1f}s"
+              + (f" ({len(late)} trop lents, réessayés en arrière-plan)" if late else ""))
+        with _probe_lock:
+            _probes_in_flight.difference_update(futures[future] for future in done)  # Late ones stay claimed
+            _save_probe_cache()
+
+    mics = []
+    seen_names = set()
+    for i, name, fp, _ in candidates:
+        name_prefix = name.lower()[:15]
         if name_prefix in seen_names:
             continue
-        try:
-            test_stream = pya.open(format=pyaudio.paInt16, channels=1, rate=SEND_SAMPLE_RATE,
-                                   input=True, input_device_index=i, frames_per_buffer=512)
-            test_stream.close()
-            mics.append({"index": i, "name": info["name"]})
+        if cache.get(fp, {}).get("ok"):
+            mics.append({"index": i, "name": name})
             seen_names.add(name_prefix)
-        except OSError:
-            continue
 
-    pya.terminate()
+    if late:
+        threading.Thread(target=_finish_late_probes, args=(pya, late), daemon=True).start()
+    else:
+        with _pa_lock:
+            pya.terminate()
     _mic_cache = mics
     _mic_cache_time = time.time()
     return mics
@@ -151,14 +275,142 @@ def resolve_default_mic():
     print(f"🎤 Micro auto-sélectionné: [{state['selected_mic_index']}]")
 
 
+# ─── Chunk Analysis ─────────────────────────────────────────
+CLIP_LEVEL = 32000          # |sample| at or above this counts as clipped
+STUCK_WINDOW = 64           # A dead device repeats the same value — check the first N samples
+
+
+def analyze_chunk(pcm_data: bytes) -> dict | None:
+    """RMS, peak, clipping ratio, DC offset and stuck-sample flag of a 16-bit PCM mono chunk.
+    Reads the bytes through a zero-copy int16 view; only the float32 copy for the
+    squares is allocated. Returns None for an empty chunk (a trailing odd byte is ignored)."""
+    n_samples = len(pcm_data) // 2
+    if n_samples == 0:
+        return None
+    samples = np.frombuffer(pcm_data, dtype="<i2", count=n_samples)
+    as_float = samples.astype(np.float32)
+    head = samples[:STUCK_WINDOW]
+    return {
+        "rms": math.sqrt(float(np.dot(as_float, as_float)) / n_samples),
+        "peak": max(int(samples.max()), -int(samples.min())),
+        "clip_ratio": int(np.count_nonzero(np.abs(as_float) >= CLIP_LEVEL)) / n_samples,
+        "dc_offset": float(as_float.mean()),
+        "stuck": bool((head == head[0]).all()),
+    }
+
+
 def detect_voice_activity(pcm_data: bytes, threshold: float = 1200.0) -> bool:
     """Simple energy-based Voice Activity Detection on 16-bit PCM mono."""
     try:
-        n_samples = len(pcm_data) // 2
-        if n_samples == 0:
-            return False
-        samples = struct.unpack(f'<{n_samples}h', pcm_data)
-        rms = math.sqrt(sum(s * s for s in samples) / n_samples)
-        return rms > threshold
+        stats = analyze_chunk(pcm_data)
+        return stats is not None and stats["rms"] > threshold
     except Exception:
         return False
+
+
+# ─── VAD Engines ────────────────────────────────────────────
+# Pluggable deciders for the client audio gate. is_speech() takes the raw chunk
+# and, optionally, the analyze_chunk() stats already computed for it.
+
+class VadEngine:
+    """Interface: is_speech(pcm, stats=None) → bool, reset() between sessions."""
+
+    def is_speech(self, pcm_data, stats: dict | None = None) -> bool:
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+class EnergyVad(VadEngine):
+    """Fixed RMS threshold — the original gate. Cheap, but blind to the mic's gain:
+    quiet mics never cross it, loud fans always do."""
+
+    def __init__(self, threshold: float = 1200.0):
+        self.threshold = threshold
+
+    def is_speech(self, pcm_data, stats: dict | None = None) -> bool:
+        stats = stats or analyze_chunk(pcm_data)
+        return stats is not None and stats["rms"] > self.threshold
+
+
+_spectral_cache = {}  # chunk length → (hann window, speech-band mask)
+
+
+def _spectral_tables(n: int, sample_rate: int):
+    key = (n, sample_rate)
+    if key not in _spectral_cache:
+        freqs = np.fft.rfftfreq(n, 1.0 / sample_rate)
+        _spectral_cache[key] = (np.hanning(n).astype(np.float32), (freqs >= 100) & (freqs <= 4000))
+    return _spectral_cache[key]
+
+
+class AdaptiveVad(VadEngine):
+    """Energy relative to a tracked noise floor, gated by two "does it sound like a
+    voice?" features, with hysteresis:
+
+    - noise floor (dB): drops instantly to quieter chunks, creeps up slowly otherwise,
+      so a fan that starts mid-session is absorbed within seconds while a sentence isn't.
+    - zero-crossing rate: hiss and keyboard transients cross zero far more than voiced speech.
+    - spectral flatness (100–4000 Hz): noise is flat, speech has harmonics and formants.
+
+    Opening needs `on_db` above the floor; staying open only `off_db`, so speech
+    doesn't flicker on and off inside a word."""
+
+    def __init__(self, sample_rate: int = SEND_SAMPLE_RATE, on_db: float = 8.0, off_db: float = 4.0,
+                 min_rms: float = 80.0, max_zcr: float = 0.3, max_flatness: float = 0.35,
+                 floor_rise_db: float = 0.15):
+        self.sample_rate = sample_rate
+        self.on_db = on_db
+        self.off_db = off_db
+        self.min_rms = min_rms                  # Below this, never speech (dead-quiet room, digital silence)
+        self.max_zcr = max_zcr
+        self.max_flatness = max_flatness
+        self.floor_rise_db = floor_rise_db      # Per chunk: ~2.3 dB/s at 16kHz/1024
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = None              # First chunk seeds it (the mic opens before anyone talks)
+        self.active = False
+        self.last_features = {}
+
+    def is_speech(self, pcm_data, stats: dict | None = None) -> bool:
+        stats = stats or analyze_chunk(pcm_data)
+        if stats is None:
+            return False
+        rms = stats["rms"]
+        level_db = 20.0 * math.log10(max(rms, 1.0))
+
+        # Noise floor: instant attack downwards, slow release upwards — 10x slower while
+        # speech is active, so a long sentence doesn't get absorbed into the floor
+        if self.noise_floor_db is None or level_db < self.noise_floor_db:
+            self.noise_floor_db = level_db
+        else:
+            rise = self.floor_rise_db * (0.1 if self.active else 1.0)
+            self.noise_floor_db = min(level_db, self.noise_floor_db + rise)
+        snr_db = level_db - self.noise_floor_db
+
+        threshold = self.off_db if self.active else self.on_db
+        if rms < self.min_rms or snr_db < threshold:
+            self.active = False
+            self.last_features = {"snr_db": snr_db}
+            return False
+
+        # Spectral features only for chunks that are loud enough to matter
+        x = np.frombuffer(pcm_data, dtype="<i2", count=len(pcm_data) // 2).astype(np.float32)
+        x -= stats["dc_offset"]
+        zcr = np.count_nonzero(np.signbit(x[1:]) != np.signbit(x[:-1])) / len(x)
+        window, band = _spectral_tables(len(x), self.sample_rate)
+        power = np.abs(np.fft.rfft(x * window))[band] ** 2 + 1e-3
+        flatness = float(np.exp(np.mean(np.log(power))) / np.mean(power))
+
+        self.active = zcr <= self.max_zcr and flatness <= self.max_flatness
+        self.last_features = {"snr_db": snr_db, "zcr": zcr, "flatness": flatness}
+        return self.active
+
+
+def make_vad(name: str = VAD_ENGINE) -> VadEngine:
+    """VAD engine by config name ("adaptive" or "energy")."""
+    if name == "energy":
+        return EnergyVad()
+    return AdaptiveVad()
@@ -0,0 +1,228 @@
+"""
+FocusPals — Audio Devices
+Mic and speaker streams that outlive a Live API connection.
+
+run_gemini_loop reconnects often (stealth reconnects after 1011, watchdog,
+mode switches). Opening a PortAudio stream costs hundreds of ms on Windows
+(WASAPI/MME device init), and that used to land twice on every reconnect's
+time-to-first-audio. The manager is created once in run_tama_live, outside the
+per-connection TaskGroup: sessions acquire() the open streams and release()
+them when they end, without closing anything.
+
+    listen_mic:  mic = await devices.acquire_mic() … devices.release_mic()
+    play_audio:  await devices.acquire_speaker(rate) … await devices.play(pcm) … devices.release_speaker()
+    barge-in:    devices.duck_speaker(gain) / devices.flush_speaker()
+
+Streams are only closed on a real change (mic hot-swap, new playback rate),
+after a write error, when nothing has used them for AUDIO_DEVICE_IDLE_SECS
+(Pomodoro break, libre mode: the OS mic indicator turns off), or at shutdown.
+"""
+
+import asyncio
+import time
+
+from audio_pipeline import JitterBuffer, MicCapture
+from config import (
+    AUDIO_DEVICE_IDLE_SECS, CHANNELS, CHUNK_SIZE, FORMAT, SEND_SAMPLE_RATE, SPEAKER_PERIOD_MS, state, tweaks,
+)
+
+
+class AudioDeviceManager:
+    """Owns the PortAudio streams for the whole app run. Event loop only; both
+    streams run in callback mode (MicCapture / JitterBuffer)."""
+
+    def __init__(self, pya, idle_secs: float = AUDIO_DEVICE_IDLE_SECS):
+        self.pya = pya
+        self.idle_secs = idle_secs
+        self.mic = None                 # MicCapture, created on first acquire (needs the running loop)
+        self.mic_index = None           # Device index actually open
+        self._failed_mic = None         # Requested index that failed to open (don't retry every chunk)
+        self._mic_users = 0
+        self.speaker = None
+        self.speaker_rate = None
+        self.jitter = None              # JitterBuffer feeding the speaker callback
+        self._jitter_ms = tweaks["speaker_jitter_ms"]
+        self._play_lock = asyncio.Lock()    # One put at a time, even across sessions (a stale put can't interleave)
+        self._speaker_users = 0
+        self._idle_since = time.time()
+
+    # ── Mic ──
+    def _wanted_mic_index(self):
+        idx = state["selected_mic_index"]
+        if idx is None:
+            try:
+                idx = self.pya.get_default_input_device_info()["index"]
+            except Exception:
+                idx = 0
+        return idx
+
+    def _open_native(self, mic_idx):
+        """Open a device at its own default rate — the callback resamples to 16kHz,
+        so any input device works (no 16kHz support needed)."""
+        if mic_idx is None:
+            info = self.pya.get_default_input_device_info()
+        else:
+            info = self.pya.get_device_info_by_index(mic_idx)
+        rate = int(info["defaultSampleRate"])
+        self.mic.prepare(rate)  # Before open: the callback can fire immediately
+        s = self.pya.open(format=FORMAT, channels=CHANNELS, rate=rate, input=True,
+                          input_device_index=info["index"],
+                          frames_per_buffer=round(CHUNK_SIZE * rate / SEND_SAMPLE_RATE),
+                          stream_callback=self.mic.on_audio)
+        return s, info["index"], rate
+
+    def _open_mic_stream(self, mic_idx):
+        """Open the selected mic, falling back to the system default."""
+        try:
+            s, idx, rate = self._open_native(mic_idx)
+            resampled = f" ({rate} Hz → {SEND_SAMPLE_RATE} Hz)" if rate != SEND_SAMPLE_RATE else ""
+            print(f"🎤 Micro actif: index {idx}{resampled}")
+            return s, idx
+        except Exception as e:
+            print(f"⚠️ Micro index {mic_idx} indisponible ({e})")
+            try:
+                s, idx, _ = self._open_native(None)
+                print(f"🎤 Fallback micro par défaut: [{idx}]")
+                return s, idx
+            except OSError as e2:
+                print(f"❌ Aucun micro utilisable: {e2}")
+                raise
+
+    async def _open_mic(self, wanted):
+        t0 = time.perf_counter()
+        stream, actual = await asyncio.to_thread(self._open_mic_stream, wanted)
+        self.mic.attach(stream)
+        self._failed_mic = wanted if actual != wanted else None
+        self.mic_index = actual
+        self._count_open(t0)
+
+    async def acquire_mic(self) -> MicCapture:
+        """The running mic for a new session. Reuses the open stream when the
+        selected device hasn't changed; audio captured in between is dropped."""
+        if self.mic is None:
+            self.mic = MicCapture(asyncio.get_running_loop(), CHUNK_SIZE * 2)
+        wanted = self._wanted_mic_index()
+        if self.mic.stream is None or (wanted != self.mic_index and wanted != self._failed_mic):
+            await self._open_mic(wanted)
+        else:
+            state["_audio_device_reuses"] += 1
+            print(f"🎤 Micro déjà ouvert (index {self.mic_index}) — réutilisé")
+        self.mic.resume()
+        self._mic_users += 1
+        return self.mic
+
+    async def check_mic_swap(self):
+        """Reopen on the newly selected device if the user switched mics."""
+        wanted = self._wanted_mic_index()
+        if wanted != self.mic_index and wanted != self._failed_mic:
+            print(f"🎤 Hot-swap micro: {self.mic_index} → {wanted}")
+            await self._open_mic(wanted)
+            self.mic.resume()
+
+    def release_mic(self):
+        """Session over: stop delivering audio, keep the stream open."""
+        if self.mic is None or self._mic_users == 0:
+            return
+        self._mic_users -= 1
+        if self._mic_users == 0:
+            self.mic.pause()
+            self._idle_since = time.time()
+
+    # ── Speaker ──
+    async def acquire_speaker(self, rate: int) -> JitterBuffer:
+        """A callback-mode output stream at `rate` (the voice pitch sets it), fed
+        from a jitter buffer. Reused if already open; leftovers from the previous
+        connection are dropped."""
+        if self.speaker is not None and self.speaker_rate == rate:
+            state["_audio_device_reuses"] += 1
+            self.jitter.flush()
+            self.jitter.duck(1.0)
+        else:
+            await asyncio.to_thread(self._close_speaker)
+            t0 = time.perf_counter()
+            self.jitter = JitterBuffer(asyncio.get_running_loop(), rate, tweaks["speaker_jitter_ms"])
+            self.speaker = await asyncio.to_thread(
+                self.pya.open, format=FORMAT, channels=CHANNELS, rate=rate, output=True,
+                frames_per_buffer=rate * SPEAKER_PERIOD_MS // 1000,
+                stream_callback=self.jitter.on_audio,
+            )
+            try:
+                self.jitter.output_latency = self.speaker.get_output_latency()
+            except Exception:
+                pass
+            self.speaker_rate = rate
+            self._count_open(t0)
+        self._speaker_users += 1
+        return self.jitter
+
+    async def play(self, pcm):
+        """Queue PCM for the output callback. Raises OSError if the device stopped
+        pulling audio (the stream is closed; the next acquire reopens it).
+        Serialized by a lock: a put still waiting for room from a session being torn
+        down finishes (or is flushed) before the next session's audio goes in."""
+        if self.jitter is None or self.speaker is None:
+            raise OSError("Speaker stream closed")
+        async with self._play_lock:
+            target = tweaks["speaker_jitter_ms"]
+            if target != self._jitter_ms:
+                self.jitter.set_target(target)
+                self._jitter_ms = target
+            try:
+                await self.jitter.put(pcm)
+            except OSError:
+                await asyncio.to_thread(self._close_speaker)
+                raise
+
+    def flush_speaker(self) -> int:
+        """Barge-in: drop buffered voice; the next callback period is silent."""
+        return self.jitter.flush() if self.jitter is not None else 0
+
+    def duck_speaker(self, gain: float):
+        """Barge-in: lower (or restore, 1.0) Tama's voice within one callback period."""
+        if self.jitter is not None:
+            self.jitter.duck(gain)
+
+    @property
+    def speaker_busy(self) -> bool:
+        return self.jitter is not None and self.jitter.busy
+
+    def release_speaker(self):
+        if self._speaker_users > 0:
+            self._speaker_users -= 1
+            if self._speaker_users == 0:
+                self._idle_since = time.time()
+
+    def _close_speaker(self):
+        if self.speaker is None:
+            return
+        try:
+            self.speaker.stop_stream()  # Stop the C callback before close
+            self.speaker.close()
+        except Exception:
+            pass
+        self.speaker = None
+        self.speaker_rate = None
+
+    # ── Lifetime ──
+    def _count_open(self, t0: float):
+        ms = (time.perf_counter() - t0) * 1000
+        state["_audio_device_opens"] += 1
+        state["_audio_device_open_ms"] = round(ms, 1)
+
+    @property
+    def in_use(self) -> bool:
+        return self._mic_users > 0 or self._speaker_users > 0
+
+    async def close_if_idle(self):
+        """Called while no session runs: close streams unused for idle_secs."""
+        if self.in_use or time.time() - self._idle_since < self.idle_secs:
+            return
+        if (self.mic and self.mic.stream) or self.speaker:
+            print(f"🔇 Audio inactif depuis {self.idle_secs:.0f}s — micro et haut-parleur fermés")
+            await asyncio.to_thread(self.close)
+
+    def close(self):
+        if self.mic is not None:
+            self.mic.close()
+            self.mic_index = None
+        self._close_speaker()
@@ -0,0 +1,849 @@
+"""
+FocusPals — Audio Pipeline
+Mic capture in PyAudio callback mode, handed to asyncio through a ring buffer,
+then gated and framed for the Live API uplink. Speaker output the other way
+round, through a jitter buffer.
+
+    PortAudio thread ──callback──▶ [PcmRingBuffer] ──event──▶ listen_mic (event loop)
+    AudioSource → InputStage (checks → VAD → gate) → AudioQueue → run_uplink (framer → send)
+    play_audio ──put()──▶ [JitterBuffer] ──callback──▶ PortAudio thread
+
+Everything after the source is shared with replay_mic.py, which feeds WAV files
+through the same stages without a microphone or a Gemini session.
+
+The callback only copies bytes into preallocated memory and, if the event loop
+is waiting, schedules one wake-up. No thread-pool hop per 64ms chunk, and a
+busy event loop no longer delays the capture itself: PortAudio keeps its own
+clock and the ring absorbs the lag (up to its capacity, then overflow is counted).
+"""
+
+import asyncio
+import time
+import wave
+from collections import deque
+
+import numpy as np
+import pyaudio
+
+from audio import analyze_chunk
+from config import (
+    CHUNK_SIZE, GATE_OPEN_STREAK, GATE_POST_TAIL_CHUNKS, GATE_PRE_ROLL_CHUNKS, SEND_SAMPLE_RATE,
+    SPEAKER_CAPACITY_MS, SPEAKER_JITTER_MS, state,
+)
+from dsp import Resampler, apply_gain, fade
+
+
+# ─── Ring Buffer ────────────────────────────────────────────
+
+class PcmRingBuffer:
+    """Single-producer / single-consumer byte ring over one preallocated bytearray.
+    The producer only moves `_write`, the consumer only moves `_read`, so the two
+    sides never take a lock (each index is a plain int updated after the copy).
+    A write that doesn't fit is dropped whole and counted: the producer is a
+    real-time thread and must never wait for the consumer."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._write = 0     # Total bytes ever written (monotonic)
+        self._read = 0      # Total bytes ever read (monotonic)
+        self.overflows = 0
+
+    def available(self) -> int:
+        return self._write - self._read
+
+    def write(self, data: bytes) -> bool:
+        """Producer side. False (and overflows += 1) if there isn't room for all of it."""
+        n = len(data)
+        if n > self.capacity - (self._write - self._read):
+            self.overflows += 1
+            return False
+        src = memoryview(data)
+        pos = self._write % self.capacity
+        first = min(n, self.capacity - pos)
+        self._buf[pos:pos + first] = src[:first]
+        if first < n:
+            self._buf[:n - first] = src[first:]
+        self._write += n
+        return True
+
+    def read_into(self, out: bytearray) -> bool:
+        """Consumer side. Fill `out` completely, or return False if fewer bytes are buffered."""
+        n = len(out)
+        if self._write - self._read < n:
+            return False
+        pos = self._read % self.capacity
+        first = min(n, self.capacity - pos)
+        out[:first] = self._buf[pos:pos + first]
+        if first < n:
+            out[first:] = self._buf[:n - first]
+        self._read += n
+        return True
+
+    def read_some(self, out: bytearray) -> int:
+        """Consumer side. Copy up to len(out) bytes into `out`, return how many."""
+        n = min(len(out), self._write - self._read)
+        pos = self._read % self.capacity
+        first = min(n, self.capacity - pos)
+        out[:first] = self._buf[pos:pos + first]
+        if first < n:
+            out[first:n] = self._buf[:n - first]
+        self._read += n
+        return n
+
+    @property
+    def written(self) -> int:
+        return self._write
+
+    def discard_until(self, position: int):
+        """Consumer side: drop everything written before total position `position`."""
+        self._read = max(self._read, min(position, self._write))
+
+    def clear(self):
+        """Consumer side: drop everything buffered (e.g. after a mic hot-swap)."""
+        self._read = self._write
+
+
+# ─── Audio Sources ──────────────────────────────────────────
+
+class AudioSource:
+    """Interface: `await read(timeout)` → next 16kHz mono int16 chunk, or None if
+    nothing arrived in time (or the source is finished); close() releases it."""
+
+    finished = False
+
+    async def read(self, timeout: float = 1.0):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class WavReplaySource(AudioSource):
+    """A WAV file played as if it were the mic (any rate/channels, 16-bit).
+    speed=1.0 paces chunks on the real-time clock, like a live device; speed=N
+    replays N times faster; speed=0 delivers as fast as the consumer reads."""
+
+    def __init__(self, path: str, chunk_bytes: int, speed: float = 1.0, loop: bool = False):
+        with wave.open(path, "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: 16-bit PCM only")
+            rate, channels = wf.getframerate(), wf.getnchannels()
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype("<i2")
+        pcm = samples.tobytes()
+        if rate != SEND_SAMPLE_RATE:
+            pcm = Resampler(rate, SEND_SAMPLE_RATE).process(pcm)
+        self._pcm = memoryview(pcm)
+        self.chunk_bytes = chunk_bytes
+        self.speed = speed
+        self.loop = loop
+        self.duration = len(pcm) / 2 / SEND_SAMPLE_RATE
+        self._pos = 0
+        self._delivered = 0         # Bytes handed out, across loops (drives the clock)
+        self._started = None
+
+    @property
+    def audio_time(self) -> float:
+        """Seconds of audio delivered so far — the replay's own clock."""
+        return self._delivered / 2 / SEND_SAMPLE_RATE
+
+    async def read(self, timeout: float = 1.0):
+        if self._pos + self.chunk_bytes > len(self._pcm):
+            if not self.loop:
+                self.finished = True
+                return None
+            self._pos = 0
+        if self._started is None:
+            self._started = time.monotonic()
+        if self.speed > 0:
+            # A device hands over a chunk once its last sample has been recorded
+            due = self._started + (self.audio_time + self.chunk_bytes / 2 / SEND_SAMPLE_RATE) / self.speed
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+        else:
+            await asyncio.sleep(0)
+        chunk = self._pcm[self._pos:self._pos + self.chunk_bytes]
+        self._pos += self.chunk_bytes
+        self._delivered += self.chunk_bytes
+        return chunk
+
+
+# ─── Mic Capture ────────────────────────────────────────────
+
+class MicCapture(AudioSource):
+    """Callback-mode mic input. Call prepare(device_rate), open the stream with
+    `on_audio` as PyAudio's stream_callback, attach() it, then `await read()`
+    16kHz chunks from the event loop. Devices that don't run at 16kHz natively
+    are resampled in the callback. Survives stream swaps: the ring and counters stay."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, chunk_bytes: int, capacity_chunks: int = 32):
+        self.chunk_bytes = chunk_bytes
+        self.ring = PcmRingBuffer(chunk_bytes * capacity_chunks)  # ~2s at 16kHz/1024
+        self.stream = None
+        self._chunk = bytearray(chunk_bytes)  # Reused by every read() — no allocation per chunk
+        self._chunk_view = memoryview(self._chunk)
+        self.device_underflows = 0      # Written by the PortAudio thread only
+        self.starved_reads = 0          # Written by the event loop only
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._waiting = False
+        self._published = (0, 0)      # (overflows, underruns) already added to state
+        self._resampler = None          # Device rate → SEND_SAMPLE_RATE, None when already 16kHz
+        self.paused = False             # Stream stays open between sessions, audio is dropped
+
+    # ── PortAudio thread ──
+    def on_audio(self, in_data, frame_count, time_info, status_flags):
+        if status_flags & pyaudio.paInputOverflow:
+            self.ring.overflows += 1       # PortAudio itself lost samples
+        if status_flags & pyaudio.paInputUnderflow:
+            self.device_underflows += 1
+        if self.paused:
+            return None, pyaudio.paContinue
+        if in_data:
+            self.ring.write(self._resampler.process(in_data) if self._resampler else in_data)
+        if self._waiting and self.ring.available() >= self.chunk_bytes:
+            self._waiting = False
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                pass  # Event loop already closed — session is shutting down
+        return None, pyaudio.paContinue
+
+    # ── Event loop ──
+    def prepare(self, device_rate: int):
+        """Get ready for a new stream at `device_rate`. Call BEFORE opening it:
+        PortAudio may invoke the callback before open() even returns."""
+        self.close()
+        self._resampler = Resampler(device_rate, SEND_SAMPLE_RATE) if device_rate != SEND_SAMPLE_RATE else None
+        self.ring.clear()
+
+    def attach(self, stream):
+        """Use the stream opened after prepare() (with stream_callback=self.on_audio)."""
+        self.stream = stream
+
+    def pause(self):
+        """Keep the device running but drop its audio (no session is listening)."""
+        self.paused = True
+
+    def resume(self):
+        """Deliver audio again, starting from now: nothing captured while paused."""
+        self.ring.clear()
+        self.paused = False
+
+    async def read(self, timeout: float = 1.0) -> memoryview | None:
+        """Next full chunk, or None if the device delivered nothing for `timeout`
+        seconds (counted as an underrun: unplugged or stalled device).
+        The view is only valid until the next read(): copy what you keep."""
+        while True:
+            if self.ring.read_into(self._chunk):
+                self._publish_stats()
+                return self._chunk_view
+            self._ready.clear()
+            self._waiting = True
+            # Re-check: the callback may have written between read() and _waiting = True
+            if self.ring.available() >= self.chunk_bytes:
+                self._waiting = False
+                continue
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self._waiting = False
+                self.starved_reads += 1
+                self._publish_stats()
+                return None
+
+    @property
+    def underruns(self) -> int:
+        return self.device_underflows + self.starved_reads
+
+    def _publish_stats(self):
+        """Add new counts to the session-wide telemetry (state is only touched from the event loop)."""
+        overflows, underruns = self.ring.overflows, self.underruns
+        state["_mic_overflows"] += overflows - self._published[0]
+        state["_mic_underruns"] += underruns - self._published[1]
+        self._published = (overflows, underruns)
+
+    def close(self):
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop_stream()  # Stop the C callback before close to prevent segfault
+            self.stream.close()
+        except Exception:
+            pass
+        self.stream = None
+
+
+# ─── Speaker Output ─────────────────────────────────────────
+
+UNDERRUN_GAP_SECS = 0.5       # Ran dry, then more audio within this → an underrun, not the end of a reply
+
+
+class JitterBuffer:
+    """Speaker playback in callback mode. The event loop `await put()`s PCM, the
+    PortAudio output callback pulls exactly one buffer period per call, so no
+    thread hop per chunk and a busy event loop can't starve the device as long
+    as the buffer holds audio.
+
+    Playback starts once `target_ms` is buffered, or once put() has gone quiet
+    for that long (a reply tail shorter than the target still plays). Running
+    dry mid-reply pads with silence and re-buffers to the target instead of
+    crackling. flush() is applied by the next callback, which fades out what it
+    was about to play: a barge-in silences the voice within one buffer period,
+    without a click. Same lock-free ring as the mic."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, sample_rate: int,
+                 target_ms: int = SPEAKER_JITTER_MS, capacity_ms: int = SPEAKER_CAPACITY_MS):
+        self.sample_rate = sample_rate
+        self.ring = PcmRingBuffer(sample_rate * max(capacity_ms, 2 * target_ms) // 1000 * 2)
+        self.set_target(target_ms)
+        self.output_latency = 0.0       # Stream latency (s), used when PortAudio gives no DAC time
+        self.playing = False            # Callback only: False while (re)buffering up to the target
+        self.overruns = 0               # put() found the buffer full and had to wait
+        self.device_underflows = 0      # PortAudio output underflow (callback thread)
+        self._dry_count = 0             # Callback: times the buffer ran dry while playing
+        self._dry_at = 0.0
+        self._dry_seen = 0              # Event loop: dry events already classified
+        self._dry_underruns = 0         # …that were gaps inside a reply
+        self._flush_to = 0              # Event loop → callback: discard audio written before this
+        self._last_put = 0.0
+        self._marks = deque()           # (monotonic DAC time, samples) per callback, for the played clock
+        self._delivered = 0             # Callback: real samples handed to PortAudio (silence excluded)
+        self.generation = 0             # Bumped by flush(): audio queued before it will never play
+        self.gain = 1.0                 # Event loop: playback gain (barge-in ducking)
+        self._applied_gain = 1.0        # Callback: gain at the end of the last period
+        self._played = 0                # Samples of fully played marks (event loop)
+        self._out = bytearray()
+        self._silence = b""
+        self._loop = loop
+        self._space = asyncio.Event()
+        self._need = 0
+        self._waiting = False
+        self._published = (0, 0)        # (underruns, overruns) already added to state
+
+    # ── PortAudio thread ──
+    def on_audio(self, in_data, frame_count, time_info, status_flags):
+        if status_flags & pyaudio.paOutputUnderflow:
+            self.device_underflows += 1
+        n = frame_count * 2
+        if len(self._out) != n:
+            self._out = bytearray(n)
+            self._silence = bytes(n)
+        now = time.monotonic()
+        if self._flush_to > 0:
+            got = self.ring.read_some(self._out) if self.playing else 0
+            self.ring.discard_until(self._flush_to)
+            self._flush_to = 0
+            self.playing = False
+            if got:
+                # Barge-in: fade the current period out instead of cutting mid-waveform (click)
+                self._out[got:] = self._silence[:n - got]
+                self._out[:got] = fade(self._out[:got], fade_out=got // 2).tobytes()
+                self._marks.append((now + self.output_latency, got // 2))
+                self._delivered += got // 2
+                return bytes(self._out), pyaudio.paContinue
+        if not self.playing:
+            available = self.ring.available()
+            if available and (available >= self.target_bytes or now - self._last_put > self.target_secs):
+                self.playing = True
+        got = 0
+        if self.playing:
+            got = self.ring.read_some(self._out)
+            if got < n:
+                self._out[got:] = self._silence[:n - got]
+                self.playing = False
+                self._dry_at = now
+                self._dry_count += 1
+        else:
+            self._out[:] = self._silence
+        if got and (self.gain != 1.0 or self._applied_gain != 1.0):
+            # Ramp to the new gain over one period (no click when ducking)
+            target = self.gain
+            self._out[:got] = apply_gain(self._out[:got], target, start_gain=self._applied_gain).tobytes()
+            self._applied_gain = target
+        if got:
+            delay = 0.0
+            if time_info:
+                delay = time_info.get("output_buffer_dac_time", 0) - time_info.get("current_time", 0)
+            if not 0 < delay < 1:
+                delay = self.output_latency
+            self._marks.append((now + delay, got // 2))
+            self._delivered += got // 2
+        if self._waiting and self.ring.capacity - self.ring.available() >= self._need:
+            self._waiting = False
+            try:
+                self._loop.call_soon_threadsafe(self._space.set)
+            except RuntimeError:
+                pass
+        return bytes(self._out), pyaudio.paContinue
+
+    # ── Event loop ──
+    def set_target(self, target_ms: float):
+        """Pre-buffer depth. Higher = smoother on a bad network, later first word."""
+        target_ms = min(float(target_ms), self.ring.capacity / 2 / self.sample_rate * 1000 / 2)
+        self.target_bytes = int(self.sample_rate * target_ms / 1000) * 2
+        self.target_secs = target_ms / 1000
+
+    async def put(self, pcm, timeout: float = 2.0):
+        """Queue PCM for playback; waits while the buffer is full (overrun). Audio
+        still waiting when flush() is called is dropped with the rest.
+        Raises OSError if the device stops pulling for `timeout` seconds."""
+        data = memoryview(pcm)[:len(pcm) // 2 * 2]
+        self._classify_dry()
+        generation = self.generation
+        step = self.ring.capacity // 2
+        for i in range(0, len(data), step):
+            piece = data[i:i + step]
+            if len(piece) > self.ring.capacity - self.ring.available():
+                self.overruns += 1
+                while len(piece) > self.ring.capacity - self.ring.available():
+                    self._space.clear()
+                    self._need = len(piece)
+                    self._waiting = True
+                    # Re-check: the callback may have freed space before _waiting = True
+                    if len(piece) <= self.ring.capacity - self.ring.available():
+                        self._waiting = False
+                        break
+                    try:
+                        await asyncio.wait_for(self._space.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        self._waiting = False
+                        raise OSError("Speaker stalled: output callback stopped pulling audio")
+                if self.generation != generation:
+                    return  # Flushed while waiting: this audio was interrupted too
+            self.ring.write(piece)
+        self._last_put = time.monotonic()
+        self._publish_stats()
+
+    def flush(self) -> int:
+        """Drop everything not yet handed to the device (barge-in). Returns bytes dropped."""
+        dropped = self.ring.available()
+        self._flush_to = self.ring.written
+        self.generation += 1
+        return dropped
+
+    def duck(self, gain: float):
+        """Playback gain from the next period on (1.0 = normal)."""
+        self.gain = gain
+
+    def queued_position(self) -> int:
+        """Played-clock position (samples) at which the next put() will start playing."""
+        flush_to = self._flush_to
+        pending = self.ring.written - flush_to if flush_to else self.ring.available()
+        return self._delivered + pending // 2
+
+    def _classify_dry(self):
+        """A dry buffer followed quickly by more audio was a gap in the voice (underrun);
+        a long silence after it was just the end of a reply."""
+        if self._dry_count != self._dry_seen:
+            self._dry_seen = self._dry_count
+            if time.monotonic() - self._dry_at < UNDERRUN_GAP_SECS:
+                self._dry_underruns += 1
+
+    @property
+    def underruns(self) -> int:
+        return self._dry_underruns + self.device_underflows
+
+    @property
+    def buffered_ms(self) -> float:
+        return self.ring.available() / 2 / self.sample_rate * 1000
+
+    def samples_played(self) -> int:
+        """Samples that have reached the DAC, from PortAudio's output timestamps."""
+        now = time.monotonic()
+        while self._marks and self._marks[0][0] + self._marks[0][1] / self.sample_rate <= now:
+            self._played += self._marks.popleft()[1]
+        if self._marks and self._marks[0][0] < now:
+            dac_time, samples = self._marks[0]
+            return self._played + min(samples, int((now - dac_time) * self.sample_rate))
+        return self._played
+
+    @property
+    def busy(self) -> bool:
+        """Audio is still buffered or on its way to the DAC."""
+        if self.ring.available():
+            return True
+        return bool(self._marks) and self._marks[-1][0] + self._marks[-1][1] / self.sample_rate > time.monotonic()
+
+    def _publish_stats(self):
+        underruns, overruns = self.underruns, self.overruns
+        state["_speaker_underruns"] += underruns - self._published[0]
+        state["_speaker_overruns"] += overruns - self._published[1]
+        state["_speaker_buffer_ms"] = round(self.buffered_ms, 1)
+        self._published = (underruns, overruns)
+
+
+# ─── Pre-roll & Gate ────────────────────────────────────────
+
+class PreRollBuffer:
+    """The last `capacity` bytes of audio, kept in one preallocated bytearray.
+    push() overwrites the oldest bytes in place (no allocation); drain() returns
+    everything, oldest first, as one contiguous bytes object."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._end = 0       # Next write position
+        self._size = 0      # Valid bytes ending at _end
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, data):
+        n = len(data)
+        if n >= self.capacity:
+            self._view[:] = data[n - self.capacity:]
+            self._end, self._size = 0, self.capacity
+            return
+        first = min(n, self.capacity - self._end)
+        self._view[self._end:self._end + first] = data[:first]
+        if first < n:
+            self._view[:n - first] = data[first:]
+        self._end = (self._end + n) % self.capacity
+        self._size = min(self.capacity, self._size + n)
+
+    def drain(self, tail=b"") -> bytes:
+        """Buffered audio + `tail` in a single allocation, then empty the buffer."""
+        start = (self._end - self._size) % self.capacity
+        if start + self._size <= self.capacity:
+            parts = (self._view[start:start + self._size], tail)
+        else:
+            parts = (self._view[start:], self._view[:self._end], tail)
+        self._size = 0
+        return b"".join(parts)
+
+
+class AudioGate:
+    """Client-side voice gate: only speech (plus context) goes to the Live API.
+
+    Closed: chunks only land in the pre-roll. Opens after `open_streak` consecutive
+    voice chunks and sends the pre-roll + current chunk as ONE payload, so the first
+    syllable isn't clipped. Open: every chunk is sent; closes after `post_tail_chunks`
+    silent chunks so sentence endings and natural pauses still get through.
+    Payloads are the only bytes objects created — silence costs no allocation."""
+
+    def __init__(self, chunk_bytes: int, pre_roll_chunks: int = 12, post_tail_chunks: int = 24, open_streak: int = 3):
+        self.pre_roll = PreRollBuffer(chunk_bytes * pre_roll_chunks)
+        self.post_tail_chunks = post_tail_chunks
+        self.open_streak = open_streak
+        self.is_open = False
+        self.opened = False     # Set by the last feed(): the gate just opened
+        self.closed = False     # Set by the last feed(): the gate just closed
+        self._voice_streak = 0
+        self._silence = 0
+
+    def feed(self, pcm, voice_active: bool) -> bytes | None:
+        """One chunk in. Returns the bytes to send now, or None while the gate is closed."""
+        self.opened = self.closed = False
+        if voice_active:
+            self._voice_streak += 1
+            if self.is_open or self._voice_streak >= self.open_streak:
+                self._silence = 0
+                if not self.is_open:
+                    self.is_open = self.opened = True
+                    return self.pre_roll.drain(pcm)
+                return bytes(pcm)
+        else:
+            self._voice_streak = 0
+            if self.is_open:
+                self._silence += 1
+                if self._silence >= self.post_tail_chunks:
+                    self.is_open = False
+                    self.closed = True
+                    self._silence = 0
+                return bytes(pcm)
+        self.pre_roll.push(pcm)
+        return None
+
+
+# ─── Input Stage ────────────────────────────────────────────
+
+class InputStage:
+    """Per-chunk uplink decisions, shared by listen_mic and replay_mic.py:
+    sanity checks → analyze_chunk → VAD → gate. process() returns the bytes to
+    queue (None while the gate is closed); gate.opened / gate.closed tell the
+    caller about transitions."""
+
+    def __init__(self, vad, gate: AudioGate):
+        self.vad = vad
+        self.gate = gate
+        self.voice_active = False
+        self.skipped = 0            # Chunks rejected by the sanity checks
+
+    def process(self, data) -> bytes | None:
+        self.voice_active = False
+        # Virtual/broken mics can produce garbage data that crashes Gemini.
+        # Detect and skip corrupt chunks before they reach the API.
+        if len(data) >= 64:
+            data = data[:(len(data) // 2) * 2]  # Even byte count — fragmented reads can have odd length
+            stats = analyze_chunk(data)
+            # Extreme clipping / garbage, or all identical values (stuck/dead device)
+            if stats["rms"] <= 30000 and not stats["stuck"]:
+                self.voice_active = self.vad.is_speech(data, stats)
+                return self.gate.feed(data, self.voice_active)
+        self.skipped += 1
+        self.gate.opened = self.gate.closed = False
+        return None
+
+
+def make_input_stage(vad) -> InputStage:
+    """InputStage with the shipped gate settings (config GATE_*)."""
+    gate = AudioGate(CHUNK_SIZE * 2, pre_roll_chunks=GATE_PRE_ROLL_CHUNKS,
+                     post_tail_chunks=GATE_POST_TAIL_CHUNKS, open_streak=GATE_OPEN_STREAK)
+    return InputStage(vad, gate)
+
+
+async def run_input_stage(source: AudioSource, stage: InputStage, queue, before_read=None, admit=None, on_chunk=None):
+    """listen_mic's loop, also driven by replay_mic.py so the harness measures what ships:
+    read → admit → InputStage → on_chunk → queue (payload, then GATE_CLOSED when the gate closes).
+
+    before_read()  awaited before every read (mic hot-swap check)
+    admit(data)    awaited per chunk; False discards it before the stage (mic muted, break goodbye...)
+    on_chunk(stage) called after the stage, before queueing (barge-in, user_spoke_at, Godot acks)
+
+    A None read (stalled device) just loops; returns once the source is finished."""
+    while True:
+        if before_read is not None:
+            await before_read()
+        data = await source.read()
+        if data is None:
+            if source.finished:
+                return
+            continue
+        if admit is not None and not await admit(data):
+            continue
+        payload = stage.process(data)
+        if on_chunk is not None:
+            on_chunk(stage)
+        if payload is not None:
+            # On open, payload = whole pre-roll + this chunk in one contiguous buffer
+            await queue.put(payload)
+        if stage.gate.closed:
+            await queue.put(GATE_CLOSED)  # send_audio flushes its pending frame
+
+
+# ─── Uplink Framing ─────────────────────────────────────────
+
+GATE_CLOSED = object()  # Queued by listen_mic when the gate closes: send what's pending now
+
+
+class UplinkFramer:
+    """Aggregates gated mic chunks into larger frames for send_realtime_input.
+    A frame goes out when it reaches `frame_bytes`, when its oldest byte has waited
+    `max_delay` seconds, or on flush() (gate closed). Bigger payloads (the pre-roll)
+    are sent whole, never split."""
+
+    def __init__(self, frame_bytes: int, max_delay: float):
+        self.frame_bytes = frame_bytes
+        self.max_delay = max_delay
+        self._parts = []
+        self._size = 0
+        self._first_at = 0.0            # Arrival time of the oldest pending chunk
+
+        self.frames = 0
+        self.bytes = 0
+        self.avg_hold_ms = 0.0          # EMA: oldest chunk arrival → frame released
+
+    def add(self, pcm: bytes, now: float | None = None) -> bytes | None:
+        """Queue one chunk. Returns a frame if this chunk completed one."""
+        now = time.monotonic() if now is None else now
+        if not self._parts:
+            self._first_at = now
+        self._parts.append(pcm)
+        self._size += len(pcm)
+        if self._size >= self.frame_bytes:
+            return self.flush(now)
+        return None
+
+    def time_left(self, now: float | None = None) -> float | None:
+        """Seconds before pending audio must be sent (None if nothing is pending)."""
+        if not self._parts:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._first_at + self.max_delay - now)
+
+    def flush(self, now: float | None = None) -> bytes | None:
+        """Everything pending as one frame, or None."""
+        if not self._parts:
+            return None
+        now = time.monotonic() if now is None else now
+        frame = self._parts[0] if len(self._parts) == 1 else b"".join(self._parts)
+        self._parts = []
+        self._size = 0
+        hold_ms = (now - self._first_at) * 1000
+        self.avg_hold_ms = hold_ms if self.frames == 0 else self.avg_hold_ms + 0.1 * (hold_ms - self.avg_hold_ms)
+        self.frames += 1
+        self.bytes += len(frame)
+        return frame
+
+
+async def run_uplink(queue, framer: UplinkFramer, send, should_drop=None):
+    """send_audio's loop: queue → framer → `await send(frame)`. send() returns False
+    to stop (session closed). should_drop() is checked for every chunk as it leaves
+    the queue; GATE_CLOSED and the framer's latency cap flush early."""
+    while True:
+        timeout = framer.time_left()
+        try:
+            if timeout is None:
+                item = await queue.get()
+            else:
+                item = await asyncio.wait_for(queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            frame = framer.flush()  # Latency cap reached
+        else:
+            if item is GATE_CLOSED:
+                frame = framer.flush()  # End of speech: don't hold the last words back
+            elif should_drop is not None and should_drop():
+                continue
+            else:
+                frame = framer.add(item)
+        if frame is not None and not await send(frame):
+            return
+
+
+# ─── Audio Queues ───────────────────────────────────────────
+
+DROP_OLDEST = "drop_oldest"   # Full → evict the oldest item (bounded latency, loses old audio)
+BLOCK = "block"               # Full → put() waits for the consumer (backpressure)
+COALESCE = "coalesce"         # Full → merge into the newest bytes item (no loss, fewer items)
+
+
+class AudioQueue:
+    """Bounded audio buffer queue with an explicit overflow policy, a byte cap and
+    O(1) flush. flush() swaps in an empty deque and bumps `generation`, so a
+    barge-in never walks the queue item by item, and consumers holding a
+    (generation, item) pair from get_tagged() can tell their audio is stale.
+    Metrics live in state["_audio_queues"][name] for the settings panel."""
+
+    def __init__(self, name: str, maxsize: int, policy: str = DROP_OLDEST, max_bytes: int = 0):
+        self.name = name
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes          # 0 = only the item count is bounded
+        self.policy = policy
+        self.generation = 0
+        self._items = deque()               # (generation, enqueued_at, item)
+        self._bytes = 0
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self.stats = {
+            "policy": policy,
+            "size": 0,
+            "bytes": 0,
+            "high_water": 0,                # Most items ever queued at once
+            "high_water_bytes": 0,
+            "dropped": 0,                   # Items evicted (drop_oldest, or coalesce over the byte cap)
+            "coalesced": 0,                 # Items merged into the previous one
+            "flushed": 0,                   # Items discarded by flush()
+            "avg_wait_ms": 0.0,             # EMA: put → get
+            "blocked_ms": 0.0,              # Total time producers spent waiting (block policy)
+        }
+        state["_audio_queues"][name] = self.stats
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def _full(self, incoming: int = 0) -> bool:
+        if len(self._items) >= self.maxsize:
+            return True
+        return bool(self.max_bytes and self._items and self._bytes + incoming > self.max_bytes)
+
+    def _evict_oldest(self):
+        _, _, item = self._items.popleft()
+        self._bytes -= _size(item)
+        self.stats["dropped"] += 1
+
+    def _append(self, item):
+        self._items.append((self.generation, time.monotonic(), item))
+        self._bytes += _size(item)
+        self._has_items.set()
+        self._update_size()
+
+    def _update_size(self):
+        stats = self.stats
+        stats["size"] = len(self._items)
+        stats["bytes"] = self._bytes
+        stats["high_water"] = max(stats["high_water"], stats["size"])
+        stats["high_water_bytes"] = max(stats["high_water_bytes"], self._bytes)
+
+    def put_nowait(self, item):
+        """Enqueue without waiting (drop_oldest / coalesce). A full `block` queue
+        falls back to dropping the oldest item rather than raising."""
+        size = _size(item)
+        if self.policy == COALESCE and self._full(size) and self._items:
+            gen, enqueued_at, tail = self._items[-1]
+            if isinstance(tail, (bytes, bytearray)) and isinstance(item, (bytes, bytearray)):
+                self._items[-1] = (gen, enqueued_at, bytes(tail) + bytes(item))
+                self._bytes += size
+                self.stats["coalesced"] += 1
+                while self.max_bytes and len(self._items) > 1 and self._bytes > self.max_bytes:
+                    self._evict_oldest()
+                if self.max_bytes and self._bytes > self.max_bytes:
+                    # One merged item over the cap: keep its newest audio (cap is an even byte count)
+                    gen, enqueued_at, merged = self._items[-1]
+                    self._items[-1] = (gen, enqueued_at, merged[-self.max_bytes:])
+                    self._bytes = self.max_bytes
+                    self.stats["dropped"] += 1
+                self._update_size()
+                return
+        while self._items and self._full(size):
+            self._evict_oldest()
+        self._append(item)
+
+    async def put(self, item):
+        """Enqueue per policy. With `block`, an item still waiting for space when
+        flush() runs belongs to the discarded audio and is dropped, not queued."""
+        if self.policy == BLOCK:
+            started = time.monotonic()
+            generation = self.generation
+            waited = False
+            while self._full(_size(item)):
+                waited = True
+                self._has_space.clear()
+                await self._has_space.wait()
+                if self.generation != generation:
+                    break
+            if waited:
+                self.stats["blocked_ms"] += (time.monotonic() - started) * 1000
+            if self.generation != generation:
+                self.stats["flushed"] += 1
+                return
+            self._append(item)
+        else:
+            self.put_nowait(item)
+
+    async def get_tagged(self):
+        """(generation, item) — compare generation with self.generation later to
+        know whether a flush happened since this item was queued."""
+        while not self._items:
+            self._has_items.clear()
+            await self._has_items.wait()
+        gen, enqueued_at, item = self._items.popleft()
+        self._bytes -= _size(item)
+        wait_ms = (time.monotonic() - enqueued_at) * 1000
+        self.stats["avg_wait_ms"] = round(self.stats["avg_wait_ms"] + 0.1 * (wait_ms - self.stats["avg_wait_ms"]), 2)
+        self._update_size()
+        self._has_space.set()
+        return gen, item
+
+    async def get(self):
+        return (await self.get_tagged())[1]
+
+    def flush(self) -> int:
+        """Discard everything queued in O(1) and start a new generation. Returns the count."""
+        n = len(self._items)
+        self._items = deque()
+        self._bytes = 0
+        self.generation += 1
+        self.stats["flushed"] += n
+        self._update_size()
+        self._has_space.set()
+        return n
+
+
+def _size(item) -> int:
+    return len(item) if isinstance(item, (bytes, bytearray, memoryview)) else 0
@@ -0,0 +1,106 @@
+"""
+FocusPals — Local Barge-in
+Stops Tama's voice as soon as the mic says the user is talking over her,
+instead of waiting for Gemini's `interrupted` (a full network round trip,
+during which she keeps talking).
+
+    voice while Tama plays ──▶ DUCK (voice quieter) ──still talking──▶ STOP
+                                  │                                     │
+                                  └──voice stops── UNDUCK          flush speaker,
+                                                                  drop the turn's audio
+                                                                  until the server agrees
+
+Ducking doubles as an echo check: if the "voice" was Tama's own audio coming
+back through the mic, it drops with her volume and the streak breaks before
+STOP. A stop is reconciled when the server's `interrupted` (confirmed) or
+`turn_complete` arrives, or after BARGE_IN_HOLD_SECS (false alarm: her
+audio plays again).
+"""
+
+import time
+
+from config import (
+    BARGE_IN_DUCK_CHUNKS, BARGE_IN_HOLD_SECS, BARGE_IN_STOP_CHUNKS, BARGE_IN_UNDUCK_CHUNKS, state,
+)
+
+# Actions returned by BargeInDetector.feed()
+DUCK = "duck"
+UNDUCK = "unduck"
+STOP = "stop"
+
+
+class BargeInDetector:
+    """Per-connection state machine fed once per mic chunk from listen_mic.
+    feed() returns the action to apply to playback, or None."""
+
+    def __init__(self, duck_chunks: int = BARGE_IN_DUCK_CHUNKS, stop_chunks: int = BARGE_IN_STOP_CHUNKS,
+                 unduck_chunks: int = BARGE_IN_UNDUCK_CHUNKS, hold_secs: float = BARGE_IN_HOLD_SECS):
+        self.duck_chunks = duck_chunks
+        self.stop_chunks = stop_chunks
+        self.unduck_chunks = unduck_chunks
+        self.hold_secs = hold_secs
+        self.ducked = False
+        self.cancelled_at = None     # Local stop time, until the server reconciles
+        self._voice_streak = 0
+        self._silence_streak = 0
+
+    def feed(self, voice_active: bool, tama_playing: bool) -> str | None:
+        if self.cancelled_at is not None:
+            return None
+        if voice_active:
+            self._voice_streak += 1
+            self._silence_streak = 0
+        else:
+            self._silence_streak += 1
+            if self._silence_streak >= self.unduck_chunks:
+                self._voice_streak = 0
+
+        if not tama_playing:
+            if self.ducked:
+                self.ducked = False
+                return UNDUCK
+            return None
+        if self.ducked and self._voice_streak >= self.stop_chunks:
+            self.ducked = False
+            self.cancelled_at = time.time()
+            self._voice_streak = 0
+            state["_barge_in_local"] += 1
+            return STOP
+        if not self.ducked and self._voice_streak >= self.duck_chunks:
+            self.ducked = True
+            return DUCK
+        if self.ducked and self._voice_streak == 0:
+            self.ducked = False
+            state["_barge_in_false"] += 1   # Echo, cough, short noise
+            return UNDUCK
+        return None
+
+    def drop_output(self) -> bool:
+        """receive_responses: skip audio of the locally cancelled turn. Gives
+        up after hold_secs if the server never confirms (false alarm)."""
+        if self.cancelled_at is None:
+            return False
+        if time.time() - self.cancelled_at > self.hold_secs:
+            print(f"  ↩️ Barge-in local non confirmé ({self.hold_secs:.0f}s) — Tama reprend")
+            state["_barge_in_false"] += 1
+            self.cancelled_at = None
+            return False
+        return True
+
+    def on_server_interrupted(self) -> float | None:
+        """Server confirmed the interruption. Returns how many ms earlier the
+        local stop happened, or None if there was no local stop."""
+        if self.cancelled_at is None:
+            return None
+        lead_ms = (time.time() - self.cancelled_at) * 1000
+        self.cancelled_at = None
+        state["_barge_in_confirmed"] += 1
+        prev = state["_barge_in_lead_ms"]
+        state["_barge_in_lead_ms"] = round(lead_ms if prev == 0 else prev * 0.8 + lead_ms * 0.2, 1)
+        return lead_ms
+
+    def on_turn_complete(self):
+        """The turn ended without `interrupted`: the server didn't count it as a barge-in."""
+        if self.cancelled_at is not None:
+            self.cancelled_at = None
+            state["_barge_in_false"] += 1
@@ -0,0 +1,198 @@
+"""
+FocusPals — Mic Path Benchmark
+1. Chunk analysis: the legacy per-chunk checks listen_mic used to run
+   (struct.unpack → Python sum of squares → all() stuck check) vs audio.analyze_chunk().
+2. Resampling: dsp.Resampler converting one native-rate callback buffer
+   (44.1/48 kHz...) to a 16 kHz chunk, as MicCapture does in the PortAudio callback.
+3. Playback DSP: the legacy play_audio struct loops (volume, disconnect glitch)
+   vs the dsp.py NumPy effects, per 24 kHz chunk of Tama's voice.
+4. Lip sync: detect_viseme() on the whole chunk (one shape) vs
+   VisemeTimeline.feed() (one shape per 20 ms frame, batched FFT).
+
+Synthetic audio only, so it runs without a microphone. At 16 kHz / 1024 samples
+the mic loop sees ~16 chunks per second; the "% of real time" column shows how
+much of each second of audio the step alone costs.
+
+Usage: python bench_audio.py [chunks]
+  Default: 5000 chunks per scenario.
+"""
+
+import math
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+from config import CHUNK_SIZE, RECEIVE_SAMPLE_RATE, SEND_SAMPLE_RATE
+
+PLAYBACK_CHUNK_MS = 40       # Typical Live API audio part at 24 kHz
+
+
+def _legacy_analyze(data: bytes):
+    """The pre-NumPy listen_mic checks, kept verbatim for comparison."""
+    n_samples = len(data) // 2
+    samples = struct.unpack(f'<{n_samples}h', data)
+    rms = math.sqrt(sum(s * s for s in samples) / n_samples)
+    stuck = all(s == samples[0] for s in samples[:64])
+    return rms, stuck
+
+
+def _legacy_gain(data: bytes, vol: float) -> bytes:
+    """The pre-NumPy play_audio volume scaling, verbatim."""
+    data = data[:(len(data) // 2) * 2]
+    n_samples = len(data) // 2
+    samples = struct.unpack(f"<{n_samples}h", data)
+    return struct.pack(f"<{n_samples}h", *(max(-32768, min(32767, int(s * vol))) for s in samples))
+
+
+def _legacy_glitch(data: bytes) -> bytes:
+    """The pre-NumPy play_audio disconnect glitch (bitcrush + block stutter/silence), verbatim."""
+    n = len(data) // 2
+    samples = list(struct.unpack(f"<{n}h", data))
+    shift = 4
+    for i in range(n):
+        samples[i] = (samples[i] >> shift) << shift
+    block_size = 64
+    for blk_start in range(0, n, block_size):
+        blk_end = min(blk_start + block_size, n)
+        roll = random.random()
+        if roll < 0.2:
+            for i in range(blk_start, blk_end):
+                samples[i] = 0
+        elif roll < 0.35:
+            val = samples[blk_start]
+            for i in range(blk_start, blk_end):
+                samples[i] = val
+    return struct.pack(f"<{n}h", *samples)
+
+
+def _synthetic_chunks(kind: str, count: int = 64) -> list:
+    """A small rotating set of chunks: silence-ish noise, speech-like tone bursts, or clipping."""
+    rng = np.random.default_rng(7)
+    t = np.arange(CHUNK_SIZE) / SEND_SAMPLE_RATE
+    chunks = []
+    for i in range(count):
+        if kind == "room noise":
+            x = rng.normal(0, 150, CHUNK_SIZE)
+        elif kind == "speech":
+            f0 = 120 + 10 * (i % 8)
+            x = 4000 * np.sin(2 * np.pi * f0 * t) + 1500 * np.sin(2 * np.pi * 3 * f0 * t) + rng.normal(0, 300, CHUNK_SIZE)
+        else:  # clipped
+            x = 60000 * np.sin(2 * np.pi * 440 * t)
+        chunks.append(np.clip(x, -32768, 32767).astype("<i2").tobytes())
+    return chunks
+
+
+def main():
+    from audio import analyze_chunk
+    from dsp import Resampler
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 5000
+    chunk_ms = CHUNK_SIZE / SEND_SAMPLE_RATE * 1000
+
+    print(f"\n🎤 Mic chunk analysis benchmark — {n} chunks of {CHUNK_SIZE} samples ({chunk_ms:.0f} ms each)")
+    print("-" * 72)
+    print(f"{'Scenario':<14}{'Path':<10}{'µs/chunk':>10}{'% of real time':>16}")
+    for kind in ("room noise", "speech", "clipped"):
+        chunks = _synthetic_chunks(kind)
+        # Same verdict on every chunk before timing anything
+        for c in chunks:
+            legacy_rms, legacy_stuck = _legacy_analyze(c)
+            stats = analyze_chunk(c)
+            assert abs(legacy_rms - stats["rms"]) < 1e-3 * max(1.0, legacy_rms), (legacy_rms, stats["rms"])
+            assert legacy_stuck == stats["stuck"]
+
+        results = {}
+        for path, fn in (("legacy", _legacy_analyze), ("numpy", analyze_chunk)):
+            fn(chunks[0])  # warm-up
+            start = time.perf_counter()
+            for i in range(n):
+                fn(chunks[i % len(chunks)])
+            us = (time.perf_counter() - start) * 1e6 / n
+            results[path] = us
+            print(f"{kind:<14}{path:<10}{us:>10.1f}{us / (chunk_ms * 1000) * 100:>15.2f}%")
+        print(f"{'':<14}→ {results['legacy'] / max(results['numpy'], 1e-9):.1f}x faster")
+
+    print(f"\n🔁 Resampling to {SEND_SAMPLE_RATE} Hz — one callback buffer per call")
+    print("-" * 72)
+    print(f"{'Device rate':<14}{'taps/branch':>12}{'µs/chunk':>10}{'% of real time':>16}")
+    for rate in (48000, 44100, 32000, 22050, 8000):
+        frames = round(CHUNK_SIZE * rate / SEND_SAMPLE_RATE)
+        t = np.arange(rate) / rate
+        signal = (6000 * np.sin(2 * np.pi * 440 * t)).astype("<i2")
+        chunk = signal[:frames].tobytes()
+        resampler = Resampler(rate, SEND_SAMPLE_RATE)
+        # Chunked output must match a single pass (no seams at buffer boundaries)
+        chunked = b"".join(resampler.process(signal[i:i + frames].tobytes()) for i in range(0, len(signal), frames))
+        assert chunked == Resampler(rate, SEND_SAMPLE_RATE).process(signal.tobytes())
+        start = time.perf_counter()
+        for _ in range(n // 5):
+            resampler.process(chunk)
+        us = (time.perf_counter() - start) * 1e6 / (n // 5)
+        print(f"{rate:<14}{resampler.taps:>12}{us:>10.1f}{us / (chunk_ms * 1000) * 100:>15.2f}%")
+
+    from dsp import apply_gain, bitcrush, block_glitch, pcm_array
+    samples_per_chunk = RECEIVE_SAMPLE_RATE * PLAYBACK_CHUNK_MS // 1000
+    rng = np.random.default_rng(3)
+    t = np.arange(samples_per_chunk) / RECEIVE_SAMPLE_RATE
+    voice = (9000 * np.sin(2 * np.pi * 180 * t) + rng.normal(0, 2000, samples_per_chunk)).astype("<i2").tobytes()
+    # Same output as the legacy loops (glitch: its deterministic part, the bitcrush)
+    for vol in (0.3, 0.75, 0.98):
+        assert apply_gain(voice, vol).tobytes() == _legacy_gain(voice, vol)
+    legacy_crush = [(s >> 4) << 4 for s in struct.unpack(f"<{samples_per_chunk}h", voice)]
+    assert bitcrush(voice).tolist() == legacy_crush
+
+    def numpy_gain(data):
+        return apply_gain(data, 0.6).tobytes()
+
+    def numpy_glitch(data):
+        return block_glitch(bitcrush(pcm_array(data))).tobytes()
+
+    print(f"\n🔊 Playback DSP — {samples_per_chunk} samples per chunk ({PLAYBACK_CHUNK_MS} ms at {RECEIVE_SAMPLE_RATE} Hz)")
+    print("-" * 72)
+    print(f"{'Effect':<14}{'Path':<10}{'µs/chunk':>10}{'% of real time':>16}")
+    for effect, legacy, vectorized in (
+        ("volume 0.6", lambda d: _legacy_gain(d, 0.6), numpy_gain),
+        ("glitch", _legacy_glitch, numpy_glitch),
+    ):
+        results = {}
+        for path, fn in (("legacy", legacy), ("numpy", vectorized)):
+            fn(voice)  # warm-up
+            runs = n // 5 if path == "legacy" else n
+            start = time.perf_counter()
+            for _ in range(runs):
+                fn(voice)
+            us = (time.perf_counter() - start) * 1e6 / runs
+            results[path] = us
+            print(f"{effect:<14}{path:<10}{us:>10.1f}{us / (PLAYBACK_CHUNK_MS * 1000) * 100:>15.2f}%")
+        print(f"{'':<14}→ {results['legacy'] / max(results['numpy'], 1e-9):.1f}x faster")
+
+    from viseme import VisemeTimeline, detect_viseme
+    print(f"\n👄 Lip sync — per chunk at {RECEIVE_SAMPLE_RATE} Hz")
+    print("-" * 72)
+    print(f"{'Chunk':<14}{'Path':<10}{'µs/chunk':>10}{'% of real time':>16}{'shapes':>8}")
+    for ms in (40, 100, 250):
+        n_samples = RECEIVE_SAMPLE_RATE * ms // 1000
+        chunk = np.resize(np.frombuffer(voice, dtype="<i2"), n_samples).tobytes()
+        timeline = VisemeTimeline(RECEIVE_SAMPLE_RATE)
+        position = [0]
+
+        def feed(data):
+            timeline.feed(data, position[0])
+            position[0] += len(data) // 2
+            timeline.events.clear()
+
+        for path, fn, shapes in (("chunk", detect_viseme, 1), ("20ms", feed, n_samples // timeline.frame)):
+            fn(chunk)  # warm-up
+            start = time.perf_counter()
+            for _ in range(n // 5):
+                fn(chunk)
+            us = (time.perf_counter() - start) * 1e6 / (n // 5)
+            print(f"{f'{ms} ms':<14}{path:<10}{us:>10.1f}{us / (ms * 1000) * 100:>15.2f}%{shapes:>8}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
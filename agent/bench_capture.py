@@ -0,0 +1,128 @@
+"""
+FocusPals — Screen Capture Benchmark
+Compares the legacy capture path (mss .rgb → full-size PIL image → thumbnail)
+with the NumPy path in screen_capture.py, on synthetic desktops so it runs
+anywhere (no monitor, no GDI). Each (scenario, path) runs in its own child
+process so peak RSS is not polluted by the previous run.
+
+Usage: python bench_capture.py [frames]
+  Default: 20 frames per scenario.
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCENARIOS = {
+    "4K single (3840x2160)": (3840, 2160),
+    "Triple 1080p (5760x1080)": (5760, 1080),
+}
+PATHS = ("legacy", "numpy")
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _synthetic_desktop(width: int, height: int):
+    """BGRA buffer that looks vaguely like a desktop: gradients, flat panels, noisy text areas."""
+    import numpy as np
+    rng = np.random.default_rng(42)
+    raw = bytearray(width * height * 4)  # filled in place, so the baseline RSS is ~one buffer
+    frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+    frame[..., 0] = np.linspace(30, 220, width, dtype=np.uint8)[None, :]
+    frame[..., 1] = np.linspace(40, 200, height, dtype=np.uint8)[:, None]
+    frame[..., 2] = 90
+    frame[..., 3] = 255
+    frame[height // 8: height // 2, width // 10: width // 2, :3] = rng.integers(
+        0, 255, (height // 2 - height // 8, width // 2 - width // 10, 3), dtype=np.uint8)
+    return raw
+
+
+def _run_child(path: str, width: int, height: int, frames: int):
+    import tracemalloc
+    from PIL import Image
+    import screen_capture as sc
+
+    raw = _synthetic_desktop(width, height)
+    base_rss = _peak_rss_mb()
+    use_tracemalloc = base_rss is None
+    if use_tracemalloc:
+        tracemalloc.start()
+
+    if path == "legacy":
+        from mss.screenshot import ScreenShot
+
+        def one_frame():
+            shot = ScreenShot.from_size(raw, width, height)
+            img = Image.frombytes("RGB", shot.size, shot.rgb)
+            img.thumbnail(sc.THUMBNAIL_SIZE, Image.Resampling.BILINEAR)
+            sc.compute_frame_signature(img)
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=sc.JPEG_QUALITY)
+            return len(buf.getvalue())
+    else:
+        import numpy as np
+
+        def one_frame():
+            view = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+            img = sc.downsample_bgra(view)
+            sc.compute_frame_signature(img)
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=sc.JPEG_QUALITY)
+            return len(buf.getvalue())
+
+    jpeg_size = one_frame()  # warm-up
+    start = time.perf_counter()
+    for _ in range(frames):
+        one_frame()
+    ms_per_frame = (time.perf_counter() - start) * 1000 / frames
+
+    if use_tracemalloc:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        extra_mb, kind = peak_mb, "tracemalloc (Python allocs only)"
+    else:
+        extra_mb, kind = _peak_rss_mb() - base_rss, "RSS"
+    print(json.dumps({"ms": ms_per_frame, "extra_mb": extra_mb, "kind": kind, "jpeg_kb": jpeg_size / 1024}))
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 20
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    print(f"\n📸 Screen capture benchmark — {frames} frames per run")
+    print("-" * 72)
+    print(f"{'Scenario':<28}{'Path':<8}{'ms/frame':>10}{'peak MB over buffer':>22}{'JPEG KB':>9}")
+    for label, (width, height) in SCENARIOS.items():
+        results = {}
+        for path in PATHS:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", path, str(width), str(height), str(frames)],
+                capture_output=True, text=True, cwd=here)
+            if out.returncode != 0:
+                print(f"{label:<28}{path:<8}  ❌ {out.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            results[path] = r
+            memory = f"{r['extra_mb']:.1f} ({r['kind']})"
+            print(f"{label:<28}{path:<8}{r['ms']:>10.1f}{memory:>22}{r['jpeg_kb']:>9.1f}")
+        if len(results) == 2:
+            speedup = results["legacy"]["ms"] / max(results["numpy"]["ms"], 1e-6)
+            print(f"{'':<28}→ {speedup:.1f}x faster")
+    print()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 6 and sys.argv[1] == "--child":
+        _run_child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5]))
+    else:
+        main()
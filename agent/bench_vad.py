@@ -0,0 +1,206 @@
+"""
+FocusPals — VAD Benchmark
+Runs every VAD engine from audio.py over labelled WAV fixtures and reports
+per-chunk precision / recall against the labels, plus CPU µs per chunk.
+
+A fixture is `name.wav` (16 kHz mono 16-bit) next to `name.json`:
+    {"speech": [[start_s, end_s], ...]}
+A chunk counts as speech when more than half of it lies inside a labelled span.
+
+Without a fixture directory, a synthetic set is generated (vowel-like speech
+with pauses over: a quiet mic, a loud fan, keyboard typing, a normal room) so
+the benchmark runs anywhere. Record real ones with debug_mic.py and label them.
+
+Usage: python bench_vad.py [fixtures_dir] [--write]
+  --write: save the synthetic fixtures into fixtures_dir first.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from config import CHUNK_SIZE, SEND_SAMPLE_RATE
+
+RATE = SEND_SAMPLE_RATE
+DURATION_SECS = 30
+
+
+# ─── Synthetic fixtures ─────────────────────────────────────
+
+def _speech(rng, duration: float):
+    """Vowel-like speech: harmonics of a drifting f0 shaped by formants, syllable
+    envelope, with 0.4–1.5s pauses between phrases. Returns (signal, spans)."""
+    n = int(duration * RATE)
+    out = np.zeros(n)
+    spans = []
+    t = 0.8
+    formants = [(700, 1200), (500, 1800), (300, 2300), (600, 1000)]
+    while t < duration - 1.0:
+        length = rng.uniform(0.8, 2.5)
+        start, end = int(t * RATE), min(n, int((t + length) * RATE))
+        tt = np.arange(end - start) / RATE
+        f0 = rng.uniform(100, 220) * (1 + 0.08 * np.sin(2 * np.pi * 0.7 * tt))
+        phase = 2 * np.pi * np.cumsum(f0) / RATE
+        f1, f2 = formants[rng.integers(len(formants))]
+        voice = np.zeros_like(tt)
+        for k in range(1, 30):
+            fk = k * f0.mean()
+            if fk > 4000:
+                break
+            gain = np.exp(-((fk - f1) / 150) ** 2) + 0.6 * np.exp(-((fk - f2) / 200) ** 2) + 0.05
+            voice += gain * np.sin(k * phase)
+        syllables = 0.55 + 0.45 * np.sin(2 * np.pi * 4.0 * tt) ** 2
+        ramp = np.minimum(1, np.minimum(tt, tt[-1] - tt) / 0.03)
+        out[start:end] = voice * syllables * ramp
+        spans.append([round(t, 3), round(t + (end - start) / RATE, 3)])
+        t += length + rng.uniform(0.4, 1.5)
+    return out / (np.sqrt(np.mean(out[out != 0] ** 2)) + 1e-9), spans
+
+
+def _fan(rng, n):
+    """Brown-ish noise plus a 100 Hz motor hum, unit RMS."""
+    brown = np.cumsum(rng.normal(0, 1, n))
+    brown -= np.convolve(brown, np.ones(400) / 400, mode="same")  # remove drift
+    hum = 0.5 * np.sin(2 * np.pi * 100 * np.arange(n) / RATE)
+    x = brown / brown.std() + hum
+    return x / x.std()
+
+
+def _keyboard(rng, n):
+    """Key clicks: 4ms decaying noise bursts at ~10 keys/s, unit peak."""
+    x = np.zeros(n)
+    click = rng.normal(0, 1, int(0.004 * RATE)) * np.exp(-np.linspace(0, 6, int(0.004 * RATE)))
+    pos = 0
+    while True:
+        pos += int(rng.exponential(RATE / 10))
+        if pos + len(click) >= n:
+            break
+        x[pos:pos + len(click)] += click * rng.uniform(0.5, 1.0)
+    return x / np.abs(x).max()
+
+
+def synthetic_fixtures() -> dict:
+    """name → (int16 samples, speech spans)."""
+    rng = np.random.default_rng(2024)
+    n = DURATION_SECS * RATE
+    fixtures = {}
+    for name, speech_rms, make_noise in (
+        ("quiet_mic", 350, lambda: 30 * rng.normal(0, 1, n)),
+        ("loud_fan", 3500, lambda: 1600 * _fan(rng, n)),
+        ("keyboard", 2500, lambda: 80 * rng.normal(0, 1, n) + 20000 * _keyboard(rng, n)),
+        ("normal_room", 2500, lambda: 120 * rng.normal(0, 1, n)),
+    ):
+        speech, spans = _speech(rng, DURATION_SECS)
+        x = speech_rms * speech + make_noise()
+        fixtures[name] = (np.clip(x, -32768, 32767).astype("<i2"), spans)
+    return fixtures
+
+
+def write_fixtures(fixtures: dict, directory: str):
+    os.makedirs(directory, exist_ok=True)
+    for name, (samples, spans) in fixtures.items():
+        with wave.open(os.path.join(directory, name + ".wav"), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(RATE)
+            wf.writeframes(samples.tobytes())
+        with open(os.path.join(directory, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump({"speech": spans}, f)
+
+
+def load_fixtures(directory: str) -> dict:
+    fixtures = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".wav"):
+            continue
+        name = filename[:-4]
+        with wave.open(os.path.join(directory, filename), "rb") as wf:
+            if wf.getframerate() != RATE or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                print(f"  ⚠️ {filename}: needs {RATE} Hz mono 16-bit — skipped")
+                continue
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+        with open(os.path.join(directory, name + ".json"), "r", encoding="utf-8") as f:
+            spans = json.load(f)["speech"]
+        fixtures[name] = (samples, spans)
+    return fixtures
+
+
+# ─── Scoring ────────────────────────────────────────────────
+
+def _chunk_labels(n_chunks: int, spans: list) -> np.ndarray:
+    covered = np.zeros(n_chunks * CHUNK_SIZE, dtype=bool)
+    for start, end in spans:
+        covered[int(start * RATE):int(end * RATE)] = True
+    return covered.reshape(n_chunks, CHUNK_SIZE).mean(axis=1) > 0.5
+
+
+def run_engine(engine, samples: np.ndarray):
+    """Decisions per chunk + µs/chunk (analysis stats included, as in listen_mic)."""
+    from audio import analyze_chunk
+    raw = samples.tobytes()
+    step = CHUNK_SIZE * 2
+    n_chunks = len(raw) // step
+    engine.reset()
+    decisions = np.zeros(n_chunks, dtype=bool)
+    start = time.perf_counter()
+    for i in range(n_chunks):
+        chunk = raw[i * step:(i + 1) * step]
+        decisions[i] = engine.is_speech(chunk, analyze_chunk(chunk))
+    us = (time.perf_counter() - start) * 1e6 / max(n_chunks, 1)
+    return decisions, us
+
+
+def main():
+    from audio import EnergyVad, AdaptiveVad
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    directory = args[0] if args else None
+    if directory and "--write" in sys.argv:
+        write_fixtures(synthetic_fixtures(), directory)
+        print(f"💾 Synthetic fixtures written to {directory}")
+    if directory and os.path.isdir(directory):
+        fixtures = load_fixtures(directory)
+        source = directory
+    else:
+        fixtures = synthetic_fixtures()
+        source = "synthetic"
+        # Round-trip through WAV so the synthetic path exercises the same loader
+        with tempfile.TemporaryDirectory() as tmp:
+            write_fixtures(fixtures, tmp)
+            fixtures = load_fixtures(tmp)
+
+    engines = {"energy": EnergyVad, "adaptive": AdaptiveVad}
+    print(f"\n🎙️ VAD benchmark — fixtures: {source}, {CHUNK_SIZE}-sample chunks")
+    print("-" * 72)
+    print(f"{'Fixture':<14}{'Engine':<10}{'precision':>10}{'recall':>8}{'F1':>7}{'speech %':>10}{'µs/chunk':>10}")
+    totals = {name: [0, 0, 0, 0.0, 0] for name in engines}   # tp, fp, fn, µs sum, runs
+    for fixture, (samples, spans) in fixtures.items():
+        n_chunks = len(samples) // CHUNK_SIZE
+        labels = _chunk_labels(n_chunks, spans)
+        for name, cls in engines.items():
+            decisions, us = run_engine(cls(), samples[:n_chunks * CHUNK_SIZE])
+            tp = int(np.count_nonzero(decisions & labels))
+            fp = int(np.count_nonzero(decisions & ~labels))
+            fn = int(np.count_nonzero(~decisions & labels))
+            precision = tp / (tp + fp) if tp + fp else 1.0
+            recall = tp / (tp + fn) if tp + fn else 1.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            t = totals[name]
+            t[0] += tp; t[1] += fp; t[2] += fn; t[3] += us; t[4] += 1
+            print(f"{fixture:<14}{name:<10}{precision:>10.2f}{recall:>8.2f}{f1:>7.2f}"
+                  f"{decisions.mean() * 100:>9.0f}%{us:>10.1f}")
+    print("-" * 72)
+    for name, (tp, fp, fn, us, runs) in totals.items():
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        print(f"{'overall':<14}{name:<10}{precision:>10.2f}{recall:>8.2f}{'':>17}{us / max(runs, 1):>10.1f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,22 @@ CHANNELS = 1
 SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
+UPLINK_FRAME_MS = 192                   # Mic audio per send_realtime_input message (128–256ms; ≤64 = one chunk each)
+UPLINK_MAX_DELAY_MS = 150               # Oldest pending chunk is sent after this, even if the frame isn't full
+GATE_PRE_ROLL_CHUNKS = 12               # Client audio gate: audio kept BEFORE voice (~768ms, first syllable not clipped)
+GATE_POST_TAIL_CHUNKS = 24              # Keeps sending this long AFTER voice stops (~1.5s: sentence endings, pauses)
+GATE_OPEN_STREAK = 3                    # Consecutive voice chunks needed to open the gate (~192ms)
+SPEAKER_JITTER_MS = 120                 # Speaker jitter buffer: audio buffered before playback starts (smooths bursty delivery)
+SPEAKER_CAPACITY_MS = 2000              # Speaker jitter buffer size; play_audio waits when it is full
+SPEAKER_PERIOD_MS = 20                  # Output callback period = worst-case barge-in cut latency
+BARGE_IN_DUCK_CHUNKS = 2                # Voiced mic chunks (64ms each) over Tama's voice → duck her (~128ms)
+BARGE_IN_STOP_CHUNKS = 5                # Still voiced after ducking → stop her locally (~320ms)
+BARGE_IN_UNDUCK_CHUNKS = 3              # Silent chunks that end a voice streak (false alarm → unduck)
+BARGE_IN_DUCK_GAIN = 0.3                # Tama's volume while ducked (−10 dB)
+BARGE_IN_HOLD_SECS = 3.0                # After a local stop, drop her audio until the server confirms, at most this long
+VISEME_SEND_HZ = 30                     # Max VISEME messages/s to Godot (latest shape wins; 30–60 = render rate)
+AUDIO_DEVICE_IDLE_SECS = 30.0           # Close mic/speaker after this long without a Live session (kept open across reconnects)
+VAD_ENGINE = "adaptive"                 # Client audio gate: "adaptive" (noise floor + ZCR + flatness) or "energy" (fixed RMS)
 
 # ─── Suspicion / Break Constants ────────────────────────────
 # Legacy static constants (kept for backward compat, used as fallback)
@@ -105,6 +121,31 @@ PROTECTED_WINDOWS = ["code", "cursor", "visual studio", "unreal", "blender", "wo
 # Browser keywords for close-tab mode detection
 BROWSER_KEYWORDS = ["chrome", "firefox", "edge", "opera", "brave", "vivaldi", "chromium"]
 
+# ─── Local Title Rules (Flash-Lite fast path) ──────────────
+# Titles that settle the category on their own → classified locally, no image, no API call.
+# Anything not listed (or listed in LOCAL_NEEDS_EYES_KEYWORDS) still goes to the vision model.
+LOCAL_NEEDS_EYES_KEYWORDS = ["youtube", "discord", "messenger", "whatsapp", "slack", "telegram", "teams"]
+LOCAL_BANNED_KEYWORDS = ["netflix", "twitch", "steam", "reddit", "disney+", "prime video", "crunchyroll",
+                         "tiktok", "instagram", "facebook"]
+LOCAL_MEDIA_KEYWORDS = ["spotify", "deezer", "youtube music", "apple music", "soundcloud", "suno"]
+LOCAL_WORK_SITES = ["chatgpt", "claude", "gemini", "github", "stack overflow", "notion", "figma"]  # Inside a browser tab
+# Desktop apps, matched as a whole " - "-separated title part ("Unreal Tournament" is not "Unreal Editor")
+LOCAL_WORK_APPS = ["visual studio code", "visual studio", "cursor", "unreal editor", "blender", "word", "excel",
+                   "powerpoint", "figma", "photoshop", "illustrator", "premiere pro", "davinci resolve",
+                   "ableton live", "fl studio", "notion", "obsidian", "terminal", "windows powershell",
+                   "powershell", "command prompt", "godot engine", "godot"]
+TITLE_MODEL_MIN_CONFIDENCE = 0.9        # Calibrated confidence needed to trust the learned title model
+TITLE_MODEL_VERIFY_EVERY = 10           # Every Nth confident title-model verdict is re-checked by Flash-Lite
+
+# ─── Flash-Lite Budget (lite_scheduler token buckets) ──────
+LITE_BUDGET_RPM = 12                    # Requests per minute (a critical pulse every 5s fits exactly)
+LITE_BUDGET_TPM = 30000                 # Input tokens per minute (~1.5-2k per screenshot call)
+LITE_BUDGET_BURST = 4                   # Requests allowed back-to-back before the rate applies
+
+# ─── Screen Change Detection (Flash-Lite frame skipping) ────
+FRAME_SKIP_MAX_CHANGED = 0.02           # Max fraction of changed screen tiles still considered "same screen"
+FRAME_SKIP_MAX_STALENESS = 60.0         # Seconds before an unchanged screen is re-checked anyway
+
 # Single dict replaces all scattered globals. Every module reads/writes here.
 state = {
     # Session
@@ -176,7 +217,7 @@ state = {
     "_api_connections": 0,           # Number of Gemini Live connections
     "_api_screen_pulses": 0,         # Number of screen pulses sent
     "_api_function_calls": 0,        # Total function calls received
-    "_api_audio_chunks_sent": 0,     # Audio chunks sent to Gemini
+    "_api_audio_chunks_sent": 0,     # Audio messages (uplink frames) sent to Gemini
     "_api_audio_chunks_recv": 0,     # Audio chunks received from Gemini
     "_api_connect_time_start": 0,    # Timestamp of current connection start
     "_api_total_connect_secs": 0.0,  # Cumulative connection time in seconds
@@ -185,6 +226,39 @@ state = {
     "_lite_input_tokens": 0,         # Total input tokens consumed by Lite
     "_lite_output_tokens": 0,        # Total output tokens consumed by Lite
     "_lite_errors": 0,               # Number of Flash-Lite errors
+    "_lite_frames_skipped": 0,       # Pulses that reused the last verdict (screen unchanged)
+    "_lite_local_hits": 0,           # Verdicts from the local title rules (no API call)
+    "_lite_model_hits": 0,           # Verdicts from the learned title model (no API call)
+    "_lite_model_checks": 0,         # Confident title-model verdicts re-checked by Flash-Lite
+    "_lite_model_mismatches": 0,     # Re-checks where Flash-Lite disagreed with the model
+    "_budget_granted": 0,            # Flash-Lite calls admitted by the budget scheduler
+    "_budget_denied": 0,             # Calls dropped after waiting too long for budget
+    "_budget_coalesced": 0,          # Duplicate calls that shared a pending request
+    "_lite_cache_hits": 0,           # Verdicts served from the content-addressed cache
+    "_lite_cache_misses": 0,         # Cache lookups that fell through to the API
+    "_lite_cache_evictions": 0,      # Entries dropped by LRU eviction
+    "_foreground_switch": None,      # (title, timestamp) of the last debounced foreground change
+    "_pulse_interval": 0.0,          # Current adaptive deep_work scan interval (s), 0 = not computed yet
+    "_pipeline_latency": 0.0,        # Capture start → Flash-Lite verdict for the last pulse (s)
+    "_pipeline_frames_dropped": 0,   # Frames replaced before classify could take them
+    "_mic_overflows": 0,             # Mic chunks lost: ring buffer full or PortAudio input overflow
+    "_mic_underruns": 0,             # Mic reads that got no audio for 1s, or PortAudio input underflow
+    "_uplink_bytes_sent": 0,         # Mic PCM bytes sent to Gemini
+    "_uplink_hold_ms": 0.0,          # EMA: time the oldest chunk of a frame waited in the framer
+    "_uplink_send_ms": 0.0,          # EMA: duration of one send_realtime_input(audio=...) call
+    "_audio_queues": {},             # AudioQueue name → live metrics (size, high water, drops, wait)
+    "_speaker_underruns": 0,         # Speaker ran dry mid-reply (gap in Tama's voice) or PortAudio output underflow
+    "_speaker_overruns": 0,          # play_audio found the speaker jitter buffer full and had to wait
+    "_speaker_buffer_ms": 0.0,       # Speaker jitter buffer depth at the last write
+    "_barge_in_local": 0,            # Tama's voice stopped locally (user talked over her)
+    "_barge_in_confirmed": 0,        # …then confirmed by the server's `interrupted`
+    "_barge_in_false": 0,            # Ducks/stops that turned out not to be a barge-in (echo, noise, unconfirmed)
+    "_barge_in_lead_ms": 0.0,        # EMA: local stop → server `interrupted` (time Tama no longer talks over the user)
+    "_viseme_sent": 0,               # VISEME messages sent to Godot (rate-limited channel)
+    "_viseme_merged": 0,             # Viseme updates superseded or unchanged before their send slot
+    "_audio_device_opens": 0,        # Mic/speaker streams actually opened (PortAudio open calls)
+    "_audio_device_reuses": 0,       # Sessions that got an already-open stream (no reopen on reconnect)
+    "_audio_device_open_ms": 0.0,    # Duration of the last stream open
     "_session_summary": None,        # Last generated session summary (markdown)
     # Gemini connection status (for Godot UI feedback)
     "gemini_connected": False,        # True when Gemini Live API session is active
@@ -217,6 +291,7 @@ tweaks = {
     "proactive_audio": 1.0,       # 1.0 = ON, 0.0 = OFF — Tama speaks spontaneously
     "thinking": 1.0,              # 1.0 = ON, 0.0 = OFF — thinking budget for Deep Work
     "voice_pitch": 1.0,           # Pitch shift multiplier: 1.0 = normal, 1.2 = kawaii, 0.8 = deeper
+    "speaker_jitter_ms": float(SPEAKER_JITTER_MS),  # Speaker jitter buffer target depth (ms, applied live)
 }
 
 
@@ -265,3 +340,37 @@ def compute_delta_s(alignment: float, category: str) -> float:
         return base * tweaks["suspicion_gain_mult"]
     else:
         return base * tweaks["suspicion_decay_mult"]
+
+
+# ─── Adaptive Pulse Interval ────────────────────────────────
+PULSE_MIN_DELAY = 5.0                   # Critical / strike pending: fast enough for STRIKE escalation
+PULSE_MAX_DELAY = 60.0                  # Long, stable S=0 focus streak
+
+
+def compute_pulse_delay(suspicion: float, s_trend: str, shifts_10min: int,
+                        focus_streak_min: int, confidence: float, strike_pending: bool) -> float:
+    """Seconds until the next deep_work scan (before tweaks["pulse_delay_mult"]).
+    Stable S=0 focus stretches from 15s toward 60s as the streak grows (scaled by trust);
+    rising suspicion, frequent category shifts or low confidence tighten it back."""
+    if strike_pending or suspicion >= 9:
+        return PULSE_MIN_DELAY
+
+    if suspicion <= 0 and s_trend != "↑" and shifts_10min == 0:
+        # Stable focus: +3s per streak minute → 30s after 5 min, 60s after 15 min
+        stretched = min(PULSE_MAX_DELAY, 15.0 + 3.0 * focus_streak_min)
+        return 15.0 + (stretched - 15.0) * confidence
+
+    # Suspicion tier (same ladder as before)
+    if suspicion <= 0:
+        delay = 15.0   # Idle but something moved recently
+    elif suspicion <= 5:
+        delay = 10.0   # Medium: watching, occasional check
+    else:
+        delay = 8.0    # High: attentive but not spamming
+
+    # Volatility: going up, or hopping between kinds of apps → look more often
+    if s_trend == "↑":
+        delay *= 0.6
+    delay /= 1.0 + 0.25 * min(shifts_10min, 4)
+    delay *= 0.5 + 0.5 * confidence   # Low trust → shorter leash
+    return max(PULSE_MIN_DELAY, min(PULSE_MAX_DELAY, delay))
@@ -0,0 +1,158 @@
+"""
+FocusPals — DSP
+Small NumPy signal-processing blocks for the audio paths.
+
+Resampler: streaming polyphase FIR conversion between any two integer rates
+(48k → 16k, 44.1k → 16k...). Filter banks are designed once per (up, down)
+ratio and shared by every stream, so a mic hot-swap costs nothing.
+
+Playback effects (play_audio): gain with saturation, bitcrush, block
+stutter/silence and fades. They take int16 bytes or arrays and return int16
+arrays, so a chain converts from/to bytes once. See bench_audio.py.
+"""
+
+from math import ceil, gcd
+
+import numpy as np
+
+# ─── Polyphase Resampler ────────────────────────────────────
+FILTER_ORDER = 16            # Filter length in periods of the narrower rate (quality vs CPU)
+KAISER_BETA = 8.0            # ~80 dB stopband
+
+_bank_cache = {}             # (up, down, order) → (up, taps) float32 bank, taps reversed
+
+
+def _filter_bank(up: int, down: int, order: int) -> np.ndarray:
+    """Windowed-sinc low-pass at the narrower of the two Nyquist limits, split into
+    `up` polyphase branches. Row p holds taps p, p+up, p+2*up..., reversed so a
+    branch dots directly with a forward input window."""
+    key = (up, down, order)
+    if key not in _bank_cache:
+        taps_per_phase = ceil(order * max(up, down) / up)
+        n_taps = up * taps_per_phase
+        cutoff = 0.5 / max(up, down)                  # Cycles/sample at the upsampled rate
+        m = np.arange(n_taps) - (n_taps - 1) / 2
+        h = 2 * cutoff * np.sinc(2 * cutoff * m) * np.kaiser(n_taps, KAISER_BETA)
+        h *= up / h.sum()                             # Unity DC gain after zero-stuffing
+        bank = h.reshape(taps_per_phase, up).T[:, ::-1]
+        _bank_cache[key] = np.ascontiguousarray(bank, dtype=np.float32)
+    return _bank_cache[key]
+
+
+class Resampler:
+    """Streaming int16 mono resampler. process() takes any number of input samples
+    and returns every output sample they complete; filter history and phase carry
+    over between calls, so chunk boundaries are seamless."""
+
+    def __init__(self, in_rate: int, out_rate: int, order: int = FILTER_ORDER):
+        g = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+        self._bank = _filter_bank(self.up, self.down, order)
+        self.taps = self._bank.shape[1]                # Per branch
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._in_pos = 0        # Absolute index of the first sample of the next input block
+        self._out_pos = 0       # Absolute index of the next output sample
+
+    @property
+    def passthrough(self) -> bool:
+        return self.up == self.down
+
+    def process(self, pcm) -> bytes:
+        """int16 little-endian bytes in → resampled int16 bytes out."""
+        if self.passthrough:
+            return bytes(pcm)
+        x = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2).astype(np.float32)
+        if len(x) == 0:
+            return b""
+        k = self.taps
+        buf = np.concatenate((self._history, x))     # buf[j] ↔ input index _in_pos - (k-1) + j
+
+        # Outputs whose newest input sample is in this block: floor(n * down / up) <= last
+        last = self._in_pos + len(x) - 1
+        end = ((last + 1) * self.up - 1) // self.down + 1
+        n = np.arange(self._out_pos, end, dtype=np.int64)
+        pos = n * self.down
+        start = pos // self.up - self._in_pos          # Window = buf[start : start + k], newest last
+        windows = np.lib.stride_tricks.sliding_window_view(buf, k)[start]
+        y = np.einsum("nk,nk->n", windows, self._bank[pos % self.up])
+
+        self._history = buf[-(k - 1):].copy()
+        self._in_pos += len(x)
+        self._out_pos = end
+        return np.clip(np.rint(y), -32768, 32767).astype("<i2").tobytes()
+
+    def reset(self):
+        self._history[:] = 0
+        self._in_pos = 0
+        self._out_pos = 0
+
+
+# ─── Playback Effects ───────────────────────────────────────
+
+def pcm_array(pcm) -> np.ndarray:
+    """int16 bytes (odd trailing byte ignored) or array → int16 array."""
+    if isinstance(pcm, np.ndarray):
+        return pcm
+    return np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+
+
+def apply_gain(pcm, gain: float, start_gain: float | None = None) -> np.ndarray:
+    """Scale by `gain`, saturating at int16 full scale. With `start_gain` the gain
+    ramps linearly from it over the chunk, so a volume change doesn't click."""
+    x = pcm_array(pcm)
+    if start_gain is None or start_gain == gain:
+        y = x * np.float32(gain)
+    else:
+        y = x * np.linspace(start_gain, gain, len(x), dtype=np.float32)
+    return np.clip(np.trunc(y), -32768, 32767).astype("<i2")
+
+
+def bitcrush(pcm, shift: int = 4) -> np.ndarray:
+    """Drop the `shift` low bits (16-bit → 16-shift effective), same as (s >> shift) << shift."""
+    return pcm_array(pcm) & np.int16(-(1 << shift))
+
+
+_glitch_rng = np.random.default_rng()
+
+
+def block_glitch(pcm, block: int = 64, silence_p: float = 0.2, stutter_p: float = 0.15, rng=None) -> np.ndarray:
+    """Per block of `block` samples: silence it with probability silence_p, or
+    hold its first sample (stutter) with probability stutter_p."""
+    x = pcm_array(pcm)
+    n = len(x)
+    if n == 0:
+        return x.copy()
+    rng = rng or _glitch_rng
+    n_blocks = -(-n // block)
+    padded = np.zeros(n_blocks * block, dtype="<i2")
+    padded[:n] = x
+    blocks = padded.reshape(n_blocks, block)
+    roll = rng.random(n_blocks)
+    stutter = (roll >= silence_p) & (roll < silence_p + stutter_p)
+    blocks[stutter] = blocks[stutter, :1]
+    blocks[roll < silence_p] = 0
+    return padded[:n]
+
+
+_fade_cache = {}             # length → float32 ramp rising to 1
+
+
+def _ramp(length: int) -> np.ndarray:
+    if length not in _fade_cache:
+        _fade_cache[length] = np.linspace(0, 1, length + 1, dtype=np.float32)[1:]
+    return _fade_cache[length]
+
+
+def fade(pcm, fade_in: int = 0, fade_out: int = 0) -> np.ndarray:
+    """Linear fade-in over the first `fade_in` samples and fade-out over the last
+    `fade_out`, so starting or cutting audio mid-waveform doesn't click."""
+    x = pcm_array(pcm).copy()
+    fade_in, fade_out = min(fade_in, len(x)), min(fade_out, len(x))
+    if fade_in > 0:
+        x[:fade_in] = x[:fade_in] * _ramp(fade_in)
+    if fade_out > 0:
+        x[-fade_out:] = x[-fade_out:] * _ramp(fade_out)[::-1]
+    return x
@@ -7,25 +7,86 @@ Runs alongside the main 2.5 Flash Native Audio Live API agent.
 import asyncio
 import io
 import json
+import re
 import time
 import logging
+from collections import OrderedDict
 
 from google.genai import types
 
 import config as cfg
-from config import state
+from config import (
+    state, FRAME_SKIP_MAX_CHANGED, FRAME_SKIP_MAX_STALENESS,
+    BROWSER_KEYWORDS,
+    LOCAL_NEEDS_EYES_KEYWORDS, LOCAL_BANNED_KEYWORDS, LOCAL_MEDIA_KEYWORDS, LOCAL_WORK_SITES, LOCAL_WORK_APPS,
+    TITLE_MODEL_MIN_CONFIDENCE, TITLE_MODEL_VERIFY_EVERY,
+)
+from screen_capture import frame_difference, signature_key
+import title_model
+from lite_scheduler import scheduler, PRIORITY_SUMMARY, PRIORITY_PULSE
 
 log = logging.getLogger("FlashLite")
 
 # ─── Model ──────────────────────────────────────────────────
 LITE_MODEL = "gemini-3.1-flash-lite-preview"
 
+# ─── Budget ─────────────────────────────────────────────────
+IMAGE_TOKEN_ESTIMATE = 516       # ~2 tiles of 258 tokens for a 1024px-wide JPEG
+
+
+def _estimate_tokens(prompt: str, images: int = 0) -> int:
+    """Rough input size before the call (~4 chars per token + a fixed cost per image)."""
+    return len(prompt) // 4 + images * IMAGE_TOKEN_ESTIMATE
+
+
+def _track_usage(response, est_tokens: int):
+    """Telemetry for one Flash-Lite call, and settle the budget with the real prompt size."""
+    state["_lite_api_calls"] += 1
+    actual = est_tokens
+    if hasattr(response, 'usage_metadata') and response.usage_metadata:
+        actual = response.usage_metadata.prompt_token_count or est_tokens
+        state["_lite_input_tokens"] += response.usage_metadata.prompt_token_count or 0
+        state["_lite_output_tokens"] += response.usage_metadata.candidates_token_count or 0
+    scheduler.settle(est_tokens, actual)
+
+
 # ─── Pre-Classification ────────────────────────────────────
 
 _last_pre_classification = None  # Cache for hint injection
 _classification_history = []     # Rolling history for session summary
 _lite_start_time = 0.0           # Timestamp of first call — warmup delay
 WARMUP_DELAY = 15.0              # Don't call Flash-Lite for first 15s (let Live API stabilize)
+_last_classified_frame = None    # {signature, title, task, result, timestamp} of the last real API verdict
+_model_hits_since_check = 0      # Confident title-model verdicts since the last Flash-Lite re-check
+
+# Content-addressed verdict cache: (normalized title, frame key, task) → verdict.
+# Users alt-tab between the same few windows, so most states repeat.
+CLASSIFY_CACHE_SIZE = 128        # Max entries before LRU eviction
+CLASSIFY_CACHE_TTL = 600.0       # Seconds an entry stays valid
+_classify_cache = OrderedDict()  # key → (result, expires_at), most recently used last
+
+
+def _keyword_pattern(keywords: list) -> re.Pattern:
+    """Whole-word match on any keyword ("word" must not hit "password")."""
+    return re.compile(r"(?<!\w)(?:" + "|".join(re.escape(k) for k in keywords) + r")(?!\w)")
+
+def _app_pattern(names: list) -> re.Pattern:
+    """A whole title part that IS the app/site name ("Blender 4.1", "Microsoft Word"),
+    not a part that merely contains it ("Steam cleaning tips")."""
+    return re.compile(r"(?:adobe |microsoft )?(?P<app>" + "|".join(re.escape(n) for n in names)
+                      + r")(?: v?\d[\w.]*)?")
+
+
+_TITLE_PART_SEP_RE = re.compile(r"\s+[-—|]\s+")  # "main.py - Visual Studio Code", "Show | Netflix"
+
+# Local rule engine — checked in this order, first match wins
+_MEDIA_RE = _keyword_pattern(LOCAL_MEDIA_KEYWORDS)       # before "youtube" so YouTube Music is FLUX
+_NEEDS_EYES_RE = _keyword_pattern(LOCAL_NEEDS_EYES_KEYWORDS)
+_BANNED_RE = _app_pattern(LOCAL_BANNED_KEYWORDS)
+_BROWSER_RE = _keyword_pattern(BROWSER_KEYWORDS)
+_WORK_SITE_RE = _app_pattern(LOCAL_WORK_SITES)
+_WORK_APP_RE = _app_pattern(LOCAL_WORK_APPS)
+_VISIBLE_DISTRACTION_RE = _keyword_pattern(LOCAL_BANNED_KEYWORDS + ["youtube"])  # In any open window
 
 PRE_CLASSIFY_PROMPT = """You are a strict screen classification engine. Analyze this multi-monitor screenshot and classify the user's activity.
 
@@ -67,30 +128,256 @@ Alignment:
 If no task is set, use: SANTE→1.0, FLUX/ZONE_GRISE→0.5, BANNIE→0.0"""
 
 
+def _normalize_title(title: str) -> str:
+    """Normalize a window title for comparisons: lowercase, no notification
+    counters like "(3) " and collapsed whitespace."""
+    title = (title or "").lower().strip()
+    title = re.sub(r"^\(\d+\+?\)\s*", "", title)
+    return " ".join(title.split())
+
+
+def _distraction_elsewhere(title: str, open_windows: list) -> bool:
+    """True if another open window shows something that could override the active
+    window visually (banned site, YouTube). Only the vision model can judge that."""
+    for other in open_windows or []:
+        other_title = _normalize_title(other)
+        if other_title and other_title != title and _VISIBLE_DISTRACTION_RE.search(other_title):
+            if not _MEDIA_RE.search(other_title):  # Music in the background is fine
+                return True
+    return False
+
+
+def predict_from_title_model(active_window: str, open_windows: list, task: str | None) -> dict | None:
+    """Verdict from the learned title model, only when its calibrated confidence
+    reaches TITLE_MODEL_MIN_CONFIDENCE. Same guards as the title rules: never for
+    titles that need eyes (YouTube, Discord...) or when another window could win."""
+    title = _normalize_title(active_window)
+    if _NEEDS_EYES_RE.search(title) or _distraction_elsewhere(title, open_windows):
+        return None
+    prediction = title_model.predict(active_window, task)
+    if prediction is None or prediction["confidence"] < TITLE_MODEL_MIN_CONFIDENCE:
+        return None
+    return {
+        "category": prediction["category"],
+        "alignment": prediction["alignment"],
+        "reason": f"learned ({prediction['confidence']:.0%})",
+        "description": f"Window: {active_window[:80]}",
+        "source": "model",
+    }
+
+
+def _match_app(pattern: re.Pattern, title: str) -> str | None:
+    """Name of the app/site one of the title's parts is, or None."""
+    for part in _TITLE_PART_SEP_RE.split(title):
+        if match := pattern.fullmatch(part.strip(" *●")):
+            return match.group("app")
+    return None
+
+
+def _task_mentions(task: str, name: str) -> bool:
+    return bool(_keyword_pattern([name]).search(" ".join(task.lower().split())))
+
+
+def classify_title(active_window: str, open_windows: list, task: str | None = None) -> dict | None:
+    """Local rule engine: classify from the window title alone, no image, no network.
+    Returns None when the title is ambiguous (YouTube, Discord, generic browser tab...),
+    when another open window could be the real, visible distraction, or when a task
+    is declared and the app doesn't settle alignment with it on its own (VS Code
+    during a Blender task is the vision model's call, not SANTE)."""
+    title = _normalize_title(active_window)
+    if not title or _distraction_elsewhere(title, open_windows):
+        return None
+
+    if match := _MEDIA_RE.search(title):
+        category, alignment, app = "FLUX", 0.5, match.group(0)
+    elif _NEEDS_EYES_RE.search(title):
+        return None
+    elif app := _match_app(_BANNED_RE, title):
+        category, alignment = "BANNIE", 0.0
+    elif app := _match_app(_WORK_SITE_RE if _BROWSER_RE.search(title) else _WORK_APP_RE, title):
+        # In a browser only known work sites count — "word" in a tab title means nothing
+        category, alignment = "SANTE", 1.0
+    else:
+        return None
+
+    # With a task, only verdicts the task confirms: a work app it names, or a
+    # distraction/media app it doesn't (a task about Twitch makes Twitch ambiguous)
+    if task and (category == "SANTE") != _task_mentions(task, app):
+        return None
+
+    return {
+        "category": category,
+        "alignment": alignment,
+        "reason": f"title: {app}",
+        "description": f"Window: {active_window[:80]}",
+        "source": "local",
+    }
+
+
+def _reuse_unchanged_frame(frame_signature: bytes | None, active_window: str, task: str | None) -> dict | None:
+    """Return the last verdict if the screen and active title are effectively unchanged.
+    Forces a real re-check after FRAME_SKIP_MAX_STALENESS seconds, even on a static screen."""
+    last = _last_classified_frame
+    if frame_signature is None or last is None:
+        return None
+    if time.time() - last["timestamp"] > FRAME_SKIP_MAX_STALENESS:
+        return None
+    if last["title"] != _normalize_title(active_window) or last["task"] != task:
+        return None
+    if frame_difference(frame_signature, last["signature"]) > FRAME_SKIP_MAX_CHANGED:
+        return None
+    return dict(last["result"])
+
+
+def _record_classification(active_window: str, result: dict):
+    """Cache the verdict for hint injection and append it to the session history."""
+    global _last_pre_classification
+    _last_pre_classification = {
+        **result,
+        "timestamp": time.time(),
+    }
+
+    # Add to history (rolling, max 200 entries)
+    _classification_history.append({
+        "time": time.time(),
+        "window": active_window,
+        "category": result["category"],
+        "alignment": result["alignment"],
+    })
+    if len(_classification_history) > 200:
+        _classification_history.pop(0)
+
+
+def _cache_key(frame_signature: bytes | None, active_window: str, task: str | None) -> tuple | None:
+    """Cache key for a screen state, or None when there is no frame signature."""
+    if frame_signature is None:
+        return None
+    return (_normalize_title(active_window), signature_key(frame_signature), task)
+
+
+def _cache_get(key: tuple | None) -> dict | None:
+    """LRU lookup with per-entry TTL. Counts hits and misses."""
+    if key is None:
+        return None
+    entry = _classify_cache.get(key)
+    if entry is not None and entry[1] < time.time():
+        del _classify_cache[key]  # Expired
+        entry = None
+    if entry is None:
+        state["_lite_cache_misses"] += 1
+        return None
+    _classify_cache.move_to_end(key)
+    state["_lite_cache_hits"] += 1
+    return dict(entry[0])
+
+
+def _cache_put(key: tuple | None, result: dict):
+    """Insert a verdict, evicting the least recently used entries past CLASSIFY_CACHE_SIZE."""
+    if key is None:
+        return
+    _classify_cache[key] = (dict(result), time.time() + CLASSIFY_CACHE_TTL)
+    _classify_cache.move_to_end(key)
+    while len(_classify_cache) > CLASSIFY_CACHE_SIZE:
+        _classify_cache.popitem(last=False)
+        state["_lite_cache_evictions"] += 1
+
+
 async def pre_classify(jpeg_bytes: bytes, active_window: str,
-                       open_windows: list, task: str = None) -> dict | None:
+                       open_windows: list, task: str = None,
+                       frame_signature: bytes = None, priority: int = PRIORITY_PULSE) -> dict | None:
     """
     Fast pre-classification via Gemini 3.1 Flash-Lite.
     Returns a dict with {category, alignment, reason} or None on failure.
     Non-blocking — designed to run in parallel with the main scan loop.
+    Titles that are obvious on their own are answered by classify_title() first,
+    then by the learned title model when it is confident enough. Every
+    TITLE_MODEL_VERIFY_EVERY-th model verdict still goes to the API, so confident
+    titles keep getting relabelled and the calibration keeps getting samples.
+    If frame_signature is given and the screen hasn't changed since the last
+    verdict, that verdict is reused without calling the API.
+    API calls go through the budget scheduler at `priority`; None if it has no budget.
     """
+    # Local title rules: obvious apps never need an image (works during warmup and offline too)
+    local = classify_title(active_window, open_windows, task)
+    if local is not None:
+        state["_lite_local_hits"] += 1
+        _record_classification(active_window, local)
+        log.info(f"📏 Lite: local rule — {local['category']} A:{local['alignment']} ({local['reason']})")
+        return local
+
+    # Learned title model: titles Flash-Lite already classified consistently
+    global _model_hits_since_check
+    learned = predict_from_title_model(active_window, open_windows, task)
+    if learned is not None:
+        _model_hits_since_check += 1
+        if cfg.client is None or _model_hits_since_check < TITLE_MODEL_VERIFY_EVERY:
+            return _use_model_verdict(active_window, learned)
+
     if cfg.client is None:
         return None
 
+    cache_key = _cache_key(frame_signature, active_window, task)
+    if learned is None:
+        # Change detection: static screen + same window → reuse the last verdict
+        reused = _reuse_unchanged_frame(frame_signature, active_window, task)
+        if reused is not None:
+            state["_lite_frames_skipped"] += 1
+            _record_classification(active_window, reused)
+            log.info(f"♻️ Lite: screen unchanged — reusing {reused['category']} A:{reused['alignment']}")
+            return reused
+
+        # Content-addressed cache: this exact screen state was classified recently
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            _record_classification(active_window, cached)
+            log.info(f"🗃️ Lite: cache hit — {cached['category']} A:{cached['alignment']}")
+            return cached
+
     # Warmup guard: don't call Flash-Lite for first 15s
     global _lite_start_time
     if _lite_start_time == 0.0:
         _lite_start_time = time.time()
     if time.time() - _lite_start_time < WARMUP_DELAY:
-        return None
+        return _use_model_verdict(active_window, learned) if learned is not None else None
+
+    if learned is not None:
+        # Re-check: a fresh API verdict relabels the title and scores the calibration
+        _model_hits_since_check = 0
+        state["_lite_model_checks"] += 1
+        log.info(f"🔍 Lite: title model says {learned['category']} — re-checking with Flash-Lite")
+
+    prompt = PRE_CLASSIFY_PROMPT.format(
+        active_window=active_window,
+        open_windows=open_windows,
+        task=task or "NOT SET (free session)",
+    )
+    est_tokens = _estimate_tokens(prompt, images=1)
+    coalesce_key = ("classify", cache_key or (_normalize_title(active_window), task))
+    result = await scheduler.submit(
+        lambda: _classify_via_api(prompt, est_tokens, jpeg_bytes, active_window, task, frame_signature, cache_key),
+        priority=priority, est_tokens=est_tokens, key=coalesce_key,
+    )
+    if learned is None:
+        return result
+    if result is None:  # No budget or API error: the model's verdict still stands
+        return _use_model_verdict(active_window, learned)
+    if (result["category"], result["alignment"]) != (learned["category"], learned["alignment"]):
+        state["_lite_model_mismatches"] += 1
+        log.info(f"🔍 Lite: title model corrected — {learned['category']} → {result['category']}")
+    return result
+
+
+def _use_model_verdict(active_window: str, learned: dict) -> dict:
+    state["_lite_model_hits"] += 1
+    _record_classification(active_window, learned)
+    log.info(f"🧠 Lite: title model — {learned['category']} A:{learned['alignment']} ({learned['reason']})")
+    return learned
 
-    try:
-        prompt = PRE_CLASSIFY_PROMPT.format(
-            active_window=active_window,
-            open_windows=open_windows,
-            task=task or "NOT SET (free session)",
-        )
 
+async def _classify_via_api(prompt: str, est_tokens: int, jpeg_bytes: bytes, active_window: str,
+                            task: str | None, frame_signature: bytes | None, cache_key: tuple | None) -> dict | None:
+    """The actual Flash-Lite call behind pre_classify (runs once budget is granted)."""
+    try:
         response = await cfg.client.aio.models.generate_content(
             model=LITE_MODEL,
             contents=[
@@ -105,12 +392,7 @@ async def pre_classify(jpeg_bytes: bytes, active_window: str,
                 response_mime_type="application/json",  # Force valid JSON output
             ),
         )
-
-        # Track telemetry
-        state["_lite_api_calls"] += 1
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            state["_lite_input_tokens"] += response.usage_metadata.prompt_token_count or 0
-            state["_lite_output_tokens"] += response.usage_metadata.candidates_token_count or 0
+        _track_usage(response, est_tokens)
 
         # Parse JSON response
         text = response.text.strip()
@@ -136,21 +418,19 @@ async def pre_classify(jpeg_bytes: bytes, active_window: str,
             result["alignment"] = alignment
 
         # Cache result
-        global _last_pre_classification
-        _last_pre_classification = {
-            **result,
-            "timestamp": time.time(),
-        }
-
-        # Add to history (rolling, max 200 entries)
-        _classification_history.append({
-            "time": time.time(),
-            "window": active_window,
-            "category": result["category"],
-            "alignment": result["alignment"],
-        })
-        if len(_classification_history) > 200:
-            _classification_history.pop(0)
+        _record_classification(active_window, result)
+        _cache_put(cache_key, result)
+        # Only real API verdicts train the title model (never its own predictions)
+        title_model.learn(active_window, task, result["category"], result["alignment"])
+        if frame_signature is not None:
+            global _last_classified_frame
+            _last_classified_frame = {
+                "signature": frame_signature,
+                "title": _normalize_title(active_window),
+                "task": task,
+                "result": dict(result),
+                "timestamp": time.time(),
+            }
 
         log.info(f"⚡ Lite: {result['category']} A:{result['alignment']} — {result.get('reason', '')}")
         return result
@@ -265,20 +545,22 @@ async def generate_session_summary(language: str = "en") -> str | None:
             language_name=language_name,
         )
 
-        response = await cfg.client.aio.models.generate_content(
-            model=LITE_MODEL,
-            contents=[types.Part(text=prompt)],
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=500,
+        est_tokens = _estimate_tokens(prompt)
+        response = await scheduler.submit(
+            lambda: cfg.client.aio.models.generate_content(
+                model=LITE_MODEL,
+                contents=[types.Part(text=prompt)],
+                config=types.GenerateContentConfig(
+                    temperature=0.7,
+                    max_output_tokens=500,
+                ),
             ),
+            priority=PRIORITY_SUMMARY, est_tokens=est_tokens, key=("summary", total),
         )
-
-        # Track telemetry
-        state["_lite_api_calls"] += 1
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            state["_lite_input_tokens"] += response.usage_metadata.prompt_token_count or 0
-            state["_lite_output_tokens"] += response.usage_metadata.candidates_token_count or 0
+        if response is None:
+            log.warning("Flash-Lite summary skipped: no budget")
+            return None
+        _track_usage(response, est_tokens)
 
         summary = response.text.strip()
         log.info(f"📊 Session summary generated ({len(summary)} chars)")
@@ -292,9 +574,10 @@ async def generate_session_summary(language: str = "en") -> str | None:
 
 def clear_classification_history():
     """Reset classification history for a new session."""
-    global _last_pre_classification, _lite_start_time
+    global _last_pre_classification, _lite_start_time, _last_classified_frame
     _classification_history.clear()
     _last_pre_classification = None
+    _last_classified_frame = None
     _lite_start_time = 0.0  # Reset warmup for next session
 
 
@@ -330,25 +613,26 @@ async def infer_task(jpeg_bytes: bytes, active_window: str,
             open_windows=open_windows[:8],
         )
 
-        response = await cfg.client.aio.models.generate_content(
-            model=LITE_MODEL,
-            contents=[
-                types.Part(text=prompt),
-                types.Part(inline_data=types.Blob(
-                    data=jpeg_bytes, mime_type="image/jpeg"
-                )),
-            ],
-            config=types.GenerateContentConfig(
-                temperature=0.2,
-                max_output_tokens=30,
+        est_tokens = _estimate_tokens(prompt, images=1)
+        response = await scheduler.submit(
+            lambda: cfg.client.aio.models.generate_content(
+                model=LITE_MODEL,
+                contents=[
+                    types.Part(text=prompt),
+                    types.Part(inline_data=types.Blob(
+                        data=jpeg_bytes, mime_type="image/jpeg"
+                    )),
+                ],
+                config=types.GenerateContentConfig(
+                    temperature=0.2,
+                    max_output_tokens=30,
+                ),
             ),
+            priority=PRIORITY_SUMMARY, est_tokens=est_tokens, key=("infer_task", active_window),
         )
-
-        # Track telemetry
-        state["_lite_api_calls"] += 1
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            state["_lite_input_tokens"] += response.usage_metadata.prompt_token_count or 0
-            state["_lite_output_tokens"] += response.usage_metadata.candidates_token_count or 0
+        if response is None:
+            return None
+        _track_usage(response, est_tokens)
 
         task_label = response.text.strip().strip('"').strip("'")
         # Sanity check: not too long, not empty
@@ -372,5 +656,15 @@ def get_lite_stats() -> dict:
         "lite_input_tokens": state.get("_lite_input_tokens", 0),
         "lite_output_tokens": state.get("_lite_output_tokens", 0),
         "lite_errors": state.get("_lite_errors", 0),
+        "lite_frames_skipped": state.get("_lite_frames_skipped", 0),
+        "lite_local_hits": state.get("_lite_local_hits", 0),
+        "lite_model_hits": state.get("_lite_model_hits", 0),
+        "lite_model_checks": state.get("_lite_model_checks", 0),
+        "lite_model_mismatches": state.get("_lite_model_mismatches", 0),
+        "title_model": title_model.get_model_stats(),
+        "lite_cache_hits": state.get("_lite_cache_hits", 0),
+        "lite_cache_misses": state.get("_lite_cache_misses", 0),
+        "lite_cache_evictions": state.get("_lite_cache_evictions", 0),
+        "lite_cache_size": len(_classify_cache),
         "classifications_logged": len(_classification_history),
     }
@@ -0,0 +1,126 @@
+"""
+FocusPals — Foreground Window Watcher
+Emits debounced "window changed" events so Tama looks right away when the user
+switches apps or tabs, instead of waiting for the next pulse.
+
+Providers only answer "what is in the foreground right now?". The Win32 one
+costs two user32 calls per poll, so the watcher can run at 4 Hz on the event
+loop; the fake one is driven by hand (tests, replays, non-Windows dev boxes).
+"""
+
+import asyncio
+import re
+import sys
+import time
+
+
+# ─── Providers ──────────────────────────────────────────────
+
+class ForegroundProvider:
+    """Interface: current() → (window_id, title) of the foreground window, or None."""
+
+    def current(self) -> tuple[int, str] | None:
+        raise NotImplementedError
+
+
+class Win32ForegroundProvider(ForegroundProvider):
+    """GetForegroundWindow + GetWindowTextW. Reading another process's title this
+    way doesn't send it a message, so a hung app can't block the poll."""
+
+    def __init__(self):
+        import ctypes
+        self._user32 = ctypes.windll.user32
+        self._buf = ctypes.create_unicode_buffer(512)
+
+    def current(self) -> tuple[int, str] | None:
+        hwnd = self._user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        length = self._user32.GetWindowTextW(hwnd, self._buf, len(self._buf))
+        return hwnd, self._buf.value[:length]
+
+
+class FakeForegroundProvider(ForegroundProvider):
+    """Foreground window set by hand: provider.set(1, "Netflix - Google Chrome")."""
+
+    def __init__(self, window_id: int = 0, title: str = ""):
+        self._window = (window_id, title) if title else None
+
+    def set(self, window_id: int, title: str):
+        self._window = (window_id, title)
+
+    def current(self) -> tuple[int, str] | None:
+        return self._window
+
+
+def default_provider() -> ForegroundProvider | None:
+    """Win32 provider on Windows, None elsewhere (watcher disabled)."""
+    if sys.platform != "win32":
+        return None
+    try:
+        return Win32ForegroundProvider()
+    except Exception as e:
+        print(f"  ⚠️ Foreground watcher unavailable: {e}")
+        return None
+
+
+# ─── Watcher ────────────────────────────────────────────────
+
+_COUNTER_RE = re.compile(r"^\(\d+\+?\)\s*")  # "(3) Inbox" → "Inbox": unread counters aren't a switch
+
+
+class ForegroundWatcher:
+    """Polls a provider and calls on_change(title, changed_at) once a new foreground
+    window has been stable for `debounce` seconds (alt-tab flicker is ignored).
+    changed_at is when the switch was first seen, not when it was confirmed.
+    Events are at least `min_gap` apart; a switch inside the gap is delivered late, not lost."""
+
+    def __init__(self, provider: ForegroundProvider, on_change,
+                 poll_interval: float = 0.25, debounce: float = 0.5, min_gap: float = 2.0):
+        self.provider = provider
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.min_gap = min_gap
+
+        self._settled = None        # (window_id, normalized title) last reported
+        self._candidate = None      # (key, title, first_seen) waiting out the debounce
+        self._last_emit = 0.0
+        self.events_emitted = 0
+
+    def poll(self, now: float | None = None):
+        """One observation. Separate from run() so a fake clock can drive it."""
+        now = time.time() if now is None else now
+        try:
+            window = self.provider.current()
+        except Exception:
+            return
+        if not window or not window[1].strip():
+            return  # Desktop / transient untitled popups: keep the last real window
+        window_id, title = window
+        key = (window_id, _COUNTER_RE.sub("", title.strip()))
+
+        if key == self._settled:
+            self._candidate = None
+            return
+        if self._candidate is None or self._candidate[0] != key:
+            self._candidate = (key, title, now)
+            return
+
+        _, title, first_seen = self._candidate
+        if now - first_seen >= self.debounce and now - self._last_emit >= self.min_gap:
+            self._settled = key
+            self._candidate = None
+            self._last_emit = now
+            self.events_emitted += 1
+            self.on_change(title, first_seen)
+
+    async def run(self):
+        """Poll until cancelled."""
+        # The window in front at startup is the baseline, not a switch
+        first = self.provider.current()
+        if first and first[1].strip():
+            self._settled = (first[0], _COUNTER_RE.sub("", first[1].strip()))
+        while True:
+            self.poll()
+            await asyncio.sleep(self.poll_interval)
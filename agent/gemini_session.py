@@ -5,46 +5,51 @@ Handles mic streaming, screen pulse, response processing, and audio output.
 """
 
 import asyncio
-import io
 import json
-import math
 import os
 import re
 import struct
 import sys
 import time
 
-import mss
 import pyaudio
 import pygetwindow as gw
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="pywinauto")
 import pythoncom
-from PIL import Image
 from google.genai import types
 
 import config as cfg
 from config import (
     MODEL, state, application_path,
-    FORMAT, CHANNELS, SEND_SAMPLE_RATE, RECEIVE_SAMPLE_RATE, CHUNK_SIZE,
+    SEND_SAMPLE_RATE, RECEIVE_SAMPLE_RATE, CHUNK_SIZE,
+    UPLINK_FRAME_MS, UPLINK_MAX_DELAY_MS, BARGE_IN_DUCK_GAIN,
     BROWSER_KEYWORDS, USER_SPEECH_TIMEOUT, CONVERSATION_SILENCE_TIMEOUT,
     CURIOUS_DURATION_THRESHOLD,
-    compute_can_be_closed, compute_delta_s, tweaks,
+    compute_can_be_closed, compute_delta_s, compute_pulse_delay, tweaks,
 )
-from audio import detect_voice_activity  # Only used by other modules; listen_mic uses inline RMS
-from ui import TamaState, update_display, send_anim_to_godot, send_mood_to_godot, broadcast_to_godot
+from audio import make_vad
+from dsp import apply_gain, bitcrush, block_glitch, pcm_array
+from barge_in import BargeInDetector, DUCK, UNDUCK, STOP
+from audio_pipeline import (
+    UplinkFramer, make_input_stage, run_input_stage, run_uplink,
+    AudioQueue, BLOCK, COALESCE,
+)
+from ui import TamaState, VisemeChannel, update_display, send_anim_to_godot, send_mood_to_godot, broadcast_to_godot
 from mood_engine import get_mood_context, track_infraction, track_compliance
 from flash_lite import pre_classify, clear_classification_history, generate_session_summary, infer_task
 from app_control import execute_action as jarvis_execute
+from screen_capture import PULSE_MAX_AGE_MS, capture_all_screens, capture_screen_frame
+from screen_pipeline import ScreenPipeline
+from foreground_watcher import ForegroundWatcher, default_provider
+from lite_scheduler import PRIORITY_PULSE, PRIORITY_STRIKE
 import tama_memory
 
 
-# ─── Screen Capture & Window Cache ──────────────────────────
+# ─── Window Cache ──────────────────────────────────────────
 
-import threading
 _cached_windows = []
 _cached_active_title = ""
-_thread_local = threading.local()  # Thread-local mss instance (GDI contexts are thread-affine on Windows)
 
 
 def refresh_window_cache():
@@ -100,22 +105,6 @@ def get_cached_window_by_title(target_title: str):
     return None
 
 
-def capture_all_screens() -> bytes:
-    """Capture ALL connected monitors, merge them, and output a lightweight JPEG.
-    Uses a fresh mss context manager each time for maximum reliability
-    (GDI Device Contexts can become stale in long-running processes)."""
-    with mss.mss() as sct:
-        monitor = sct.monitors[0]
-        screenshot = sct.grab(monitor)
-        img = Image.frombytes("RGB", screenshot.size, screenshot.rgb)
-
-    img.thumbnail((1024, 1024), Image.Resampling.BILINEAR)
-
-    buffer = io.BytesIO()
-    img.save(buffer, format="JPEG", quality=50)
-    return buffer.getvalue()
-
-
 # ─── System Prompt ──────────────────────────────────────────
 
 SYSTEM_PROMPT_FR = """═══ DIRECTOR'S NOTES (VOICE STYLE) ═══
@@ -790,8 +779,9 @@ async def send_approach_to_godot():
 
 # ─── Main Gemini Live Loop ──────────────────────────────────
 
-async def run_gemini_loop(pya):
-    """The core Gemini Live API loop — handles reconnection, mode switching, and all async tasks."""
+async def run_gemini_loop(pya, devices):
+    """The core Gemini Live API loop — handles reconnection, mode switching, and all async tasks.
+    `devices` (AudioDeviceManager) owns the mic/speaker streams across reconnects."""
 
     # ── VAD config (shared between deep_work and conversation) ──
     # LOW sensitivity = fewer false triggers from clicks/breathing
@@ -815,6 +805,8 @@ async def run_gemini_loop(pya):
     }
 
     _consecutive_failures = 0  # Track rapid failures for backoff
+    # Lip sync to Godot: rate-limited, latest-wins (counters span reconnects)
+    visemes = VisemeChannel()
 
     while True:
         err_str = ""  # Must survive all try/except/finally branches
@@ -825,6 +817,7 @@ async def run_gemini_loop(pya):
         # 🛑 FIX POMODORO: On bloque ici TANT QUE la pause est active !
         # Sans ça, Gemini se reconnecte pendant la pause et pète un câble dans le noir
         while (not state.get("is_session_active", False) or state.get("is_on_break", False)) and not state.get("conversation_requested", False):
+            await devices.close_if_idle()  # Long break / libre mode: release the devices
             await asyncio.sleep(0.3)
 
         if state["conversation_requested"]:
@@ -843,6 +836,7 @@ async def run_gemini_loop(pya):
             update_display(TamaState.CALM, "Hey Tama — Connexion... 🫰")
         elif state["current_mode"] != "deep_work":  # Don't reset mode on reconnection
             state["current_mode"] = "deep_work"
+            state["_pulse_interval"] = 0.0  # Recomputed by the first pulse of this deep_work stint
             update_display(TamaState.CALM, "Connecting to Google WebSocket...")
 
         # Tell Godot we're connecting (before the connection attempt)
@@ -953,8 +947,13 @@ async def run_gemini_loop(pya):
                     except Exception:
                         pass
 
-                audio_out_queue = asyncio.Queue()
-                audio_in_queue = asyncio.Queue(maxsize=50)  # Room for pre-buffer flush (12 chunks) without blocking hardware thread
+                # Tama's voice: nothing of the current sentence is ever dropped. Past ~60s of backlog
+                # receive_responses waits for the speaker; a flush (barge-in) releases it at once
+                audio_out_queue = AudioQueue("out", maxsize=2000, policy=BLOCK, max_bytes=RECEIVE_SAMPLE_RATE * 2 * 60)
+                # Mic uplink: if sending stalls, chunks merge instead of blocking the mic (~10s cap)
+                audio_in_queue = AudioQueue("in", maxsize=50, policy=COALESCE, max_bytes=SEND_SAMPLE_RATE * 2 * 10)
+                # User talking over Tama: cut her voice locally, the server's `interrupted` confirms later
+                barge_in = BargeInDetector()
 
                 # Only reset force_speech during stealth reconnects
                 # During fresh session starts, force_speech was INTENTIONALLY set to True
@@ -1051,267 +1050,216 @@ async def run_gemini_loop(pya):
 
                 # --- 1. Audio Input (Microphone) ---
                 async def listen_mic():
-                    def _resolve_mic_index():
-                        idx = state["selected_mic_index"]
-                        if idx is None:
+                    # Callback-mode capture: PortAudio fills a ring buffer, we await whole chunks.
+                    # The stream belongs to the device manager and stays open across reconnects.
+                    mic = await devices.acquire_mic()
+
+                    # ── Client-side audio gate (config GATE_*) ──
+                    # Only send audio when voice is detected: ~768ms pre-roll so the first syllable
+                    # isn't clipped, ~1.5s post-tail for sentence endings, 3 voice chunks to open.
+                    # The same loop and settings run in replay_mic.py.
+                    stage = make_input_stage(make_vad())
+                    gate = stage.gate
+
+                    async def admit(data) -> bool:
+                        """False = drop this chunk before the VAD/gate (mic muted, break goodbye...)."""
+                        # 🍅 BREAK GOODBYE: Must run BEFORE mic gate! (mic gets disabled during goodbye)
+                        if state.get("_break_goodbye_pending"):
+                            state["_break_goodbye_pending"] = False
+                            dur = state.get("_break_goodbye_duration", 5)
+                            session_min = state.get("_break_goodbye_session_min", 0)
+                            lang = state.get("language", "en")
+                            if lang == "fr":
+                                goodbye_text = (
+                                    f"[SYSTEM] 🍅 PAUSE MAINTENANT. L'utilisateur a travaillé {session_min} minutes. "
+                                    f"Dis-lui au revoir naturellement et préviens-le que tu reviens dans {dur} minutes. "
+                                    f"Sois brève et chaleureuse. UNE seule phrase."
+                                )
+                            else:
+                                goodbye_text = (
+                                    f"[SYSTEM] 🍅 BREAK TIME. The user worked for {session_min} minutes. "
+                                    f"Say goodbye naturally and tell him you'll be back in {dur} minutes. "
+                                    f"Be brief and warm. ONE sentence only."
+                                )
                             try:
-                                idx = pya.get_default_input_device_info()["index"]
+                                state["mic_allowed"] = False
+                                await session.send_realtime_input(text=goodbye_text)
+                                state["_break_goodbye_sent_at"] = time.time()
+                                state["_break_goodbye_started_speaking"] = False
+                                state["force_speech"] = True
+                                print(f"🍅 Goodbye envoyé à Gemini (mic coupé, {dur}min pause)")
                             except Exception:
-                                idx = 0
-                        return idx
+                                state["mic_allowed"] = True
+                                state["is_on_break"] = True
+                            return False
 
-                    def _open_mic_stream(mic_idx):
-                        """Try to open a mic stream, with smart fallback by name."""
-                        try:
-                            s = pya.open(format=FORMAT, channels=CHANNELS, rate=SEND_SAMPLE_RATE,
-                                         input=True, input_device_index=mic_idx, frames_per_buffer=CHUNK_SIZE)
-                            print(f"🎤 Micro actif: index {mic_idx}")
-                            return s, mic_idx
-                        except OSError as e:
-                            print(f"⚠️ Micro index {mic_idx} incompatible ({e})")
-
-                            failed_name = ""
-                            try:
-                                failed_name = pya.get_device_info_by_index(mic_idx)["name"].lower()
-                            except Exception:
-                                pass
-
-                            if failed_name:
-                                match_prefix = failed_name[:15]
-                                for i in range(pya.get_device_count()):
-                                    if i == mic_idx:
-                                        continue
-                                    info = pya.get_device_info_by_index(i)
-                                    if info["maxInputChannels"] <= 0:
-                                        continue
-                                    if match_prefix in info["name"].lower():
-                                        try:
-                                            s = pya.open(format=FORMAT, channels=CHANNELS, rate=SEND_SAMPLE_RATE,
-                                                         input=True, input_device_index=i, frames_per_buffer=CHUNK_SIZE)
-                                            print(f"🎤 Alternative trouvée: [{i}] {info['name']}")
-                                            return s, i
-                                        except OSError:
-                                            continue
+                        # 🍅 BREAK GOODBYE MONITOR: Wait for speech to end, then teleport + kill
+                        if state.get("_break_goodbye_sent_at"):
+                            elapsed = time.time() - state["_break_goodbye_sent_at"]
+                            is_speaking = state.get("_tama_is_speaking", False)
 
-                            try:
-                                s = pya.open(format=FORMAT, channels=CHANNELS, rate=SEND_SAMPLE_RATE,
-                                             input=True, frames_per_buffer=CHUNK_SIZE)
-                                default_idx = pya.get_default_input_device_info()["index"]
-                                print(f"🎤 Fallback micro par défaut: [{default_idx}]")
-                                return s, default_idx
-                            except OSError as e2:
-                                print(f"❌ Aucun micro compatible à 16kHz: {e2}")
-                                raise
+                            if not state.get("_break_goodbye_started_speaking") and is_speaking:
+                                state["_break_goodbye_started_speaking"] = True
+                                print(f"🍅 Tama parle ! (au revoir en cours...)")
 
-                    current_mic = _resolve_mic_index()
-                    stream, current_mic = await asyncio.to_thread(_open_mic_stream, current_mic)
-                    _last_failed_mic = None
-
-                    # ── Client-side audio gate ──
-                    # Only send audio when voice is detected.
-                    # Pre-buffer (ring buffer) captures ~500ms BEFORE voice so the
-                    # first syllable isn't clipped. Post-tail keeps sending ~500ms
-                    # AFTER voice stops to capture sentence endings.
-                    from collections import deque
-                    PRE_BUFFER_CHUNKS = 12   # ~768ms at 16kHz/1024 — captures context before speech
-                    POST_TAIL_CHUNKS = 24    # ~1.5s after silence — keeps stream alive during natural pauses
-                    pre_buffer = deque(maxlen=PRE_BUFFER_CHUNKS)
-                    is_streaming = False
-                    silence_count = 0
-                    voice_streak = 0
+                            speech_done = state.get("_break_goodbye_started_speaking", False) and not is_speaking and elapsed > 1.5
+                            timeout = elapsed > 12.0
 
-                    try:
-                        while True:
-                            wanted_mic = _resolve_mic_index()
-                            if wanted_mic != current_mic and wanted_mic != _last_failed_mic:
-                                print(f"🎤 Hot-swap micro: {current_mic} → {wanted_mic}")
-                                try:
-                                    stream.close()
-                                except Exception:
-                                    pass
-                                stream, actual_mic = await asyncio.to_thread(_open_mic_stream, wanted_mic)
-                                if actual_mic != wanted_mic:
-                                    _last_failed_mic = wanted_mic
-                                else:
-                                    _last_failed_mic = None
-                                current_mic = actual_mic
-
-                            data = await asyncio.to_thread(stream.read, CHUNK_SIZE, exception_on_overflow=False)
-
-                            # 🍅 BREAK GOODBYE: Must run BEFORE mic gate! (mic gets disabled during goodbye)
-                            if state.get("_break_goodbye_pending"):
-                                state["_break_goodbye_pending"] = False
-                                dur = state.get("_break_goodbye_duration", 5)
-                                session_min = state.get("_break_goodbye_session_min", 0)
-                                lang = state.get("language", "en")
-                                if lang == "fr":
-                                    goodbye_text = (
-                                        f"[SYSTEM] 🍅 PAUSE MAINTENANT. L'utilisateur a travaillé {session_min} minutes. "
-                                        f"Dis-lui au revoir naturellement et préviens-le que tu reviens dans {dur} minutes. "
-                                        f"Sois brève et chaleureuse. UNE seule phrase."
-                                    )
+                            if speech_done or timeout:
+                                if timeout:
+                                    print("🍅 Goodbye timeout (12s) — forçage de la déconnexion")
                                 else:
-                                    goodbye_text = (
-                                        f"[SYSTEM] 🍅 BREAK TIME. The user worked for {session_min} minutes. "
-                                        f"Say goodbye naturally and tell him you'll be back in {dur} minutes. "
-                                        f"Be brief and warm. ONE sentence only."
-                                    )
+                                    print(f"🍅 Tama a fini son au revoir ({elapsed:.1f}s) — glitch dissolve !")
                                 try:
-                                    state["mic_allowed"] = False
-                                    await session.send_realtime_input(text=goodbye_text)
-                                    state["_break_goodbye_sent_at"] = time.time()
-                                    state["_break_goodbye_started_speaking"] = False
-                                    state["force_speech"] = True
-                                    print(f"🍅 Goodbye envoyé à Gemini (mic coupé, {dur}min pause)")
+                                    broadcast_to_godot(json.dumps({"command": "BREAK_DEPARTURE"}))
                                 except Exception:
-                                    state["mic_allowed"] = True
-                                    state["is_on_break"] = True
-                                continue
-
-                            # 🍅 BREAK GOODBYE MONITOR: Wait for speech to end, then teleport + kill
-                            if state.get("_break_goodbye_sent_at"):
-                                elapsed = time.time() - state["_break_goodbye_sent_at"]
-                                is_speaking = state.get("_tama_is_speaking", False)
-
-                                if not state.get("_break_goodbye_started_speaking") and is_speaking:
-                                    state["_break_goodbye_started_speaking"] = True
-                                    print(f"🍅 Tama parle ! (au revoir en cours...)")
-
-                                speech_done = state.get("_break_goodbye_started_speaking", False) and not is_speaking and elapsed > 1.5
-                                timeout = elapsed > 12.0
-
-                                if speech_done or timeout:
-                                    if timeout:
-                                        print("🍅 Goodbye timeout (12s) — forçage de la déconnexion")
-                                    else:
-                                        print(f"🍅 Tama a fini son au revoir ({elapsed:.1f}s) — glitch dissolve !")
-                                    try:
-                                        broadcast_to_godot(json.dumps({"command": "BREAK_DEPARTURE"}))
-                                    except Exception:
-                                        pass
-                                    await asyncio.sleep(1.2)
-                                    state.pop("_break_goodbye_sent_at", None)
-                                    state.pop("_break_goodbye_started_speaking", None)
-                                    state["mic_allowed"] = True
-                                    state["is_session_active"] = False
-                                    state["break_reminder_active"] = False
-                                    state["is_on_break"] = True
-                                    state["break_start_time"] = time.time()
-                                    state["current_mode"] = "libre"
-                                    broadcast_to_godot(json.dumps({"command": "BREAK_STARTED"}))
-                                    broadcast_to_godot(json.dumps({"command": "SESSION_COMPLETE"}))
-                                    print("🏁 Pomodoro: Tama a dit au revoir — Gemini va se déconnecter.")
-                                    raise RuntimeError("Pomodoro session stopped")
-                                continue
-
-                            # Gate: if mic is disabled, discard the data (keep stream alive but don't send)
-                            if not state.get("mic_allowed", True):
-                                await asyncio.sleep(0.01)
-                                continue
-
-
-
-                            # 🛑 FIX POMODORO: Déconnexion immédiate si session stoppée OU pause activée
-                            if (not state.get("is_session_active", True) or state.get("is_on_break", False)) and state.get("current_mode") != "conversation":
-                                print("🏁 Pause activée (Pomodoro) — Déconnexion immédiate de Gemini.")
+                                    pass
+                                await asyncio.sleep(1.2)
+                                state.pop("_break_goodbye_sent_at", None)
+                                state.pop("_break_goodbye_started_speaking", None)
+                                state["mic_allowed"] = True
+                                state["is_session_active"] = False
+                                state["break_reminder_active"] = False
+                                state["is_on_break"] = True
+                                state["break_start_time"] = time.time()
+                                state["current_mode"] = "libre"
+                                broadcast_to_godot(json.dumps({"command": "BREAK_STARTED"}))
+                                broadcast_to_godot(json.dumps({"command": "SESSION_COMPLETE"}))
+                                print("🏁 Pomodoro: Tama a dit au revoir — Gemini va se déconnecter.")
                                 raise RuntimeError("Pomodoro session stopped")
+                            return False
+
+                        # Gate: if mic is disabled, discard the data (keep stream alive but don't send)
+                        if not state.get("mic_allowed", True):
+                            await asyncio.sleep(0.01)
+                            return False
+
+                        # 🛑 FIX POMODORO: Déconnexion immédiate si session stoppée OU pause activée
+                        if (not state.get("is_session_active", True) or state.get("is_on_break", False)) and state.get("current_mode") != "conversation":
+                            print("🏁 Pause activée (Pomodoro) — Déconnexion immédiate de Gemini.")
+                            raise RuntimeError("Pomodoro session stopped")
+                        return True
+
+                    def on_chunk(stage):
+                        """Runs after the VAD/gate for every admitted chunk, before its audio is queued."""
+                        # ── Local barge-in: duck Tama on the first voiced chunks, stop her if the
+                        # user keeps talking. One output period instead of a server round trip.
+                        barge_action = barge_in.feed(stage.voice_active,
+                                                     state.get("_tama_is_speaking", False) and devices.speaker_busy)
+                        if barge_action == DUCK:
+                            devices.duck_speaker(BARGE_IN_DUCK_GAIN)
+                        elif barge_action == UNDUCK:
+                            devices.duck_speaker(1.0)
+                        elif barge_action == STOP:
+                            audio_out_queue.flush()
+                            devices.flush_speaker()  # Faded out within one output period
+                            devices.duck_speaker(1.0)
+                            visemes.update("REST")
+                            print("  ⚡ Barge-in local — Tama coupée (confirmation serveur en attente)")
+
+                        if stage.voice_active and gate.is_open:
+                            state["user_spoke_at"] = time.time()
+
+                        if gate.opened:
+                            # Track when user FIRST started speaking this turn
+                            # (not updated on every frame — gives true latency)
+                            if state.get("_user_speech_turn_start") is None:
+                                state["_user_speech_turn_start"] = time.time()
+                                print("  🎙️ User speaking...")
+
+                            # Notify Godot: user is speaking → instant local reaction
+                            if state["current_mode"] in ("conversation", "deep_work"):
+                                _last_ack = state.get("_last_user_speaking_ack", 0)
+                                if time.time() - _last_ack > 3.0:  # 3s cooldown
+                                    state["_last_user_speaking_ack"] = time.time()
+                                    ack_msg = json.dumps({"command": "USER_SPEAKING"})
+                                    broadcast_to_godot(ack_msg)
+
+                        if gate.closed and state.get("_user_speech_turn_start") is not None:
+                            print("  🤔 Gemini is thinking...")
 
-                            # ── Audio sanity check ──
-                            # Virtual/broken mics can produce garbage data that crashes Gemini.
-                            # Detect and skip corrupt chunks before they reach the API.
-                            if len(data) < 64:
-                                continue  # Incomplete chunk
-                            # Ensure even byte count — fragmented reads can have odd length
-                            data = data[:(len(data) // 2) * 2]
-                            n_samples = len(data) // 2
-                            samples = struct.unpack(f'<{n_samples}h', data)
-                            rms = math.sqrt(sum(s * s for s in samples) / n_samples)
-                            if rms > 30000:
-                                # Extreme clipping / garbage — skip this chunk
-                                continue
-                            if all(s == samples[0] for s in samples[:64]):
-                                # All identical values (stuck/dead device) — skip
-                                continue
-
-                            # Reuse RMS already computed above — no need to call detect_voice_activity()
-                            # which would re-unpack and re-compute the same math on the same data
-                            voice_active = rms > 1200.0
-                            blob = types.Blob(data=data, mime_type="audio/pcm;rate=16000")
-
-                            if voice_active:
-                                voice_streak += 1
-                                
-                                # Require 3 consecutive chunks (~192ms) of voice to start streaming,
-                                # OR if we are already streaming, keep streaming.
-                                if is_streaming or voice_streak >= 3:
-                                    state["user_spoke_at"] = time.time()
-                                    silence_count = 0
-
-                                    if not is_streaming:
-                                        # Voice just started → flush pre-buffer first
-                                        is_streaming = True
-                                        # Track when user FIRST started speaking this turn
-                                        # (not updated on every frame — gives true latency)
-                                        if state.get("_user_speech_turn_start") is None:
-                                            state["_user_speech_turn_start"] = time.time()
-                                            print("  🎙️ User speaking...")
-                                        for buffered in pre_buffer:
-                                            await audio_in_queue.put(buffered)
-                                        pre_buffer.clear()
-
-                                        # Notify Godot: user is speaking → instant local reaction
-                                        if state["current_mode"] in ("conversation", "deep_work"):
-                                            _last_ack = state.get("_last_user_speaking_ack", 0)
-                                            if time.time() - _last_ack > 3.0:  # 3s cooldown
-                                                state["_last_user_speaking_ack"] = time.time()
-                                                ack_msg = json.dumps({"command": "USER_SPEAKING"})
-                                                broadcast_to_godot(ack_msg)
-
-                                    await audio_in_queue.put(blob)
-                                else:
-                                    # Still building streak, just buffer
-                                    pre_buffer.append(blob)
-                            else:
-                                voice_streak = 0  # Reset streak on any silence
-                                if is_streaming:
-                                    # Post-tail: keep sending briefly after voice stops
-                                    silence_count += 1
-                                    await audio_in_queue.put(blob)
-                                    if silence_count >= POST_TAIL_CHUNKS:
-                                        is_streaming = False
-                                        silence_count = 0
-                                        if state.get("_user_speech_turn_start") is not None:
-                                            print("  🤔 Gemini is thinking...")
-                                else:
-                                    # Silent — just buffer, don't send
-                                    pre_buffer.append(blob)
+                    try:
+                        # Sanity checks → VAD (config.VAD_ENGINE) → gate. A bytes payload is only
+                        # built for audio that is actually sent (silence stays in the pre-roll)
+                        await run_input_stage(mic, stage, audio_in_queue, before_read=devices.check_mic_swap,
+                                              admit=admit, on_chunk=on_chunk)
                     except asyncio.CancelledError:
-                        try:
-                            stream.stop_stream()  # Unblock C callback before close to prevent segfault
-                            stream.close()
-                        except Exception:
-                            pass
+                        pass
+                    finally:
+                        devices.release_mic()  # Any exit (cancel, Pomodoro stop...): stop delivering, keep the stream
 
                 async def send_audio():
-                    while True:
-                        blob = await audio_in_queue.get()
+                    def _drop_chunk():
                         # ── Stability fix: don't send audio while Gemini is processing tools ──
                         # Concurrent audio + tool_response is the #1 trigger for 1011 crashes
-                        if state.get("_api_processing_tool", False):
-                            continue  # Drop this chunk silently — tool processing takes priority
                         # ── Mute mic during onboarding to prevent barge-in ──
                         # Keep mic silent during the ENTIRE onboarding flow:
                         # greeting, dialog, explanation — until ONBOARDING_DONE clears _onboarding_active
-                        if state.get("_onboarding_active"):
-                            continue  # Drop all audio chunks during onboarding
+                        return state.get("_api_processing_tool", False) or bool(state.get("_onboarding_active"))
+
+                    async def _send_frame(frame):
                         try:
-                            await session.send_realtime_input(audio=blob)
-                            state["_api_audio_chunks_sent"] += 1
+                            t_send = time.perf_counter()
+                            await session.send_realtime_input(audio=types.Blob(data=frame, mime_type="audio/pcm;rate=16000"))
                         except Exception:
                             print("⚠️  Audio stream interrompu (session fermée)")
-                            break
+                            return False
+                        send_ms = (time.perf_counter() - t_send) * 1000
+                        state["_api_audio_chunks_sent"] += 1
+                        state["_uplink_bytes_sent"] += len(frame)
+                        state["_uplink_hold_ms"] = round(framer.avg_hold_ms, 1)
+                        state["_uplink_send_ms"] = round(state["_uplink_send_ms"] + 0.1 * (send_ms - state["_uplink_send_ms"]), 2)
+                        return True
+
+                    # Gated chunks are aggregated into ~192ms frames: ~5 messages/s instead of ~16
+                    framer = UplinkFramer(SEND_SAMPLE_RATE * 2 * UPLINK_FRAME_MS // 1000, UPLINK_MAX_DELAY_MS / 1000)
+                    await run_uplink(audio_in_queue, framer, _send_frame, should_drop=_drop_chunk)
 
                 # --- 2. Screen Pulse / Conversation Loop ---
+                def current_pulse_delay():
+                    """Adaptive scan interval set by the pulse loop (compute_pulse_delay).
+                    Too fast = 1011 crash spiral (API can't handle text+screenshot every 3s).
+                    Too slow = Tama misses context changes.
+                    S>=9 always gets the fast lane, even before the pulse loop re-evaluates."""
+                    if state["current_suspicion_index"] >= 9:
+                        return 5.0 * tweaks["pulse_delay_mult"]
+                    return state.get("_pulse_interval") or 15.0 * tweaks["pulse_delay_mult"]
+
+                def scan_windows():
+                    refresh_window_cache()
+                    return get_cached_active_title(), [w.title for w in get_cached_windows()]
+
+                async def classify_snapshot(snap):
+                    # The frame signature lets Flash-Lite reuse the last verdict on a static screen
+                    # S>=9: this verdict confirms a strike → jumps the Flash-Lite budget queue
+                    priority = PRIORITY_STRIKE if state["current_suspicion_index"] >= 9 else PRIORITY_PULSE
+                    return await pre_classify(snap["jpeg"], snap["active_title"], snap["open_windows"],
+                                              state.get("current_task"), frame_signature=snap["signature"],
+                                              priority=priority)
+
+                def screen_paused():
+                    return (state["current_mode"] != "deep_work"
+                            or state.get("is_on_break", False)
+                            or not state.get("screen_share_allowed", True))
+
+                # Capture N+1 overlaps classification of N — the pulse just picks up the newest verdict
+                screen_pipeline = ScreenPipeline(
+                    scan_windows, lambda: capture_screen_frame(PULSE_MAX_AGE_MS), classify_snapshot,
+                    interval=current_pulse_delay, is_paused=screen_paused,
+                )
+
+                def on_foreground_change(title, changed_at):
+                    """Window/tab switch → look now, and time the new window from the real switch."""
+                    state["_foreground_switch"] = (title, changed_at)
+                    state["last_active_window_title"] = title
+                    state["active_window_start_time"] = changed_at
+                    if not screen_paused():
+                        print(f"  👀 Foreground → '{title[:50]}' — scanning now")
+                        screen_pipeline.rescan()
+
+                _fg_provider = default_provider()
+                foreground_watcher = ForegroundWatcher(_fg_provider, on_foreground_change) if _fg_provider else None
+
                 async def send_screen_pulse():
                     """In deep_work: screenshot + analysis. In conversation: lightweight chat context."""
                     if state["current_mode"] == "conversation":
@@ -1639,9 +1587,19 @@ async def run_gemini_loop(pya):
                             await asyncio.sleep(5.0)
                             continue
 
-                        await asyncio.to_thread(refresh_window_cache)
-                        active_title = get_cached_active_title()
-                        open_win_titles = [w.title for w in get_cached_windows()]
+                        # ── Newest capture + Flash-Lite verdict from the pipeline ──
+                        # The interval runs from capture start and classify comes on top, so wait for both.
+                        # None = nothing new (paused, capture failing): no pulse without a fresh result,
+                        # or stale titles would cost an extra Live API message and count trends twice
+                        snap = await screen_pipeline.next_result(
+                            timeout=current_pulse_delay() + screen_pipeline.classify_timeout)
+                        if snap is None:
+                            continue
+                        active_title = snap["active_title"]
+                        open_win_titles = snap["open_windows"]
+                        lite_result = snap["lite_result"]
+                        state["_pipeline_latency"] = round(snap["latency"], 2)
+                        state["_pipeline_frames_dropped"] = screen_pipeline.frames_dropped
 
                         # ── Envoyer la carte du bureau à Godot (perchoir + strike targeting) ──
                         try:
@@ -1666,53 +1624,40 @@ async def run_gemini_loop(pya):
                         except Exception as e:
                             print(f"  ⚠️ Desktop Map pulse error: {e}")
 
-                        # ── Flash-Lite: capture + classify via standard API ──
-                        lite_result = None
                         eyes_description = ""
-                        try:
-                            jpeg_bytes = await asyncio.to_thread(capture_all_screens)
-                            lite_result = await asyncio.wait_for(
-                                pre_classify(jpeg_bytes, active_title, open_win_titles, state.get("current_task")),
-                                timeout=8.0
-                            )
-
-                            # ── Task inference: ~2 min into session, guess the task ──
-                            # DESACTIVE TEMPORAIREMENT : Évite que Tama ne répète la tâche de manière obsessionnelle.
-                            # session_elapsed = time.time() - (state.get("session_start_time") or time.time())
-                            # if (
-                            #     not state.get("_task_inference_done")
-                            #     and session_elapsed >= 120
-                            #     and state.get("current_task") == "travail"
-                            # ):
-                            #     state["_task_inference_done"] = True
-                            #     try:
-                            #         inferred = await asyncio.wait_for(
-                            #             infer_task(jpeg_bytes, active_title, open_win_titles),
-                            #             timeout=8.0
-                            #         )
-                            #         if inferred and inferred.lower() != "travail":
-                            #             state["current_task"] = inferred
-                            #             print(f"  🎯 Task auto-inferred: '{inferred}'")
-                            #             # Tell Gemini so she can briefly acknowledge
-                            #             try:
-                            #                 if state.get("language") == "en":
-                            #                     await session.send_realtime_input(
-                            #                         text=f"[SYSTEM] Task auto-detected: '{inferred}'. Briefly acknowledge (1 short sentence max, casual)."
-                            #                     )
-                            #                 else:
-                            #                     await session.send_realtime_input(
-                            #                         text=f"[SYSTEM] Tâche détectée automatiquement : '{inferred}'. Confirme brièvement (1 courte phrase max, casual)."
-                            #                     )
-                            #             except Exception:
-                            #                 pass
-                            #     except asyncio.TimeoutError:
-                            #         print("  ⚠️ Task inference timeout")
-                            #     except Exception as e:
-                            #         print(f"  ⚠️ Task inference error: {e}")
-                        except asyncio.TimeoutError:
-                            print("  ⚠️ Flash-Lite timeout (>8s) — using cached state.")
-                        except Exception as e:
-                            print(f"  ⚠️ Flash-Lite error: {e}")
+                        # ── Task inference: ~2 min into session, guess the task ──
+                        # DESACTIVE TEMPORAIREMENT : Évite que Tama ne répète la tâche de manière obsessionnelle.
+                        # session_elapsed = time.time() - (state.get("session_start_time") or time.time())
+                        # if (
+                        #     not state.get("_task_inference_done")
+                        #     and session_elapsed >= 120
+                        #     and state.get("current_task") == "travail"
+                        # ):
+                        #     state["_task_inference_done"] = True
+                        #     try:
+                        #         inferred = await asyncio.wait_for(
+                        #             infer_task(snap["jpeg"], active_title, open_win_titles),
+                        #             timeout=8.0
+                        #         )
+                        #         if inferred and inferred.lower() != "travail":
+                        #             state["current_task"] = inferred
+                        #             print(f"  🎯 Task auto-inferred: '{inferred}'")
+                        #             # Tell Gemini so she can briefly acknowledge
+                        #             try:
+                        #                 if state.get("language") == "en":
+                        #                     await session.send_realtime_input(
+                        #                         text=f"[SYSTEM] Task auto-detected: '{inferred}'. Briefly acknowledge (1 short sentence max, casual)."
+                        #                     )
+                        #                 else:
+                        #                     await session.send_realtime_input(
+                        #                         text=f"[SYSTEM] Tâche détectée automatiquement : '{inferred}'. Confirme brièvement (1 courte phrase max, casual)."
+                        #                     )
+                        #             except Exception:
+                        #                 pass
+                        #     except asyncio.TimeoutError:
+                        #         print("  ⚠️ Task inference timeout")
+                        #     except Exception as e:
+                        #         print(f"  ⚠️ Task inference error: {e}")
 
                         # ── Apply classification to state (moved from classify_screen handler) ──
                         if lite_result:
@@ -1801,7 +1746,12 @@ async def run_gemini_loop(pya):
 
                         if active_title != state["last_active_window_title"]:
                             state["last_active_window_title"] = active_title
-                            state["active_window_start_time"] = time.time()
+                            # Prefer the foreground watcher's switch time, then the capture time
+                            switch = state.get("_foreground_switch")
+                            if switch and switch[0] == active_title:
+                                state["active_window_start_time"] = switch[1]
+                            else:
+                                state["active_window_start_time"] = snap["captured_at"] if snap else time.time()
 
                         active_duration = int(time.time() - state["active_window_start_time"])
 
@@ -1991,7 +1941,7 @@ async def run_gemini_loop(pya):
                             _gate_blocked_reason = "user_speaking (no text pulse during voice)"
                         elif tama_state != TamaState.CALM:
                             _gate_blocked_reason = f"tama_state={tama_state}"
-                        elif not audio_out_queue.empty():
+                        elif not audio_out_queue.empty() or devices.speaker_busy:
                             _gate_blocked_reason = "audio_queue_not_empty"
                         elif not speech_cooldown_ok:
                             _gate_blocked_reason = f"cooldown ({_secs_since_speech:.1f}s < 4s)"
@@ -2091,19 +2041,17 @@ async def run_gemini_loop(pya):
                             if int(si) >= 3:  # Only log when suspicion is notable
                                 print(f"  🚫 Pulse BLOCKED | S:{int(si)} | reason: {_gate_blocked_reason}")
 
-                        # Pulse intervals — balanced for API stability
-                        # Too fast = 1011 crash spiral (API can't handle text+screenshot every 3s)
-                        # Too slow = Tama misses context changes
-                        if state["current_suspicion_index"] <= 0:
-                            pulse_delay = 15.0   # Idle: user is aligned, no rush
-                        elif state["current_suspicion_index"] <= 5:
-                            pulse_delay = 10.0   # Medium: watching, occasional check
-                        elif state["current_suspicion_index"] <= 8:
-                            pulse_delay = 8.0    # High: attentive but not spamming
-                        else:
-                            pulse_delay = 5.0    # Critical (S>=9): fast enough for STRIKE escalation
-
-                        await asyncio.sleep(pulse_delay * tweaks["pulse_delay_mult"])
+                        # ── Next scan interval: stable focus stretches to 60s, trouble tightens to 5s ──
+                        # No sleep here: next_result() paces the loop on the pipeline's cadence
+                        strike_pending = bool(state["suspicion_at_9_start"] or state.get("_pending_strike")
+                                              or state.get("_strike_in_progress"))
+                        new_interval = compute_pulse_delay(
+                            state["current_suspicion_index"], s_trend, shifts_10min, focus_streak_min,
+                            state.get("_confidence", 1.0), strike_pending,
+                        ) * tweaks["pulse_delay_mult"]
+                        if abs(new_interval - state.get("_pulse_interval", 0.0)) >= 5.0:
+                            print(f"  ⏱️ Scan interval → {new_interval:.0f}s")
+                        state["_pulse_interval"] = new_interval
 
                 # --- 3. Receive AI Responses ---
                 async def reset_calm_after_delay():
@@ -2127,21 +2075,20 @@ async def run_gemini_loop(pya):
                                     if deferred_tool_responses:
                                         print(f"  ⚡ Purging {len(deferred_tool_responses)} deferred tool response(s) (turn cancelled)")
                                         deferred_tool_responses.clear()
+                                    _local_lead = barge_in.on_server_interrupted()
                                     if is_speaking:
                                         print("  ⚡ Interrupted — user barged in")
+                                        if _local_lead is not None:
+                                            print(f"  ⚡ (voix déjà coupée localement {_local_lead:.0f}ms plus tôt)")
                                         state["_last_speech_ended"] = time.time()
                                         # Reset mouth to neutral (prevent viseme stuck on last shape)
-                                        rest_msg = json.dumps({"command": "VISEME", "shape": "REST"})
-                                        broadcast_to_godot(rest_msg)
+                                        visemes.update("REST")
                                         # Return to idle_wall if calm and not chatting
                                         si = state["current_suspicion_index"]
                                         if si < 3 and state["current_mode"] != "conversation":
                                             send_anim_to_godot("Idle_wall", False)
-                                    while not audio_out_queue.empty():
-                                        try:
-                                            audio_out_queue.get_nowait()
-                                        except asyncio.QueueEmpty:
-                                            break
+                                    audio_out_queue.flush()
+                                    devices.flush_speaker()  # Silent within one output period
                                     is_speaking = False
                                     state["_tama_is_speaking"] = False
                                     state["_mood_anim_set"] = False
@@ -2181,6 +2128,8 @@ async def run_gemini_loop(pya):
                                 if server and server.model_turn:
                                     for part in server.model_turn.parts:
                                         if part.inline_data and isinstance(part.inline_data.data, bytes):
+                                            if barge_in.drop_output():
+                                                continue  # Turn cut locally — drop it until the server agrees
                                             if not is_speaking:
                                                 # Fix 8: Measure response latency (from first word, not last)
                                                 turn_start = state.get("_user_speech_turn_start")
@@ -2216,11 +2165,12 @@ async def run_gemini_loop(pya):
                                                     send_anim_to_godot("Idle_wall_Talk", False)
 
                                             if is_speaking:
-                                                audio_out_queue.put_nowait(part.inline_data.data)
+                                                await audio_out_queue.put(part.inline_data.data)
                                                 state["_api_audio_chunks_recv"] += 1
 
                                 if server and server.turn_complete:
                                     state["_user_speech_turn_start"] = None  # 🛡️ FIX : Reset du chrono voix
+                                    barge_in.on_turn_complete()
                                     _was_speaking = is_speaking  # Capture before resetting
                                     if is_speaking:
                                         state["_last_speech_ended"] = time.time()
@@ -2230,8 +2180,7 @@ async def run_gemini_loop(pya):
                                         if si < 3 and state["current_mode"] != "conversation":
                                             send_anim_to_godot("Idle_wall", False)
                                         # Reset mouth to neutral
-                                        rest_msg = json.dumps({"command": "VISEME", "shape": "REST"})
-                                        broadcast_to_godot(rest_msg)
+                                        visemes.update("REST")
                                     is_speaking = False
                                     state["_tama_is_speaking"] = False
                                     state["_mood_anim_set"] = False
@@ -2303,7 +2252,8 @@ async def run_gemini_loop(pya):
                                                         # Force Tama to stare at the screen intensely
                                                         gaze_msg = json.dumps({"command": "GAZE_AT", "target": "screen_center", "speed": 6.0})
                                                         broadcast_to_godot(gaze_msg)
-                                                        look_jpeg = await asyncio.to_thread(capture_all_screens)
+                                                        # Shared frame store: reuse a capture from the last second if there is one
+                                                        look_jpeg = await asyncio.to_thread(capture_all_screens, 1000)
                                                         look_blob = types.Blob(data=look_jpeg, mime_type="image/jpeg")
                                                         await session.send_realtime_input(media=look_blob)
                                                         state["_last_look_at_screen"] = time.time()
@@ -2512,8 +2462,8 @@ async def run_gemini_loop(pya):
                                         state["_api_processing_tool"] = False
 
                                 if server and server.interrupted:
-                                    while not audio_out_queue.empty():
-                                        audio_out_queue.get_nowait()
+                                    audio_out_queue.flush()
+                                    devices.flush_speaker()
 
                                 # ── Feature 7: capture session resume handle ──
                                 if hasattr(response, 'session_resumption_update') and response.session_resumption_update:
@@ -2540,11 +2490,10 @@ async def run_gemini_loop(pya):
                 # --- 4. Audio Output (Speakers) ---
                 async def play_audio():
                     try:
-                        from viseme import detect_viseme
+                        from viseme import VisemeTimeline
                     except ImportError as _imp_err:
                         print(f"⚠️ Viseme disabled: {_imp_err}")
-                        detect_viseme = None
-                    speaker = None  # Init before try block so finally can check
+                        VisemeTimeline = None
                     # ── Kawaii pitch via sample rate ──
                     # Playing at a higher rate raises pitch with ZERO quality loss
                     # (no DSP, no resampling — just faster playback)
@@ -2552,87 +2501,77 @@ async def run_gemini_loop(pya):
                     _playback_rate = int(RECEIVE_SAMPLE_RATE * _pitch)
                     if abs(_pitch - 1.0) > 0.01:
                         print(f"  🎀 Voice pitch: {_pitch:.2f}x → playback at {_playback_rate} Hz (source: {RECEIVE_SAMPLE_RATE} Hz)")
-                    speaker = await asyncio.to_thread(
-                        pya.open, format=FORMAT, channels=CHANNELS, rate=_playback_rate, output=True,
-                    )
-                    last_viseme = "REST"
-                    last_amp = 0.0
+                    # Callback-mode output fed from a jitter buffer (no thread hop per chunk).
+                    # Reused from the previous connection unless the pitch (rate) changed.
+                    jitter = await devices.acquire_speaker(_playback_rate)
+
+                    # ── Lip sync on the playback clock ──
+                    # 20ms viseme frames stamped with the sample they play at, broadcast when
+                    # the speaker's played-samples clock gets there (not one buffer early)
+                    timeline = VisemeTimeline(RECEIVE_SAMPLE_RATE) if VisemeTimeline else None
+                    viseme_ready = asyncio.Event()
+
+                    async def send_visemes():
+                        while True:
+                            for shape, amp in timeline.due(jitter.samples_played(), jitter.generation):
+                                visemes.update(shape, amp)  # Channel coalesces to VISEME_SEND_HZ
+                            nxt = timeline.next_position()
+                            if nxt is None:
+                                viseme_ready.clear()
+                                await viseme_ready.wait()
+                            else:
+                                ahead = (nxt - jitter.samples_played()) / jitter.sample_rate
+                                await asyncio.sleep(min(0.05, max(0.005, ahead)))
+
+                    viseme_task = asyncio.create_task(send_visemes()) if timeline else None
+                    timeline_gen = jitter.generation
+                    last_vol = 1.0
                     try:
                         while True:
                             audio_data = await audio_out_queue.get()
 
-                            # Viseme detection — analyze RAW audio BEFORE volume scaling
+                            # Viseme analysis — RAW audio BEFORE volume scaling
                             # so lip-sync amplitude isn't affected by user's volume setting
-                            if detect_viseme is not None:
-                                viseme, amplitude = detect_viseme(audio_data)
-                                # Send if viseme changed OR amplitude shifted significantly
-                                amp_delta = abs(amplitude - last_amp)
-                                if viseme != last_viseme or amp_delta > 0.15:
-                                    viseme_msg = json.dumps({"command": "VISEME", "shape": viseme, "amp": round(float(amplitude), 2)})
-                                    broadcast_to_godot(viseme_msg)
-                                    last_viseme = viseme
-                                    last_amp = amplitude
+                            if timeline is not None:
+                                if timeline_gen != jitter.generation:
+                                    timeline.clear()  # Barge-in flushed the audio it was tracking
+                                    timeline_gen = jitter.generation
+                                if timeline.feed(audio_data, jitter.queued_position(), jitter.generation):
+                                    viseme_ready.set()
 
                             # Apply Tama volume scaling
+                            # Muted = silence at the same pace, so the mouth still follows the speech
                             vol = state.get("tama_volume", 1.0)
                             if vol < 0.01:
-                                # Muted — skip playback entirely (viseme already sent above)
-                                continue
-                            elif vol < 0.99:
-                                # Scale PCM 16-bit samples
-                                import struct
-                                # Ensure even byte count — network packets may arrive fragmented
-                                audio_data = audio_data[:(len(audio_data) // 2) * 2]
-                                n_samples = len(audio_data) // 2
-                                samples = struct.unpack(f"<{n_samples}h", audio_data)
-                                scaled = struct.pack(f"<{n_samples}h", *(
-                                    max(-32768, min(32767, int(s * vol))) for s in samples
-                                ))
-                                audio_data = scaled
-
-                            # ── Voice Glitch DSP ──
-                            # When API is disconnecting, distort Tama's voice
-                            # (bitcrushing + random stutter/silence on the actual audio)
-                            if not state.get("gemini_connected", True):
-                                import struct as _st
-                                import random as _rnd
-                                n = len(audio_data) // 2
-                                if n > 0:
-                                    samples = list(_st.unpack(f"<{n}h", audio_data))
-                                    # Bitcrush: reduce bit depth (shift right then left)
-                                    shift = 4  # Aggressive: 16-bit → ~12-bit effective
-                                    for i in range(n):
-                                        samples[i] = (samples[i] >> shift) << shift
-                                    # Random chunk stutter/silence (process in blocks of 64 samples)
-                                    block_size = 64
-                                    for blk_start in range(0, n, block_size):
-                                        blk_end = min(blk_start + block_size, n)
-                                        roll = _rnd.random()
-                                        if roll < 0.2:
-                                            # Silence this block
-                                            for i in range(blk_start, blk_end):
-                                                samples[i] = 0
-                                        elif roll < 0.35:
-                                            # Repeat first sample (stutter)
-                                            val = samples[blk_start]
-                                            for i in range(blk_start, blk_end):
-                                                samples[i] = val
-                                    audio_data = _st.pack(f"<{n}h", *samples)
+                                vol = 0.0
+                            glitch = not state.get("gemini_connected", True)
+                            if vol < 0.99 or last_vol < 0.99 or glitch:
+                                # NumPy DSP (dsp.py) — odd trailing byte from fragmented packets is dropped
+                                samples = pcm_array(audio_data)
+                                if vol < 0.99 or last_vol < 0.99:
+                                    # Ramp from the previous volume: no click when the slider moves
+                                    samples = apply_gain(samples, min(vol, 1.0), start_gain=min(last_vol, 1.0))
+
+                                # ── Voice Glitch DSP ──
+                                # When API is disconnecting, distort Tama's voice
+                                # (bitcrushing 16-bit → ~12-bit + random 64-sample stutter/silence)
+                                if glitch:
+                                    samples = block_glitch(bitcrush(samples, shift=4), block=64,
+                                                           silence_p=0.2, stutter_p=0.15)
+                                audio_data = samples.tobytes()
+                            last_vol = vol
 
                             try:
-                                await asyncio.to_thread(speaker.write, audio_data)
+                                await devices.play(audio_data)
                                 state["_last_audio_play_time"] = time.time()
                             except OSError:
                                 break
                     except asyncio.CancelledError:
                         pass
                     finally:
-                        if speaker:
-                            try:
-                                speaker.stop_stream()  # Unblock C callback before close
-                                speaker.close()
-                            except Exception:
-                                pass
+                        if viseme_task:
+                            viseme_task.cancel()
+                        devices.release_speaker()
 
                 # --- 5. Watchdog: detect silent API hangs ---
                 async def watchdog():
@@ -2648,6 +2587,12 @@ async def run_gemini_loop(pya):
                     while True:
                         await asyncio.sleep(3.0)
 
+                        # Adaptive pulses can be up to 60s apart in stable focus: wait for
+                        # the next pulse before nudging, but still early enough for the
+                        # nudge to get an answer within the (fixed) hard timeout
+                        _pulse_gap = state.get("_pulse_interval", 0.0) if state["current_mode"] == "deep_work" else 0.0
+                        _nudge_at = min(max(NUDGE_AT, _pulse_gap + 5.0), HARD_TIMEOUT - DEAD_AFTER_NUDGE)
+
                         # ── Force reconnect from debug tweaks ──
                         if state.get("_force_reconnect", False):
                             state["_force_reconnect"] = False
@@ -2672,7 +2617,7 @@ async def run_gemini_loop(pya):
                         # Phase 1 (waiting for greeting): nudge is USEFUL to wake up slow cold-starts
                         # Phase 2 (after YES click): nudge is DANGEROUS (causes barge-in)
                         _skip_nudge = state.get("_onboarding_active") and state.get("_onboarding_answered")
-                        if silence > NUDGE_AT and _nudge_sent_at < last_hb and not _skip_nudge:
+                        if silence > _nudge_at and _nudge_sent_at < last_hb and not _skip_nudge:
                             # Lightweight probe: send_realtime_input does NOT force a new
                             # conversational turn (unlike send_client_content which interrupts
                             # the AI and triggers deferred tool response desync -> 1011).
@@ -2714,8 +2659,12 @@ async def run_gemini_loop(pya):
                     tg.create_task(safe_task("Mic", listen_mic()))
                     tg.create_task(safe_task("SendAudio", send_audio()))
                     tg.create_task(safe_task("PulseScreen", send_screen_pulse()))
+                    tg.create_task(safe_task("ScreenPipeline", screen_pipeline.run()))
+                    if foreground_watcher:
+                        tg.create_task(safe_task("ForegroundWatcher", foreground_watcher.run()))
                     tg.create_task(safe_task("Receive", receive_responses()))
                     tg.create_task(safe_task("Speakers", play_audio()))
+                    tg.create_task(safe_task("Visemes", visemes.run()))
                     tg.create_task(safe_task("Watchdog", watchdog()))
 
         except asyncio.CancelledError:
@@ -2860,9 +2809,11 @@ async def run_gemini_loop(pya):
                         await asyncio.to_thread(refresh_window_cache)
                         active_title = get_cached_active_title()
                         open_win_titles = [w.title for w in get_cached_windows()]
-                        jpeg_bytes = await asyncio.to_thread(capture_all_screens)
+                        jpeg_bytes, frame_sig = await asyncio.to_thread(capture_screen_frame, 500)
                         lite_result = await asyncio.wait_for(
-                            pre_classify(jpeg_bytes, active_title, open_win_titles, state.get("current_task")),
+                            pre_classify(jpeg_bytes, active_title, open_win_titles, state.get("current_task"),
+                                         frame_signature=frame_sig,
+                                         priority=PRIORITY_STRIKE if state["current_suspicion_index"] >= 9 else PRIORITY_PULSE),
                             timeout=8.0
                         )
                         if lite_result:
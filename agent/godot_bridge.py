@@ -21,7 +21,10 @@ from config import application_path, state, tweaks, BREAK_CHECKPOINTS, BREAK_DUR
 from audio import get_available_mics, refresh_mic_cache, select_mic, resolve_default_mic
 from ui import TamaState, start_session, quit_app, update_display, broadcast_to_godot
 from flash_lite import get_lite_stats, clear_classification_history, generate_session_summary
+from lite_scheduler import scheduler as lite_scheduler
+from screen_capture import frame_store
 import tama_memory
+import title_model
 
 
 # ─── Click-Through Toggle ───────────────────────────────────
@@ -182,12 +185,40 @@ def _get_api_usage_stats() -> dict:
         "function_calls": state["_api_function_calls"],
         "audio_sent": state["_api_audio_chunks_sent"],
         "audio_recv": state["_api_audio_chunks_recv"],
+        "mic_overflows": state["_mic_overflows"],
+        "mic_underruns": state["_mic_underruns"],
+        "uplink_bytes": state["_uplink_bytes_sent"],
+        "uplink_hold_ms": state["_uplink_hold_ms"],
+        "uplink_send_ms": state["_uplink_send_ms"],
+        "audio_queues": state["_audio_queues"],
+        "speaker_underruns": state["_speaker_underruns"],
+        "speaker_overruns": state["_speaker_overruns"],
+        "speaker_buffer_ms": state["_speaker_buffer_ms"],
+        "barge_in_local": state["_barge_in_local"],
+        "barge_in_confirmed": state["_barge_in_confirmed"],
+        "barge_in_false": state["_barge_in_false"],
+        "barge_in_lead_ms": state["_barge_in_lead_ms"],
+        "viseme_sent": state["_viseme_sent"],
+        "viseme_merged": state["_viseme_merged"],
+        "audio_device_opens": state["_audio_device_opens"],
+        "audio_device_reuses": state["_audio_device_reuses"],
+        "audio_device_open_ms": state["_audio_device_open_ms"],
         "connect_secs": int(total_secs),
         # Flash-Lite (3.1) secondary agent stats
         "lite_calls": lite["lite_calls"],
         "lite_input_tokens": lite["lite_input_tokens"],
         "lite_output_tokens": lite["lite_output_tokens"],
         "lite_errors": lite["lite_errors"],
+        "lite_frames_skipped": lite["lite_frames_skipped"],
+        "lite_local_hits": lite["lite_local_hits"],
+        "lite_model_hits": lite["lite_model_hits"],
+        "lite_model_checks": lite["lite_model_checks"],
+        "lite_model_mismatches": lite["lite_model_mismatches"],
+        "lite_cache_hits": lite["lite_cache_hits"],
+        "lite_cache_misses": lite["lite_cache_misses"],
+        "pipeline_latency": state["_pipeline_latency"],
+        "frame_captures": frame_store.captures,
+        "frame_reuses": frame_store.reuses,
     }
 
 
@@ -214,6 +245,7 @@ def _build_settings_data(mics: list) -> dict:
         "tama_volume": state["tama_volume"],
         "session_duration": state.get("session_duration_minutes", 50),
         "api_usage": _get_api_usage_stats(),
+        "lite_budget": lite_scheduler.get_stats(),
         "screen_share_allowed": state["screen_share_allowed"],
         "mic_allowed": state["mic_allowed"],
         "tama_scale": state["tama_scale"],
@@ -515,6 +547,7 @@ async def ws_handler(websocket):
                     print(f"🆕 ONBOARDING_RESPONSE: {answer}")
                 elif cmd == "RESET_MEMORY":
                     tama_memory.reset_memory()
+                    title_model.reset_model()
                     # Clear any leftover onboarding state flags
                     for key in list(state.keys()):
                         if key.startswith("_onboarding"):
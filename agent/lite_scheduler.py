@@ -0,0 +1,163 @@
+"""
+FocusPals — Flash-Lite Budget Scheduler
+Every Flash-Lite generate_content call goes through here: token buckets on
+requests/min and input tokens/min, priority classes, and coalescing of
+duplicate requests still waiting for budget. Spend per user-hour stays
+predictable even when the spare tire and the pulse both want the API.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+from config import state, LITE_BUDGET_RPM, LITE_BUDGET_TPM, LITE_BUDGET_BURST
+
+# ─── Priority classes (higher = served first) ───────────────
+PRIORITY_SUMMARY = 0     # Session summary, task inference — can wait
+PRIORITY_PULSE = 1       # Background screen classification
+PRIORITY_STRIKE = 2      # S>=9: the verdict decides whether a tab gets closed
+
+# Max time a request may wait for budget before it is dropped (caller gets None)
+MAX_WAIT = {
+    PRIORITY_SUMMARY: 60.0,
+    PRIORITY_PULSE: 4.0,     # A stale pulse is useless — the next capture is coming
+    PRIORITY_STRIKE: 8.0,
+}
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` burst, refilled continuously at `rate` per second.
+    The level may go negative when a request turns out bigger than estimated (debt)."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self._stamp = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def available(self) -> float:
+        self._refill()
+        return self.level
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # Oversized requests only need a full bucket
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+
+class LiteScheduler:
+    """Admission control for Flash-Lite calls (single event loop, no worker task).
+    Waiters are served strictly by (priority, arrival); only the head may take budget."""
+
+    def __init__(self, rpm: float, tpm: float, burst: float):
+        self.requests = TokenBucket(burst, rpm / 60.0)
+        self.tokens = TokenBucket(tpm * burst / rpm, tpm / 60.0)
+        self.rpm = rpm
+        self.tpm = tpm
+        self._seq = itertools.count()
+        self._waiting = []          # heap of (-priority, seq)
+        self._by_key = {}           # coalescing key → future shared by duplicates
+        self._granted_at = deque()  # Timestamps of granted calls, last hour
+        self._token_log = deque()   # (timestamp, real input tokens) of completed calls, last hour
+
+    async def submit(self, call, priority: int = PRIORITY_PULSE, est_tokens: int = 0, key=None):
+        """Run `await call()` once budget allows. Returns its result, or None if the
+        request waited longer than MAX_WAIT[priority]. Requests with the same `key`
+        share one call while it is pending."""
+        if key is not None and key in self._by_key:
+            state["_budget_coalesced"] += 1
+            return await asyncio.shield(self._by_key[key])
+
+        future = asyncio.get_running_loop().create_future()
+        if key is not None:
+            self._by_key[key] = future
+        try:
+            result = None
+            if await self._acquire(priority, est_tokens):
+                result = await call()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.set_result(None)  # Duplicates just see "no verdict", they weren't cancelled
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved — duplicates re-raise it themselves
+            raise
+        finally:
+            if key is not None and self._by_key.get(key) is future:
+                del self._by_key[key]
+
+    async def _acquire(self, priority: int, est_tokens: int) -> bool:
+        ticket = (-priority, next(self._seq))
+        heapq.heappush(self._waiting, ticket)
+        deadline = time.monotonic() + MAX_WAIT.get(priority, 4.0)
+        try:
+            while True:
+                wait = 0.1  # Not at the head yet: poll until the queue moves
+                if self._waiting[0] == ticket:
+                    wait = max(self.requests.wait_time(1), self.tokens.wait_time(est_tokens))
+                    if wait == 0.0:
+                        self.requests.take(1)
+                        self.tokens.take(est_tokens)
+                        self._granted_at.append(time.time())
+                        self._prune()
+                        state["_budget_granted"] += 1
+                        return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    state["_budget_denied"] += 1
+                    return False
+                await asyncio.sleep(min(wait, remaining, 0.25))
+        finally:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+
+    def settle(self, est_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the real prompt size is known."""
+        self.tokens.take(actual_tokens - est_tokens)
+        self._token_log.append((time.time(), actual_tokens))
+
+    def _prune(self):
+        """Keep one hour of history for the per-hour spend figures."""
+        cutoff = time.time() - 3600
+        while self._granted_at and self._granted_at[0] < cutoff:
+            self._granted_at.popleft()
+        while self._token_log and self._token_log[0][0] < cutoff:
+            self._token_log.popleft()
+
+    def get_stats(self) -> dict:
+        """Live budget telemetry for the settings panel."""
+        self._prune()
+        now = time.time()
+        return {
+            "rpm_limit": self.rpm,
+            "tpm_limit": self.tpm,
+            "requests_available": round(self.requests.available(), 2),
+            "tokens_available": int(self.tokens.available()),
+            "queued": len(self._waiting),
+            "requests_last_min": sum(1 for ts in self._granted_at if now - ts <= 60),
+            "tokens_last_min": sum(tok for ts, tok in self._token_log if now - ts <= 60),
+            "requests_last_hour": len(self._granted_at),
+            "tokens_last_hour": sum(tok for _, tok in self._token_log),
+            "granted": state["_budget_granted"],
+            "denied": state["_budget_denied"],
+            "coalesced": state["_budget_coalesced"],
+        }
+
+
+scheduler = LiteScheduler(LITE_BUDGET_RPM, LITE_BUDGET_TPM, LITE_BUDGET_BURST)
@@ -0,0 +1,154 @@
+"""
+FocusPals — Mic Replay Harness
+Feeds WAV files through listen_mic's own uplink code — run_input_stage with the
+shipped gate settings (checks → VAD → gate → AudioQueue), then run_uplink (framer
+→ send) — with a recording sender in place of the Live session. No microphone, no API key,
+no gemini_session import — runs on a headless Linux box.
+
+Per file it reports how long the gate took to open after each labelled utterance
+started (on the audio clock), what was sent, and the CPU cost per minute of audio.
+Labels are optional: `name.json` next to `name.wav` with {"speech": [[start_s, end_s], ...]}.
+
+Usage: python replay_mic.py [wav_or_dir ...] [--speed N] [--vad adaptive|energy]
+  --speed 1: real time, like a live mic (default 0: as fast as possible)
+  No path: the synthetic fixtures from bench_vad.py.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from audio import make_vad
+from audio_pipeline import (
+    AudioQueue, UplinkFramer, WavReplaySource, COALESCE, GATE_CLOSED, make_input_stage, run_input_stage, run_uplink,
+)
+from config import CHUNK_SIZE, SEND_SAMPLE_RATE, UPLINK_FRAME_MS, UPLINK_MAX_DELAY_MS, VAD_ENGINE
+
+
+async def replay(path: str, speed: float = 0.0, vad_name: str = VAD_ENGINE) -> dict:
+    """Run one WAV through the uplink stages. Same loop and gate/queue/framer settings as listen_mic."""
+    source = WavReplaySource(path, CHUNK_SIZE * 2, speed=speed)
+    stage = make_input_stage(make_vad(vad_name))
+    queue = AudioQueue("replay", maxsize=50, policy=COALESCE, max_bytes=SEND_SAMPLE_RATE * 2 * 10)
+    framer = UplinkFramer(SEND_SAMPLE_RATE * 2 * UPLINK_FRAME_MS // 1000, UPLINK_MAX_DELAY_MS / 1000)
+
+    frames = []              # (audio clock when sent, bytes)
+    open_spans = []          # [opened_at, closed_at] on the audio clock
+
+    async def send(frame):
+        frames.append((source.audio_time, len(frame)))
+        return True
+
+    def on_chunk(stage):
+        # Where listen_mic runs barge-in / user_spoke_at / Godot acks: record the gate transitions
+        if stage.gate.opened:
+            open_spans.append([source.audio_time, None])
+        if stage.gate.closed:
+            open_spans[-1][1] = source.audio_time
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    uplink = asyncio.create_task(run_uplink(queue, framer, send))
+    await run_input_stage(source, stage, queue, on_chunk=on_chunk)
+    await queue.put(GATE_CLOSED)
+    while not queue.empty() or framer.time_left() is not None:
+        await asyncio.sleep(0)
+    uplink.cancel()
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "duration": source.duration,
+        "wall": time.perf_counter() - wall_start,
+        "cpu": cpu,
+        "frames": frames,
+        "open_spans": open_spans,
+        "skipped": stage.skipped,
+        "hold_ms": framer.avg_hold_ms,
+    }
+
+
+def gate_latencies(open_spans: list, speech: list) -> tuple[list, int]:
+    """Per labelled utterance: seconds from its start to the gate being open.
+    0 if the gate was still open from the previous one. Returns (latencies, missed)."""
+    latencies, missed = [], 0
+    for start, end in speech:
+        latency = None
+        for opened, closed in open_spans:
+            if opened <= start and (closed is None or closed > start):
+                latency = 0.0
+                break
+            if start < opened <= end:
+                latency = opened - start
+                break
+        if latency is None:
+            missed += 1
+        else:
+            latencies.append(latency)
+    return latencies, missed
+
+
+def _collect(paths: list) -> list:
+    wavs = []
+    for path in paths:
+        if os.path.isdir(path):
+            wavs += [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith(".wav")]
+        else:
+            wavs.append(path)
+    return wavs
+
+
+def _arg(name: str, default):
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return default
+
+
+def main():
+    speed = float(_arg("--speed", 0))
+    vad_name = _arg("--vad", VAD_ENGINE)
+    skip = {sys.argv.index(f) + 1 for f in ("--speed", "--vad") if f in sys.argv}
+    paths = [a for i, a in enumerate(sys.argv[1:], 1) if not a.startswith("--") and i not in skip]
+
+    tmp = None
+    if not paths:
+        from bench_vad import synthetic_fixtures, write_fixtures
+        tmp = tempfile.TemporaryDirectory()
+        write_fixtures(synthetic_fixtures(), tmp.name)
+        paths = [tmp.name]
+
+    mode = "real time" if speed == 1 else ("as fast as possible" if speed <= 0 else f"{speed:g}x")
+    print(f"\n🔁 Mic replay — VAD: {vad_name}, {mode}, frames {UPLINK_FRAME_MS}ms / cap {UPLINK_MAX_DELAY_MS}ms")
+    print("-" * 96)
+    print(f"{'File':<16}{'audio s':>8}{'opens':>7}{'found':>8}{'gate ms avg/max':>17}"
+          f"{'frames':>8}{'KB sent':>9}{'% sent':>8}{'CPU ms/min':>12}")
+    for wav in _collect(paths):
+        result = asyncio.run(replay(wav, speed, vad_name))
+        name = os.path.splitext(os.path.basename(wav))[0]
+        sent = sum(n for _, n in result["frames"])
+        total = result["duration"] * SEND_SAMPLE_RATE * 2
+        cpu_per_min = result["cpu"] * 1000 / max(result["duration"] / 60, 1e-9)
+
+        found, latency = "-", "-"
+        labels = os.path.splitext(wav)[0] + ".json"
+        if os.path.exists(labels):
+            with open(labels, "r", encoding="utf-8") as f:
+                speech = json.load(f)["speech"]
+            latencies, missed = gate_latencies(result["open_spans"], speech)
+            found = f"{len(speech) - missed}/{len(speech)}"
+            if latencies:
+                latency = f"{sum(latencies) / len(latencies) * 1000:.0f}/{max(latencies) * 1000:.0f}"
+
+        print(f"{name[:15]:<16}{result['duration']:>8.1f}{len(result['open_spans']):>7}{found:>8}{latency:>17}"
+              f"{len(result['frames']):>8}{sent / 1024:>9.0f}{sent / max(total, 1) * 100:>7.0f}%{cpu_per_min:>12.0f}")
+    print()
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+FocusPals — Screen Capture
+Multi-monitor capture, JPEG encoding, and frame change detection.
+The frame signature lets Flash-Lite skip screens that haven't visibly changed.
+
+Capture path: the raw BGRA buffer from mss is wrapped as a NumPy view (no copy),
+area-downsampled by an integer factor, and only the small image is colour-converted
+and encoded. A 4K desktop never exists as a full-size RGB/PIL image.
+
+Every consumer (pulse, look_at_screen, spare tire, app_control screenshots) goes
+through one FrameStore: ask for "a frame no older than X ms" and get the same
+immutable Frame everyone else got, instead of grabbing and encoding again.
+The grab itself always runs on one dedicated thread holding the only mss instance.
+"""
+
+import hashlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import mss
+import numpy as np
+from PIL import Image
+
+# ─── Capture Settings ──────────────────────────────────────
+THUMBNAIL_SIZE = (1024, 1024)   # Max size of the merged desktop sent to Flash-Lite
+JPEG_QUALITY = 50
+PULSE_MAX_AGE_MS = 250          # Pulse reuses a frame this fresh (take_screenshot, look_at_screen) instead of grabbing
+
+# ─── Change Detection ──────────────────────────────────────
+SIGNATURE_GRID = 16             # 16x16 tiles of mean luminance = 256-byte signature
+TILE_DELTA = 10                 # Luminance change (0-255) for a tile to count as "changed"
+
+
+# GDI contexts are thread-affine on Windows: every grab runs on this single thread,
+# so there is exactly one mss instance (one GDI context) for the whole app.
+_grab_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen-grab")
+_sct = None                     # Only touched from the screen-grab thread
+
+
+def _get_grabber():
+    """Return the mss instance, creating it on first use."""
+    global _sct
+    if _sct is None:
+        _sct = mss.mss()
+    return _sct
+
+
+def _reset_grabber():
+    """Drop the mss instance (stale GDI context, monitor hot-plug, shutdown...)."""
+    global _sct
+    sct, _sct = _sct, None
+    if sct is not None:
+        try:
+            sct.close()
+        except Exception:
+            pass
+
+
+def grab_desktop_bgra() -> tuple[np.ndarray, tuple]:
+    """Grab the merged desktop (all monitors) as an (H, W, 4) BGRA uint8 view,
+    plus the monitor layout: ((left, top, width, height), ...), merged desktop first.
+    The array wraps the buffer mss returned — nothing is converted here.
+    Blocks the calling thread while the screen-grab thread does the grab."""
+    return _grab_executor.submit(_grab).result()
+
+
+def _grab() -> tuple[np.ndarray, tuple]:
+    """grab_desktop_bgra on the screen-grab thread. If the cached grabber fails,
+    it is rebuilt once before giving up."""
+    for attempt in range(2):
+        try:
+            sct = _get_grabber()
+            screenshot = sct.grab(sct.monitors[0])
+            layout = tuple((m["left"], m["top"], m["width"], m["height"]) for m in sct.monitors)
+            break
+        except Exception:
+            _reset_grabber()
+            if attempt:
+                raise
+    bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(screenshot.height, screenshot.width, 4)
+    return bgra, layout
+
+
+def close_grabber():
+    """Shutdown: close the mss instance on its own thread, then stop that thread."""
+    try:
+        _grab_executor.submit(_reset_grabber).result(timeout=2.0)
+    except Exception:
+        pass
+    _grab_executor.shutdown(wait=False)
+
+
+def downsample_bgra(frame: np.ndarray, max_size: tuple[int, int] = THUMBNAIL_SIZE) -> Image.Image:
+    """Area-average a BGRA frame by the largest integer factor that keeps it at
+    least max_size, then swap to RGB on the small result and let PIL finish the
+    (cheap) fractional resize.
+
+    Rows are summed into a uint16 accumulator first (contiguous reads), then each
+    pixel's 4 uint16 channels are treated as one uint64 for the column sums.
+    Channel sums never exceed 16*16*255 < 65536, so the packed lanes can't carry."""
+    height, width = frame.shape[:2]
+    factor = max(1, min(16, max(width // max_size[0], height // max_size[1])))
+    if factor > 1:
+        out_h, out_w = height // factor, width // factor
+        bands = frame[:out_h * factor].reshape(out_h, factor, width * 4)
+        rows = bands[:, 0].astype(np.uint16)
+        for i in range(1, factor):
+            rows += bands[:, i]
+        packed = rows.view(np.uint64).reshape(out_h, width)[:, :out_w * factor]
+        acc = packed[:, 0::factor].copy()
+        for j in range(1, factor):
+            acc += packed[:, j::factor]
+        pixels = acc.view(np.uint16).reshape(out_h, out_w, 4)
+        rgb = (pixels[..., 2::-1] // (factor * factor)).astype(np.uint8)
+    else:
+        rgb = np.ascontiguousarray(frame[..., 2::-1])
+
+    img = Image.fromarray(rgb, "RGB")
+    img.thumbnail(max_size, Image.Resampling.BILINEAR)
+    return img
+
+
+# ─── Frame Store ───────────────────────────────────────────
+
+class Frame(NamedTuple):
+    """One encoded desktop capture. Immutable: share it, never copy it."""
+    version: int            # Monotonically increasing per store
+    captured_at: float      # time.time() when the grab started
+    jpeg: bytes             # THUMBNAIL_SIZE JPEG, what Flash-Lite / Live API receive
+    thumbnail: np.ndarray   # (H, W, 3) RGB uint8, read-only
+    signature: bytes        # compute_frame_signature() of the thumbnail
+    layout: tuple           # ((left, top, width, height), ...) merged desktop first
+
+
+def encode_frame(bgra: np.ndarray, layout: tuple, version: int, captured_at: float) -> Frame:
+    """Downsample, sign and JPEG-encode a raw BGRA desktop into a Frame."""
+    img = downsample_bgra(bgra)
+    signature = compute_frame_signature(img)
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    thumbnail = np.asarray(img)
+    thumbnail.flags.writeable = False
+    return Frame(version, captured_at, buffer.getvalue(), thumbnail, signature, layout)
+
+
+class FrameStore:
+    """Latest Frame plus single-flight capture: callers that need a newer frame
+    while a grab is already running wait for it instead of grabbing again."""
+
+    def __init__(self):
+        self._frame = None
+        self._version = 0
+        self._lock = threading.Lock()          # Guards _frame / _version
+        self._capture_lock = threading.Lock()  # One grab at a time
+        self.captures = 0
+        self.reuses = 0
+
+    def get_frame(self, max_age_ms: float = 0) -> Frame:
+        """A frame captured at most max_age_ms before this call. Blocking: run it
+        via asyncio.to_thread from async code, like any other capture."""
+        oldest_ok = time.time() - max_age_ms / 1000.0
+        frame = self._frame
+        if frame is not None and frame.captured_at >= oldest_ok:
+            self.reuses += 1
+            return frame
+        with self._capture_lock:
+            frame = self._frame  # Another caller may have captured while we waited
+            if frame is not None and frame.captured_at >= oldest_ok:
+                self.reuses += 1
+                return frame
+            captured_at = time.time()
+            bgra, layout = grab_desktop_bgra()
+            return self.publish(bgra, layout, captured_at)
+
+    def publish(self, bgra: np.ndarray, layout: tuple, captured_at: float) -> Frame:
+        """Encode a desktop grabbed elsewhere (e.g. a full-res screenshot) and make it the latest frame."""
+        with self._lock:
+            self._version += 1
+            version = self._version
+        frame = encode_frame(bgra, layout, version, captured_at)
+        with self._lock:
+            if self._frame is None or frame.version > self._frame.version:
+                self._frame = frame
+            self.captures += 1
+        return frame
+
+
+frame_store = FrameStore()
+
+
+def get_frame(max_age_ms: float = 0) -> Frame:
+    """Shortcut for frame_store.get_frame()."""
+    return frame_store.get_frame(max_age_ms)
+
+
+def capture_screen_frame(max_age_ms: float = 0) -> tuple[bytes, bytes]:
+    """Capture ALL connected monitors, merge them, and return (jpeg_bytes, signature).
+    The signature is computed on the already-downscaled thumbnail, so it costs ~nothing."""
+    frame = get_frame(max_age_ms)
+    return frame.jpeg, frame.signature
+
+
+def capture_all_screens(max_age_ms: float = 0) -> bytes:
+    """Capture ALL connected monitors, merge them, and output a lightweight JPEG."""
+    return get_frame(max_age_ms).jpeg
+
+
+def compute_frame_signature(img: Image.Image) -> bytes:
+    """Mean luminance of each tile on a SIGNATURE_GRID x SIGNATURE_GRID grid.
+    BOX resampling averages every pixel of a tile, so cursor blinks and clock
+    ticks barely move it, while a window switch or a playing video does."""
+    small = img.convert("L").resize((SIGNATURE_GRID, SIGNATURE_GRID), Image.Resampling.BOX)
+    return small.tobytes()
+
+
+def frame_difference(sig_a: bytes, sig_b: bytes) -> float:
+    """Fraction of tiles (0.0-1.0) whose luminance moved by more than TILE_DELTA."""
+    if len(sig_a) != len(sig_b) or not sig_a:
+        return 1.0
+    changed = sum(1 for a, b in zip(sig_a, sig_b) if abs(a - b) > TILE_DELTA)
+    return changed / len(sig_a)
+
+
+def signature_key(signature: bytes) -> str:
+    """Short content address for a frame. Tiles are quantized to 16 luminance
+    levels first, so re-capturing the same screen yields the same key."""
+    quantized = bytes(v >> 4 for v in signature)
+    return hashlib.blake2b(quantized, digest_size=8).hexdigest()
@@ -0,0 +1,136 @@
+"""
+FocusPals — Screen Pipeline
+Double-buffered capture → classify stage for the deep_work pulse.
+
+    capture (window scan ‖ screenshot) ──▶ [pending slot] ──▶ classify ──▶ latest result
+
+Capture of frame N+1 overlaps the classification of frame N, and the pulse loop
+picks up the newest finished result instead of running every step itself.
+Detection latency is bounded by the slowest stage, not by the sum of all of them.
+If classify falls behind, the unclassified frame is replaced by the newer one:
+only the freshest screen is worth paying Flash-Lite for.
+"""
+
+import asyncio
+import time
+
+
+class ScreenPipeline:
+    """Producer/consumer pair run inside the Live session's TaskGroup.
+
+    scan_windows()  → (active_title, open_window_titles)      [sync, run in a thread]
+    capture()       → (jpeg_bytes, frame_signature)            [sync, run in a thread]
+    classify(snap)  → Flash-Lite result dict or None           [async]
+    interval()      → seconds between two captures
+    is_paused()     → True while nothing should be captured (break, conversation...)
+    """
+
+    def __init__(self, scan_windows, capture, classify, interval, is_paused, classify_timeout: float = 8.0):
+        self._scan_windows = scan_windows
+        self._capture = capture
+        self._classify = classify
+        self._interval = interval
+        self._is_paused = is_paused
+        self.classify_timeout = classify_timeout
+
+        self._frame_seq = 0
+        self._pending = None                 # Captured, waiting for classify (1 slot)
+        self._pending_ready = asyncio.Event()
+        self._wake = asyncio.Event()         # rescan() → capture now instead of waiting
+
+        self._result = None                  # Last completed snapshot + verdict
+        self._result_seq = 0
+        self._consumed_seq = 0
+        self._result_ready = asyncio.Event()
+
+        self.frames_captured = 0
+        self.frames_dropped = 0              # Overwritten in the pending slot before classify
+        self.last_latency = 0.0              # Capture start → verdict available (seconds)
+
+    async def run(self):
+        """Run both stages until cancelled."""
+        await asyncio.gather(self._capture_loop(), self._classify_loop())
+
+    def rescan(self):
+        """Capture a new frame immediately (e.g. the foreground window just changed)."""
+        self._wake.set()
+
+    async def next_result(self, timeout: float):
+        """Return the newest result not yet consumed, waiting at most `timeout` seconds.
+        Each result is handed out once, so its suspicion delta is never applied twice.
+        Returns None if nothing new arrived in time."""
+        if self._result_seq == self._consumed_seq:
+            self._result_ready.clear()
+            try:
+                await asyncio.wait_for(self._result_ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        self._consumed_seq = self._result_seq
+        return self._result
+
+    async def _sleep_or_wake(self, delay: float) -> bool:
+        """Sleep up to `delay` seconds. True if rescan() cut it short."""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, delay))
+            woken = True
+        except asyncio.TimeoutError:
+            woken = False
+        self._wake.clear()
+        return woken
+
+    async def _capture_loop(self):
+        while True:
+            if self._is_paused():
+                await self._sleep_or_wake(1.0)
+                continue
+
+            started = time.time()
+            try:
+                # Window enumeration and the screenshot hit different OS APIs → run side by side
+                (active_title, open_windows), (jpeg_bytes, signature) = await asyncio.gather(
+                    asyncio.to_thread(self._scan_windows),
+                    asyncio.to_thread(self._capture),
+                )
+            except Exception as e:
+                print(f"  ⚠️ Screen capture error: {e}")
+            else:
+                if self._pending is not None:
+                    self.frames_dropped += 1
+                self._frame_seq += 1
+                self.frames_captured += 1
+                self._pending = {
+                    "seq": self._frame_seq,
+                    "captured_at": started,
+                    "active_title": active_title,
+                    "open_windows": open_windows,
+                    "jpeg": jpeg_bytes,
+                    "signature": signature,
+                }
+                self._pending_ready.set()
+
+            # Re-read the interval every second: it shrinks as soon as suspicion rises
+            while time.time() - started < self._interval():
+                if await self._sleep_or_wake(min(1.0, self._interval() - (time.time() - started))):
+                    break
+
+    async def _classify_loop(self):
+        while True:
+            await self._pending_ready.wait()
+            self._pending_ready.clear()
+            snap, self._pending = self._pending, None
+            if snap is None:
+                continue
+
+            lite_result = None
+            try:
+                lite_result = await asyncio.wait_for(self._classify(snap), timeout=self.classify_timeout)
+            except asyncio.TimeoutError:
+                print(f"  ⚠️ Flash-Lite timeout (>{self.classify_timeout:.0f}s) — using cached state.")
+            except Exception as e:
+                print(f"  ⚠️ Flash-Lite error: {e}")
+
+            # Publish even without a verdict: the window list is still fresh
+            self.last_latency = time.time() - snap["captured_at"]
+            self._result = dict(snap, lite_result=lite_result, latency=self.last_latency)
+            self._result_seq += 1
+            self._result_ready.set()
@@ -56,6 +56,8 @@ from config import state
 from ui import TamaState, setup_tray
 from godot_bridge import launch_godot_overlay, mouse_edge_monitor, ws_handler, broadcast_ws_state
 from gemini_session import run_gemini_loop
+from audio_devices import AudioDeviceManager
+from screen_capture import close_grabber
 
 
 # Initialize TamaState in shared state
@@ -68,24 +70,30 @@ async def run_tama_live():
     install_async_exception_handler(asyncio.get_running_loop())
 
     pya = pyaudio.PyAudio()
+    # Mic/speaker streams live here, not in a Live session: they survive reconnects
+    devices = AudioDeviceManager(pya)
 
     # Retry loop: if port 8080 is still occupied, kill + retry
     from godot_bridge import _free_port_sync
     max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            async with websockets.serve(ws_handler, "localhost", 8080, reuse_address=True):
-                async with asyncio.TaskGroup() as main_tg:
-                    main_tg.create_task(broadcast_ws_state())
-                    main_tg.create_task(run_gemini_loop(pya))
-            break  # Clean exit
-        except OSError as e:
-            if e.errno == 10048 and attempt < max_retries - 1:  # Address already in use
-                print(f"⚠️ Port 8080 occupé (tentative {attempt + 1}/{max_retries}) — nettoyage...")
-                await asyncio.to_thread(_free_port_sync, 8080)
-                await asyncio.sleep(2)
-            else:
-                raise
+    try:
+        for attempt in range(max_retries):
+            try:
+                async with websockets.serve(ws_handler, "localhost", 8080, reuse_address=True):
+                    async with asyncio.TaskGroup() as main_tg:
+                        main_tg.create_task(broadcast_ws_state())
+                        main_tg.create_task(run_gemini_loop(pya, devices))
+                break  # Clean exit
+            except OSError as e:
+                if e.errno == 10048 and attempt < max_retries - 1:  # Address already in use
+                    print(f"⚠️ Port 8080 occupé (tentative {attempt + 1}/{max_retries}) — nettoyage...")
+                    await asyncio.to_thread(_free_port_sync, 8080)
+                    await asyncio.sleep(2)
+                else:
+                    raise
+    finally:
+        devices.close()
+        close_grabber()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+"""
+FocusPals — Title Model
+On-device multinomial naive Bayes over window-title tokens, trained online from
+Flash-Lite verdicts. Predicts category + alignment with a calibrated confidence,
+so titles Tama has already seen classified don't need a screenshot again.
+Persisted to title_model.json (separate from tama_memory.json and user_prefs.json).
+"""
+
+import json
+import math
+import os
+import re
+import threading
+
+from config import application_path
+
+# ─── Path ───────────────────────────────────────────────────
+MODEL_PATH = os.path.join(application_path, "title_model.json")
+
+# ─── Settings ───────────────────────────────────────────────
+SMOOTHING = 0.5                 # Laplace/Lidstone alpha
+CALIBRATION_BINS = 10           # Raw posterior → observed accuracy, histogram binning
+SAVE_EVERY = 10                 # Persist after this many new samples
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+# ─── In-memory model ────────────────────────────────────────
+_model: dict = {}
+_unsaved = 0
+_save_lock = threading.Lock()   # Background writes never interleave on the .tmp file
+_save_seq = 0                   # Bumped per snapshot; an older snapshot never overwrites a newer one
+_written_seq = 0
+
+
+def _empty_model() -> dict:
+    return {
+        "version": 1,
+        "samples": 0,
+        "class_counts": {},         # label → number of samples
+        "token_totals": {},         # label → sum of token counts
+        "token_counts": {},         # label → {token: count}
+        "vocab": {},                # token → number of samples containing it
+        "calibration": [[0, 0] for _ in range(CALIBRATION_BINS)],  # [correct, seen] per raw-confidence bin
+    }
+
+
+def load_model() -> dict:
+    """Load title_model.json into memory. Starts empty if missing or unreadable."""
+    global _model
+    try:
+        if os.path.exists(MODEL_PATH):
+            with open(MODEL_PATH, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            _model = {**_empty_model(), **loaded}
+        else:
+            _model = _empty_model()
+    except Exception as e:
+        print(f"⚠️ Failed to load title_model.json: {e}")
+        _model = _empty_model()
+    return _model
+
+
+def _snapshot() -> dict:
+    """Copy of the model that learn() can keep mutating while it is written.
+    Plain dict/list copies: no encoding, no I/O, cheap enough for the event loop."""
+    m = _model
+    return {
+        **m,
+        "class_counts": dict(m["class_counts"]),
+        "token_totals": dict(m["token_totals"]),
+        "token_counts": {label: dict(counts) for label, counts in m["token_counts"].items()},
+        "vocab": dict(m["vocab"]),
+        "calibration": [list(cell) for cell in m["calibration"]],
+    }
+
+
+def _write_model(snapshot: dict, seq: int):
+    """Temp file + os.replace, so a crash never leaves half a file."""
+    global _written_seq
+    with _save_lock:
+        if seq < _written_seq:
+            return
+        try:
+            tmp_path = MODEL_PATH + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, MODEL_PATH)
+            _written_seq = seq
+        except Exception as e:
+            print(f"⚠️ Failed to save title_model.json: {e}")
+
+
+def save_model(background: bool = False):
+    """Persist the model. background=True does the JSON dump and disk write on a
+    daemon thread, so learn() (called on the event loop) never blocks on it."""
+    global _unsaved, _save_seq
+    if not _model:
+        return
+    _save_seq += 1
+    snapshot = _snapshot()
+    _unsaved = 0
+    if background:
+        threading.Thread(target=_write_model, args=(snapshot, _save_seq),
+                         daemon=True, name="title-model-save").start()
+    else:
+        _write_model(snapshot, _save_seq)
+
+
+def _get_model() -> dict:
+    if not _model:
+        load_model()
+    return _model
+
+
+def tokenize(title: str, task: str | None = None) -> list:
+    """Unique lowercase title tokens (2+ chars), plus one token for the declared task
+    since the same app can be aligned for one task and not for another."""
+    tokens = {t for t in _TOKEN_RE.findall((title or "").lower()) if len(t) > 1}
+    if task:
+        tokens.add("task:" + " ".join(task.lower().split()))
+    return sorted(tokens)
+
+
+def _label(category: str, alignment: float) -> str:
+    return f"{category}|{float(alignment)}"
+
+
+def _raw_posterior(model: dict, tokens: list) -> tuple[str | None, float]:
+    """Most likely label and its (uncalibrated) posterior probability."""
+    class_counts = model["class_counts"]
+    if not class_counts:
+        return None, 0.0
+    total = model["samples"]
+    vocab_size = len(model["vocab"]) + 1
+    scores = {}
+    for label, n in class_counts.items():
+        counts = model["token_counts"][label]
+        denom = math.log(model["token_totals"][label] + SMOOTHING * vocab_size)
+        score = math.log(n / total)
+        for t in tokens:
+            score += math.log(counts.get(t, 0) + SMOOTHING) - denom
+        scores[label] = score
+    best = max(scores, key=scores.get)
+    top = scores[best]
+    norm = sum(math.exp(s - top) for s in scores.values())
+    return best, 1.0 / norm
+
+
+def _bin(p: float) -> int:
+    return min(CALIBRATION_BINS - 1, int(p * CALIBRATION_BINS))
+
+
+def predict(title: str, task: str | None = None) -> dict | None:
+    """Predict {category, alignment, confidence} for a title, or None if the model
+    has never seen any of its tokens. Confidence is the observed accuracy of past
+    predictions that had a similar raw posterior (Beta(1,1) prior per bin), so an
+    untested model stays near 0.5 instead of being naively overconfident."""
+    model = _get_model()
+    tokens = tokenize(title, task)
+    if not any(t in model["vocab"] for t in tokens if not t.startswith("task:")):
+        return None
+    label, raw = _raw_posterior(model, tokens)
+    if label is None:
+        return None
+    correct, seen = model["calibration"][_bin(raw)]
+    category, alignment = label.split("|")
+    return {
+        "category": category,
+        "alignment": float(alignment),
+        "confidence": (correct + 1) / (seen + 2),
+        "raw_confidence": raw,
+    }
+
+
+def learn(title: str, task: str | None, category: str, alignment: float):
+    """Add one labelled sample. O(tokens): the calibration check before the update
+    is one prediction over a handful of classes."""
+    global _unsaved
+    model = _get_model()
+    tokens = tokenize(title, task)
+    if not tokens:
+        return
+    label = _label(category, alignment)
+
+    # Prequential calibration: score the prediction made BEFORE seeing this label
+    predicted, raw = _raw_posterior(model, tokens)
+    if predicted is not None:
+        cell = model["calibration"][_bin(raw)]
+        cell[0] += int(predicted == label)
+        cell[1] += 1
+
+    model["samples"] += 1
+    model["class_counts"][label] = model["class_counts"].get(label, 0) + 1
+    model["token_totals"][label] = model["token_totals"].get(label, 0) + len(tokens)
+    counts = model["token_counts"].setdefault(label, {})
+    vocab = model["vocab"]
+    for t in tokens:
+        counts[t] = counts.get(t, 0) + 1
+        vocab[t] = vocab.get(t, 0) + 1
+
+    _unsaved += 1
+    if _unsaved >= SAVE_EVERY:
+        save_model(background=True)
+
+
+def get_model_stats() -> dict:
+    """Sample count, vocabulary size and overall prequential accuracy."""
+    model = _get_model()
+    correct = sum(c for c, _ in model["calibration"])
+    seen = sum(n for _, n in model["calibration"])
+    return {
+        "samples": model["samples"],
+        "vocab_size": len(model["vocab"]),
+        "accuracy": round(correct / seen, 3) if seen else None,
+    }
+
+
+def reset_model():
+    """Forget everything learned. Called from Settings > Reset along with memory."""
+    global _model, _unsaved, _save_seq, _written_seq
+    _model = _empty_model()
+    _unsaved = 0
+    with _save_lock:
+        _save_seq += 1
+        _written_seq = _save_seq  # A save still in flight must not bring the old model back
+        try:
+            if os.path.exists(MODEL_PATH):
+                os.remove(MODEL_PATH)
+        except Exception as e:
+            print(f"⚠️ Failed to reset title_model.json: {e}")
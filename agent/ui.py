@@ -15,8 +15,9 @@ from PIL import Image, ImageDraw
 import pystray
 from pystray import MenuItem as item
 
-from config import state, BREAK_CHECKPOINTS, get_dynamic_break_checkpoints
+from config import state, BREAK_CHECKPOINTS, VISEME_SEND_HZ, get_dynamic_break_checkpoints
 import tama_memory
+import title_model
 
 
 # ─── Tama States ────────────────────────────────────────────
@@ -110,6 +111,7 @@ def start_session(source="UI"):
         state["is_on_break"] = False
         state["session_completed"] = False
         state["just_started_session"] = True
+        state["_pulse_interval"] = 0.0  # Previous session's adaptive interval must not carry over
         # ── Tama Memory: record session start ──
         tama_memory.load_memory()
         tama_memory.record_session_start()
@@ -217,6 +219,7 @@ def open_settings_popup(icon=None, item=None):
     def reset_memory():
         if messagebox.askyesno("Reset Memory", "Effacer toute la mémoire de Tama ?\n(sessions, prénom, moments mémorables)\n\nTama te traitera comme un inconnu."):
             tama_memory.reset_memory()
+            title_model.reset_model()
             messagebox.showinfo("Reset", "Mémoire effacée ! Tama repartira de zéro.")
             print("🗑️ Tama memory reset by user")
 
@@ -293,6 +296,58 @@ def broadcast_to_godot(msg: str):
             pass
 
 
+class VisemeChannel:
+    """Lip sync link to Godot: latest shape wins, at most `rate_hz` messages/s.
+    Godot renders at a fixed frame rate, so a viseme replaced before the next
+    send slot would never have been seen: it is merged, not sent. Runs on the
+    event loop (update() from any coroutine, run() as a session task) and sends
+    directly, without a run_coroutine_threadsafe hop per client per message."""
+
+    def __init__(self, rate_hz: float = VISEME_SEND_HZ):
+        self.interval = 1.0 / max(1.0, rate_hz)
+        self.sent = 0           # Messages actually broadcast
+        self.merged = 0         # Updates replaced by a newer one before their send slot
+        self.unchanged = 0      # Send slots skipped: same shape/amp as the last message
+        self._pending = None
+        self._last = None
+        self._last_sent_at = 0.0
+        self._wake = asyncio.Event()
+
+    def update(self, shape: str, amp: float = 0.0):
+        if self._pending is not None:
+            self.merged += 1
+        self._pending = (shape, amp)
+        self._wake.set()
+
+    async def run(self):
+        while True:
+            await self._wake.wait()
+            wait = self._last_sent_at + self.interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)  # Keep collecting updates until the slot opens
+            self._wake.clear()
+            pending, self._pending = self._pending, None
+            if pending is None:
+                continue
+            if pending == self._last:
+                self.unchanged += 1
+                continue
+            msg = json.dumps({"command": "VISEME", "shape": pending[0], "amp": pending[1]})
+            for ws_client in list(state["connected_ws_clients"]):
+                try:
+                    await ws_client.send(msg)
+                except Exception:
+                    pass
+            self._last = pending
+            self._last_sent_at = time.monotonic()
+            self.sent += 1
+            self._publish_stats()
+
+    def _publish_stats(self):
+        state["_viseme_sent"] = self.sent
+        state["_viseme_merged"] = self.merged + self.unchanged
+
+
 def send_anim_to_godot(anim_name: str, loop: bool = False):
     """Send an animation command to Godot. Only Python decides when to animate."""
     broadcast_to_godot(json.dumps({"command": "TAMA_ANIM", "anim": anim_name, "loop": loop}))
@@ -1,10 +1,18 @@
 """
 FocusPals — Viseme Detection (Spectral Analysis)
 Real-time lip sync via FFT on PCM audio chunks.
-Classifies each chunk into a viseme: REST, OH, AH, EE_TEETH.
+Classifies audio into a viseme: REST, OH, AH, EE_TEETH.
 No ML, just numpy — runs in <0.1ms per chunk.
+
+detect_viseme(): one shape for a whole chunk.
+VisemeTimeline: one shape per 20ms sub-frame, batched in a single FFT, each
+stamped with the playback sample where it will be heard. play_audio sends
+them when the speaker's played-samples clock reaches that position, so the
+mouth moves with the audio instead of one output latency ahead of it.
 """
 
+from collections import deque
+
 import numpy as np
 
 # ─── Viseme Constants ──────────────────────────────────────
@@ -72,3 +80,100 @@ def detect_viseme(pcm_chunk: bytes, sample_rate: int = 24000) -> tuple[str, floa
         return VISEME_OH, amplitude
     else:
         return VISEME_AH, amplitude
+
+
+# ─── Sub-frame Timeline ────────────────────────────────────
+
+VISEME_FRAME_MS = 20         # Analysis frame: ~one mouth shape per syllable segment
+_AMP_STEP = 0.15             # Same-shape event only if the amplitude moved this much
+
+_frame_cache = {}            # (frame_len, sample_rate) → (hann window, bin freqs, first bin above 4kHz)
+
+
+def _frame_tables(n: int, sample_rate: int):
+    key = (n, sample_rate)
+    if key not in _frame_cache:
+        freqs = np.fft.rfftfreq(n, d=1.0 / sample_rate).astype(np.float32)
+        _frame_cache[key] = (np.hanning(n).astype(np.float32), freqs, int(np.searchsorted(freqs, 4000, side="right")))
+    return _frame_cache[key]
+
+
+_SHAPES = (VISEME_REST, VISEME_OH, VISEME_AH, VISEME_EE_TEETH)   # classify_frames() codes
+
+
+def classify_frames(frames: np.ndarray, sample_rate: int = 24000) -> tuple[np.ndarray, np.ndarray]:
+    """Same rules as detect_viseme() on each row of an (n_frames, frame_len)
+    int16 array, in one batched FFT. Returns (shape codes into _SHAPES, amplitudes)."""
+    x = frames.astype(np.float32)
+    window, freqs, hf_start = _frame_tables(x.shape[1], sample_rate)
+    rms = np.sqrt(np.einsum("ij,ij->i", x, x) / x.shape[1])
+    mag = np.abs(np.fft.rfft(x * window, axis=1))
+    total = mag.sum(axis=1) + 1e-10
+    centroid = (mag @ freqs) / total
+    hf_ratio = mag[:, hf_start:].sum(axis=1) / total
+    codes = 2 - (centroid < _CENTROID_LOW)                 # OH=1, AH=2
+    codes[hf_ratio > _HF_THRESHOLD] = 3                    # EE_TEETH wins, as in detect_viseme
+    silent = rms < _RMS_SILENCE
+    codes[silent] = 0
+    amplitudes = np.where(silent, 0.0, np.minimum(1.0, rms / 8000.0))
+    return codes, amplitudes
+
+
+class VisemeTimeline:
+    """Streaming sub-frame lip sync for one output stream.
+
+    feed() a chunk with the playback position (in samples) its first sample
+    will be played at; a partial trailing frame is carried into the next
+    contiguous chunk. Shape changes become (position, generation, shape, amp)
+    events. due() hands back those the playback clock has reached. Events from
+    an older generation (audio flushed by a barge-in) are dropped, never shown."""
+
+    def __init__(self, sample_rate: int = 24000, frame_ms: int = VISEME_FRAME_MS):
+        self.sample_rate = sample_rate
+        self.frame = sample_rate * frame_ms // 1000
+        self.events = deque()
+        self._carry = np.zeros(0, dtype=np.int16)
+        self._carry_pos = 0
+        self._last = (VISEME_REST, 0.0)
+
+    def feed(self, pcm, position: int, generation: int = 0) -> int:
+        """Analyze `pcm` (int16 bytes) that starts playing at sample `position`.
+        Returns the number of events added."""
+        x = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+        if len(self._carry) and self._carry_pos + len(self._carry) == position:
+            x = np.concatenate((self._carry, x))
+            position = self._carry_pos
+        n_frames = len(x) // self.frame
+        self._carry = x[n_frames * self.frame:].copy()
+        self._carry_pos = position + n_frames * self.frame
+        if n_frames == 0:
+            return 0
+        codes, amplitudes = classify_frames(x[:n_frames * self.frame].reshape(n_frames, self.frame), self.sample_rate)
+        added = 0
+        last_shape, last_amp = self._last
+        for i, (code, amp) in enumerate(zip(codes.tolist(), amplitudes.tolist())):
+            shape = _SHAPES[code]
+            if shape != last_shape or abs(amp - last_amp) > _AMP_STEP:
+                self.events.append((position + i * self.frame, generation, shape, round(amp, 2)))
+                last_shape, last_amp = shape, amp
+                added += 1
+        self._last = (last_shape, last_amp)
+        return added
+
+    def next_position(self) -> int | None:
+        return self.events[0][0] if self.events else None
+
+    def due(self, played: int, generation: int) -> list:
+        """Pop events whose first sample has been played: [(shape, amp), ...], oldest first."""
+        out = []
+        while self.events and (self.events[0][0] < played or self.events[0][1] != generation):
+            _, gen, shape, amp = self.events.popleft()
+            if gen == generation:
+                out.append((shape, amp))
+        return out
+
+    def clear(self):
+        """Forget pending events and the carried partial frame (barge-in, new reply)."""
+        self.events.clear()
+        self._carry = np.zeros(0, dtype=np.int16)
+        self._last = (VISEME_REST, 0.0)
@@ -19,6 +19,7 @@ const TWEAKS := [
 	{"key": "mood_decay_secs", "label": "🎭 Mood Decay", "min": 5.0, "max": 60.0, "step": 5.0, "default": 20.0, "suffix": "s"},
 	{"key": "pulse_delay_mult", "label": "📡 Pulse Delay", "min": 0.5, "max": 3.0, "step": 0.25, "default": 1.0, "suffix": "x"},
 	{"key": "voice_pitch", "label": "🎀 Voice Pitch", "min": 0.8, "max": 1.4, "step": 0.05, "default": 1.0, "suffix": "x"},
+	{"key": "speaker_jitter_ms", "label": "🔊 Voice Buffer", "min": 40.0, "max": 400.0, "step": 20.0, "default": 120.0, "suffix": "ms"},
 ]
 
 # Stability toggles — these require reconnection to take effect
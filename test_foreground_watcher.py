@@ -0,0 +1,106 @@
+"""
+FocusPals — Test Foreground Watcher
+
+Drives ForegroundWatcher.poll() with FakeForegroundProvider and a hand-set
+clock (no Win32, no event loop):
+
+  1. ⏳ Debounce          — a switch is reported only after 0.5s of stability
+  2. 🔀 Alt-tab flicker   — windows that don't stay in front are never reported
+  3. 🚦 min_gap           — a switch inside the gap is delivered late, not lost
+  4. 🕐 Start time        — changed_at (becomes active_window_start_time) is when
+                            the switch was first seen, not when it was confirmed
+  5. 🔔 Unread counters   — "(3) Inbox" → "(4) Inbox" is not a switch
+
+Usage : python test_foreground_watcher.py   (or pytest)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "agent"))
+
+from foreground_watcher import FakeForegroundProvider, ForegroundWatcher
+
+
+def make_watcher(**kwargs):
+    provider = FakeForegroundProvider()
+    events = []
+    watcher = ForegroundWatcher(provider, lambda title, changed_at: events.append((title, changed_at)), **kwargs)
+    return provider, watcher, events
+
+
+def run(watcher, start: float, end: float, step: float = 0.25):
+    """Poll every `step` seconds on the fake clock, start and end included."""
+    t = start
+    while t <= end + 1e-9:
+        watcher.poll(now=t)
+        t += step
+
+
+def test_debounce():
+    provider, watcher, events = make_watcher()
+    provider.set(1, "main.py - Visual Studio Code")
+    run(watcher, 10.0, 10.25)
+    assert events == [], "reported before the 0.5s debounce"
+    watcher.poll(now=10.5)
+    assert events == [("main.py - Visual Studio Code", 10.0)]
+    run(watcher, 10.75, 20.0)
+    assert len(events) == 1, "same window reported twice"
+
+
+def test_flicker_ignored():
+    provider, watcher, events = make_watcher()
+    for i, t in enumerate((5.0, 5.25, 5.5, 5.75)):
+        provider.set(i + 1, f"Window {i + 1}")
+        watcher.poll(now=t)
+    assert events == []
+    run(watcher, 6.0, 6.25)   # Window 4 first seen at 5.75, stable for 0.5s at 6.25
+    assert events == [("Window 4", 5.75)]
+
+
+def test_min_gap_delays_switch():
+    provider, watcher, events = make_watcher()
+    provider.set(1, "Inbox - Outlook")
+    run(watcher, 10.0, 10.5)
+    assert events == [("Inbox - Outlook", 10.0)]
+
+    provider.set(2, "Netflix - Google Chrome")
+    run(watcher, 11.0, 12.25)  # Debounced at 11.5, but only 1.75s since the last event
+    assert len(events) == 1, "event emitted inside min_gap"
+    watcher.poll(now=12.5)     # 2.0s after the first event
+    assert events[1] == ("Netflix - Google Chrome", 11.0), "late event must keep the first-seen time"
+
+
+def test_start_time_is_first_seen():
+    provider, watcher, events = make_watcher(min_gap=0.0)
+    provider.set(7, "Blender")
+    run(watcher, 100.0, 100.5)
+    provider.set(8, "Steam")
+    watcher.poll(now=101.1)
+    watcher.poll(now=101.3)
+    watcher.poll(now=101.65)
+    assert events == [("Blender", 100.0), ("Steam", 101.1)]
+
+
+def test_unread_counter_is_not_a_switch():
+    provider, watcher, events = make_watcher(min_gap=0.0)
+    provider.set(3, "(3) Inbox - Gmail")
+    run(watcher, 0.0, 0.5)
+    provider.set(3, "(4) Inbox - Gmail")
+    run(watcher, 0.75, 5.0)
+    assert events == [("(3) Inbox - Gmail", 0.0)]
+
+
+if __name__ == "__main__":
+    tests = [test_debounce, test_flicker_ignored, test_min_gap_delays_switch,
+             test_start_time_is_first_seen, test_unread_counter_is_not_a_switch]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)